@@ -0,0 +1,95 @@
+# ==========================
+# LRE-BOT/bench/bench_pool.py
+# ==========================
+"""
+Benchmark du pool de connexions (user-001) : coût d'une fin de cycle Pomodoro.
+
+  avant : une connexion aiosqlite ouverte par appel (comme l'ancien core/db.py),
+          4 accès par fin de cycle (session, temps, participant, sticky), un commit chacun ;
+  après : core/db.py sur le pool (complete_cycle + get_sticky + check de maintenance).
+
+Une écriture isolée attend la fenêtre de group commit (DB_WRITE_WINDOW_MS, 3 ms par défaut) :
+pour mesurer le pool seul, dans les conditions de user-001, lancer avec DB_WRITE_WINDOW_MS=0.
+
+Usage : [DB_WRITE_WINDOW_MS=0] python bench/bench_pool.py [--cycles 300]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+TMP = tempfile.mkdtemp(prefix="lre-bench-")
+os.environ["DB_PATH"] = os.path.join(TMP, "bot.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import aiosqlite  # noqa: E402
+from core import db  # noqa: E402
+
+
+async def naive_cycle_end(path: str, guild_id: int, user_id: int, start: int):
+    """Fin de cycle de l'ancien core/db.py : aiosqlite.connect() à chaque appel"""
+    async with aiosqlite.connect(path) as conn:
+        await conn.execute("""
+            INSERT INTO sessions (user_id, guild_id, mode, work_time, pause_time,
+                                  start_timestamp, end_timestamp, day_of_week, hour_of_day)
+            VALUES (?, ?, 'A', 3000, 600, ?, ?, 0, 0)
+        """, (user_id, guild_id, start, start + 3600))
+        await conn.commit()
+    async with aiosqlite.connect(path) as conn:
+        await conn.execute("""
+            UPDATE users SET total_time = total_time + 3000, total_A = total_A + 3000
+            WHERE user_id = ? AND guild_id = ?
+        """, (user_id, guild_id))
+        await conn.commit()
+    async with aiosqlite.connect(path) as conn:
+        await conn.execute("""
+            UPDATE participants SET validated = 0, cycles_completed = cycles_completed + 1
+            WHERE guild_id = ? AND user_id = ?
+        """, (guild_id, user_id))
+        await conn.commit()
+    async with aiosqlite.connect(path) as conn:
+        async with conn.execute("SELECT message_id FROM sticky_messages WHERE channel_id = ?", (1,)) as cursor:
+            await cursor.fetchone()
+
+
+async def main(cycles: int):
+    await db.open_db()
+    await db.init_db()
+    for user_id in range(cycles):
+        await db.upsert_user(user_id, f"user{user_id}", 0, guild_id=1)
+        await db.add_participant(1, user_id, "A")
+    await db.checkpoint_participants()
+
+    start = time.perf_counter()
+    for user_id in range(cycles):
+        await naive_cycle_end(db.DB_PATH, 1, user_id, 10_000)
+    before = (time.perf_counter() - start) / cycles
+
+    start = time.perf_counter()
+    for user_id in range(cycles):
+        await db.complete_cycle(1, user_id, "A", 3000, 600, 20_000, 23_600, cycle_index=0)
+        await db.get_sticky(1, 1)
+        await db.is_maintenance_active(1)
+    after = (time.perf_counter() - start) / cycles
+
+    # Même tick pour toute une salle : les écritures partagent un commit
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        db.complete_cycle(1, user_id, "A", 3000, 600, 30_000, 33_600, cycle_index=1)
+        for user_id in range(cycles)
+    ))
+    grouped = (time.perf_counter() - start) / cycles
+
+    await db.close_db()
+    print(f"{cycles} fins de cycle")
+    print(f"  avant (connexion par appel) : {before * 1000:.2f} ms/cycle")
+    print(f"  après (pool, séquentiel)    : {after * 1000:.2f} ms/cycle")
+    print(f"  après (pool, même tick)     : {grouped * 1000:.2f} ms/cycle")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=300)
+    asyncio.run(main(parser.parse_args().cycles))
@@ -0,0 +1,139 @@
+# ==========================
+# LRE-BOT/bench/bench_readers.py
+# ==========================
+"""
+Benchmark des readers dédiés (user-009) : latence des commandes courtes, sans puis pendant une rafale de stats.
+
+Pour chaque commande, un participant est inscrit avec une arrivée antidatée de 10 minutes
+(hors mesure), puis on mesure :
+  *me    : lecture des stats et des rangs sur un reader court
+  *leave : check de maintenance et fin de session, qui écrit la session et crédite
+           10 minutes de travail (une écriture commitée, fenêtre DB_WRITE_WINDOW_MS comprise)
+Les deux séries sont mesurées sans rafale, puis pendant que N tâches enchaînent classements,
+stats serveur et analyse annuelle (calcul direct, sans le cache de core/querycache.py).
+
+  --shared : les agrégats passent par la file des lectures courtes (DB_ANALYTICS_READERS=0),
+             comme avant la séparation des files.
+
+Usage : python bench/bench_readers.py [--storm 4] [--sessions 100000] [--users 1000] [--shared]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("--storm", type=int, default=4, help="tâches de stats en parallèle")
+parser.add_argument("--sessions", type=int, default=100_000)
+parser.add_argument("--users", type=int, default=1000)
+parser.add_argument("--commands", type=int, default=100)
+parser.add_argument("--shared", action="store_true")
+ARGS = parser.parse_args()
+
+TMP = tempfile.mkdtemp(prefix="lre-bench-")
+os.environ["DB_PATH"] = os.path.join(TMP, "bot.db")
+if ARGS.shared:
+    os.environ["DB_ANALYTICS_READERS"] = "0"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core import config, db, migrations, participants  # noqa: E402
+
+GUILD = 1
+
+
+async def populate(sessions: int, users: int):
+    now = int(time.time())
+    rows = []
+    for _ in range(sessions):
+        start = now - random.randint(0, 400 * 86400)
+        rows.append((random.randrange(users), GUILD, "A", 3000, 600, start, start + 3600, 0, 0))
+
+    async def op(conn):
+        await conn.executemany("""
+            INSERT INTO sessions (user_id, guild_id, mode, work_time, pause_time,
+                                  start_timestamp, end_timestamp, day_of_week, hour_of_day)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        await conn.execute("""
+            INSERT INTO users (user_id, guild_id, total_time, total_A, pause_time_A, sessions_count)
+            SELECT user_id, guild_id, SUM(work_time), SUM(work_time), SUM(pause_time), COUNT(*)
+            FROM sessions GROUP BY user_id, guild_id
+        """)
+        await migrations.backfill_daily_rollup(conn)
+
+    await db.pool.write(op)
+
+
+async def storm(stop: asyncio.Event):
+    year = time.localtime().tm_year
+    while not stop.is_set():
+        await db._leaderboards(GUILD)
+        await db._server_stats(GUILD)
+        await db._yearly_analytics(GUILD, year)
+
+
+async def me_command(user_id: int):
+    start = time.perf_counter()
+    await db.get_user_stats(user_id, GUILD)
+    return time.perf_counter() - start
+
+
+async def leave_command(user_id: int):
+    await db.add_participant(GUILD, user_id, "A")
+    participants.get(GUILD, user_id).join_ts = db.now_ts() - 600
+    start = time.perf_counter()
+    await db.is_maintenance_active(GUILD)
+    closed = await db.end_session(GUILD, user_id)
+    elapsed = time.perf_counter() - start
+    assert closed[3] == 600, "aucun travail crédité"
+    return elapsed
+
+
+async def measure(commands: int, first_user: int):
+    """Latences (*me, *leave) de `commands` commandes, une toutes les 10 ms"""
+    me, leave = [], []
+    writes = db.pool.writes_committed
+    for i in range(commands):
+        user_id = (first_user + i) % ARGS.users
+        me.append(await me_command(user_id))
+        leave.append(await leave_command(user_id))
+        await asyncio.sleep(0.01)
+    assert db.pool.writes_committed - writes >= commands, "fin de session sans écriture"
+    return me, leave
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return f"p50 {statistics.median(latencies) * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms"
+
+
+async def main():
+    await db.open_db()
+    await db.init_db()
+    await populate(ARGS.sessions, ARGS.users)
+    # Index de rangs chargé avant les mesures (premier *me du serveur)
+    await me_command(0)
+
+    baseline = await measure(ARGS.commands, 0)
+
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(storm(stop)) for _ in range(ARGS.storm)]
+    await asyncio.sleep(0.5)
+    stormed = await measure(ARGS.commands, ARGS.commands)
+    stop.set()
+    await asyncio.gather(*tasks)
+    await db.close_db()
+
+    files = "file partagée" if ARGS.shared else "files séparées"
+    print(f"{ARGS.commands} commandes par série, {files}, fenêtre d'écriture {config.DB_WRITE_WINDOW_MS} ms")
+    for label, (me, leave) in (("sans rafale", baseline), (f"rafale de {ARGS.storm} tâche(s)", stormed)):
+        print(f"  {label:<22} *me {percentiles(me)} | *leave {percentiles(leave)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
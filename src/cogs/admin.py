@@ -2,20 +2,55 @@
 # LRE-BOT/src/cogs/admin.py
 # ==========================
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from datetime import datetime, timezone
 import asyncio
-from utils import checks
+from utils import checks, dm, export, names, sticky
 import logging
 
-from core import db
-from utils.time_format import format_seconds
+from core import backup, config, cycles, db, modes, querycache
+from utils.time_format import format_mode, format_seconds
 
 logger = logging.getLogger('LRE-BOT.admin')
 
+# Paramètres de *setmode (minutes, sauf tous = nombre de cycles)
+MODE_PARAMS = ("travail", "pause", "grace", "longue", "tous", "bonus")
+
 class AdminCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.archive_task.start()
+        self.backup_task.start()
+
+    def cog_unload(self):
+        self.archive_task.cancel()
+        self.backup_task.cancel()
+
+    @tasks.loop(hours=config.ARCHIVE_INTERVAL_HOURS)
+    async def archive_task(self):
+        """Tâche de fond : bascule l'historique froid vers archive.db"""
+        try:
+            await db.archive_cold_data()
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'archivage des sessions: {e}")
+
+    @archive_task.before_loop
+    async def before_archive_task(self):
+        """Attendre que le bot soit prêt avant de démarrer l'archivage"""
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=config.BACKUP_INTERVAL_HOURS)
+    async def backup_task(self):
+        """Tâche de fond : instantané vérifié de la base, sans bloquer le writer"""
+        try:
+            await backup.run_backup()
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la sauvegarde de la base: {e}")
+
+    @backup_task.before_loop
+    async def before_backup_task(self):
+        """Attendre que le bot soit prêt avant la première sauvegarde"""
+        await self.bot.wait_until_ready()
 
     @commands.command(name="status", help="Afficher état global du bot")
     @checks.is_admin()
@@ -28,8 +63,9 @@ class AdminCog(commands.Cog):
 
         # Participants
         participants = await db.get_participants(guild_id)
-        countA = len([p for p in participants if p[2] == "A"])
-        countB = len([p for p in participants if p[2] == "B"])
+        counts = {name: 0 for name in modes.available(guild_id)}
+        for p in participants:
+            counts[p[2]] = counts.get(p[2], 0) + 1
 
         # Git SHA
         proc = await asyncio.create_subprocess_shell(
@@ -43,10 +79,37 @@ class AdminCog(commands.Cog):
         e = discord.Embed(title="⚙️ État du bot", color=discord.Color.blue())
         e.add_field(name="Latence", value=f"{latency} ms", inline=True)
         e.add_field(name="Heure", value=local_str, inline=True)
-        e.add_field(name="Mode A", value=f"{countA} participants", inline=True)
-        e.add_field(name="Mode B", value=f"{countB} participants", inline=True)
+        for name, count in counts.items():
+            e.add_field(name=f"Mode {name}", value=f"{count} participants", inline=True)
         e.add_field(name="Version (SHA)", value=sha, inline=True)
 
+        if backup.last_backup["at"]:
+            age = int(datetime.now(timezone.utc).timestamp()) - backup.last_backup["at"]
+            backup_str = f"il y a {format_seconds(age)} ({backup.last_backup['duration']:.1f}s)"
+        else:
+            backup_str = "aucune depuis le démarrage"
+        e.add_field(name="Sauvegarde", value=backup_str, inline=True)
+        e.add_field(
+            name="Sticky",
+            value=f"{sticky.stats['reposts']} repost(s), {sticky.saved_calls()} appels API évités",
+            inline=True
+        )
+        e.add_field(name="DM Pomodoro", value=f"{dm.stats['sent']} envoyé(s), {dm.stats['failed']} échec(s)", inline=True)
+        e.add_field(
+            name="Noms (classements)",
+            value=f"{names.stats['fetched']} appel(s) API, {names.stats['member'] + names.stats['cache'] + names.stats['db']} sans API",
+            inline=True
+        )
+        e.add_field(
+            name="Cache lectures",
+            value=(
+                f"{querycache.stats['hits']} hit(s), {querycache.stats['misses']} calcul(s), "
+                f"{querycache.stats['coalesced']} attente(s) partagée(s), "
+                f"{querycache.size()} en cache, {querycache.stats['evictions']} retiré(s)"
+            ),
+            inline=True
+        )
+
         await ctx.send(embed=e)
 
 
@@ -60,7 +123,6 @@ class AdminCog(commands.Cog):
         if enabled:
             logger.warning(f"🚧 Mode maintenance activé par {ctx.author}")
             participants = await db.get_participants(guild_id)
-            now_ts = int(datetime.now(timezone.utc).timestamp())
 
             # si participants présents = une seule notif listant les mentions
             if participants:
@@ -68,14 +130,10 @@ class AdminCog(commands.Cog):
                 notif_msg = f"🚧 Mode maintenance activé — toutes les sessions ont été arrêtées.\nParticipants retirés : {mentions}"
                 await ctx.send(notif_msg)
 
-            # archiver et supprimer
-            for user_id, join_ts, mode, _ in participants:
-                elapsed = now_ts - join_ts
-                await db.ajouter_temps(user_id, guild_id, elapsed, mode=mode, is_session_end=True)
-                try:
-                    await db.remove_participant(guild_id, user_id)
-                except Exception:
-                    pass
+            # créditer et retirer tous les participants en une transaction (moteur de cycles)
+            await db.end_sessions([(guild_id, user_id) for user_id, _, _, _ in participants])
+            for user_id, _, _, _ in participants:
+                self.bot.dispatch("participant_update", guild_id, user_id)
 
             if not participants:
                 await ctx.send("🚧 Mode maintenance activé. Aucune session en cours.")
@@ -93,8 +151,7 @@ class AdminCog(commands.Cog):
         existing = await db.get_sticky(guild_id, channel_id)
         if existing:
             try:
-                old_msg = await ctx.channel.fetch_message(existing[0])  # message_id
-                await old_msg.delete()
+                await ctx.channel.get_partial_message(existing[0]).delete()  # message_id
             except Exception:
                 pass
             await db.remove_sticky(guild_id, channel_id)
@@ -128,8 +185,7 @@ class AdminCog(commands.Cog):
             return
 
         try:
-            old_msg = await ctx.channel.fetch_message(existing[0])
-            await old_msg.delete()
+            await ctx.channel.get_partial_message(existing[0]).delete()
         except Exception:
             pass
 
@@ -138,12 +194,112 @@ class AdminCog(commands.Cog):
         await ctx.send("✅ Sticky retiré.")
 
 
+    @commands.command(name="setmode", help="Définir un mode Pomodoro (durées en minutes)")
+    @checks.is_admin()
+    async def setmode(self, ctx, name: str, *params: str):
+        """
+        *setmode <nom> travail=45 pause=15 [grace=10] [longue=30 tous=4] [bonus=60:25,120:15|aucun]
+        Les paramètres omis reprennent ceux du mode existant (ou du mode par défaut de même nom).
+        """
+        guild_id = ctx.guild.id
+        name = name.upper()
+        current = db.get_mode(guild_id, name)
+
+        values = {}
+        try:
+            for param in params:
+                key, sep, raw = param.partition("=")
+                key = key.lower()
+                if not sep or key not in MODE_PARAMS:
+                    raise ValueError(f"paramètre inconnu `{param}` (attendus : {', '.join(MODE_PARAMS)})")
+                if key == "bonus":
+                    values[key] = () if raw.lower() == "aucun" else tuple(
+                        (int(below) * 60, int(extra) * 60)
+                        for below, extra in (tier.split(":") for tier in raw.split(","))
+                    )
+                else:
+                    values[key] = int(raw) * 60 if key != "tous" else int(raw)
+
+            if current is None and not {"travail", "pause"} <= values.keys():
+                raise ValueError("un nouveau mode demande au moins `travail=` et `pause=`")
+            schedule = cycles.compile_schedule(
+                name,
+                values.get("travail", current and current.work),
+                values.get("pause", current and current.pause),
+                values.get("grace", current.grace if current else None),
+                values.get("longue", current.long_pause if current else 0),
+                values.get("tous", current.long_every if current else 0),
+                values.get("bonus", current.bonus if current else cycles.DEFAULT_BONUS),
+            )
+        except ValueError as e:
+            await ctx.send(f"⚠️ Définition invalide : {e}")
+            return
+
+        # Le planning d'un participant ne change pas en cours de session
+        in_use = db.mode_in_use(guild_id, name)
+        if in_use:
+            await ctx.send(f"🚫 {in_use} participant(s) sont en session dans le mode {name} : réessayez après leur départ.")
+            return
+
+        await db.set_mode(guild_id, schedule)
+        logger.info(f"✅ Mode {name} défini par {ctx.author} ({format_mode(schedule)})")
+        await ctx.send(f"✅ Mode **{name}** enregistré : {format_mode(schedule)}.")
+
+
+    @commands.command(name="delmode", help="Supprimer un mode Pomodoro du serveur")
+    @checks.is_admin()
+    async def delmode(self, ctx, name: str):
+        guild_id = ctx.guild.id
+        name = name.upper()
+        if not modes.is_custom(guild_id, name):
+            await ctx.send(f"ℹ️ Le mode {name} n'est pas défini sur ce serveur.")
+            return
+
+        in_use = db.mode_in_use(guild_id, name)
+        if in_use:
+            await ctx.send(f"🚫 {in_use} participant(s) sont en session dans le mode {name} : réessayez après leur départ.")
+            return
+
+        await db.remove_mode(guild_id, name)
+        logger.info(f"✅ Mode {name} supprimé par {ctx.author}")
+        default = db.get_mode(guild_id, name)
+        if default:
+            await ctx.send(f"✅ Mode **{name}** supprimé : retour au mode par défaut ({format_mode(default)}).")
+        else:
+            await ctx.send(f"✅ Mode **{name}** supprimé.")
+
+
     @commands.command(name="clear_stats", help="Réinitialiser toutes les stats")
     @checks.is_admin()
     async def clear_stats(self, ctx):
-        await db.clear_all_stats(ctx.guild.id)
+        status_msg = await ctx.send("⏳ Réinitialisation des statistiques en cours...")
+        last_edit = 0
+
+        async def progress(done, total):
+            nonlocal last_edit
+            # Une édition toutes les 2 s au plus (limites de l'API Discord)
+            now = asyncio.get_running_loop().time()
+            if now - last_edit < 2:
+                return
+            last_edit = now
+            try:
+                await status_msg.edit(content=f"⏳ Suppression des sessions : {done}/{total}")
+            except discord.HTTPException:
+                pass
+
+        try:
+            deleted = await db.clear_all_stats(ctx.guild.id, progress=progress)
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la réinitialisation des stats: {e}")
+            await ctx.send("⚠️ Échec de la réinitialisation des statistiques.")
+            return
         logger.warning(f"⚠️ Statistiques réinitialisées par {ctx.author}")
 
+        try:
+            await status_msg.edit(content=f"✅ {deleted} session(s) supprimée(s).")
+        except discord.HTTPException:
+            pass
+
         e = discord.Embed(
             title="🗑 Réinitialisation effectuée",
             description="Toutes les statistiques ont été remises à zéro.",
@@ -152,5 +308,92 @@ class AdminCog(commands.Cog):
         await ctx.send(embed=e)
 
 
+    @commands.command(name="backfill", help="Reconstruire l'agrégat journalier et les streaks")
+    @checks.is_admin()
+    async def backfill(self, ctx):
+        await ctx.send("⏳ Reconstruction de l'agrégat journalier et des streaks en cours...")
+        try:
+            rows = await db.rebuild_daily_rollup(ctx.guild.id)
+            users = await db.recompute_streaks(ctx.guild.id)
+        except Exception as e:
+            logger.error(f"❌ Échec de la reconstruction des stats: {e}")
+            await ctx.send("⚠️ Échec de la reconstruction des stats.")
+            return
+
+        logger.info(f"✅ daily_rollup et streaks reconstruits par {ctx.author} ({rows} lignes, {users} utilisateurs)")
+        await ctx.send(
+            f"✅ Agrégat journalier reconstruit ({rows} lignes jour/utilisateur/mode), "
+            f"streaks recalculés pour {users} utilisateur(s)."
+        )
+
+
+    async def _export_table(self, ctx, name: str, columns, chunks, fmt: str):
+        """Écrit un flux de pages dans des parties gzip et les envoie au fil de l'eau"""
+        writer = export.GzipParts(name, columns, fmt, ctx.guild.filesize_limit)
+        count = 0
+        async for rows in chunks:
+            count += len(rows)
+            part = writer.write(rows)
+            if part:
+                await ctx.send(file=discord.File(part[1], filename=part[0]))
+        part = writer.close()
+        if part:
+            await ctx.send(file=discord.File(part[1], filename=part[0]))
+        return count
+
+    @commands.command(name="export", help="Exporter utilisateurs, sessions et historique archivé (agrégats mensuels), en csv ou ndjson")
+    @checks.is_admin()
+    async def export_data(self, ctx, fmt: str = "csv"):
+        fmt = fmt.lower()
+        if fmt not in export.FORMATS:
+            await ctx.send(f"⚠️ Format inconnu : choisir parmi {', '.join(export.FORMATS)}.")
+            return
+
+        guild_id = ctx.guild.id
+        await ctx.send(f"⏳ Export {fmt} en cours...")
+        try:
+            users = await self._export_table(
+                ctx, f"lre_users_{guild_id}", db.EXPORT_USER_COLUMNS, db.iter_users(guild_id), fmt
+            )
+            sessions = await self._export_table(
+                ctx, f"lre_sessions_{guild_id}", db.EXPORT_SESSION_COLUMNS, db.iter_sessions(guild_id), fmt
+            )
+            # Sessions déplacées par *archive : plus de lignes brutes, agrégats par utilisateur et par mois
+            archived = await self._export_table(
+                ctx, f"lre_archive_{guild_id}", db.EXPORT_ARCHIVE_COLUMNS, db.iter_archive(guild_id), fmt
+            )
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'export des données: {e}")
+            await ctx.send("⚠️ Échec de l'export.")
+            return
+
+        logger.info(f"✅ Export {fmt} par {ctx.author} ({users} utilisateurs, {sessions} sessions, {archived} agrégats archivés)")
+        await ctx.send(
+            f"✅ Export terminé : {users} utilisateur(s), {sessions} session(s), "
+            f"{archived} agrégat(s) mensuel(s) archivé(s)."
+        )
+
+    @commands.command(name="archive", help="Archiver l'historique ancien des sessions")
+    @checks.is_admin()
+    async def archive(self, ctx):
+        await ctx.send("⏳ Archivage de l'historique en cours...")
+        try:
+            report = await db.archive_cold_data()
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'archivage des sessions: {e}")
+            await ctx.send("⚠️ Échec de l'archivage.")
+            return
+
+        if not report["days"]:
+            await ctx.send(f"ℹ️ Rien à archiver (historique plus récent que {config.ARCHIVE_AFTER_DAYS} jours).")
+            return
+
+        await ctx.send(
+            f"✅ Archivage terminé : {report['days']} jour(s), {report['sessions']} sessions déplacées, "
+            f"{report['freed'] // 1024} Ko de pages libérées dans la base (réutilisées par les prochaines écritures), "
+            f"{report['returned'] // 1024} Ko rendus au disque."
+        )
+
+
 async def setup(bot):
     await bot.add_cog(AdminCog(bot))
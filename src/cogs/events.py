@@ -6,7 +6,8 @@ from discord.ext import commands
 import time
 import os
 import traceback
-from core import db
+from core import db, stickies
+from utils.sticky import StickyReposter
 import logging
 
 logger = logging.getLogger('LRE-BOT.events')
@@ -15,11 +16,15 @@ logger = logging.getLogger('LRE-BOT.events')
 class Events(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.sticky = StickyReposter(bot)
+
+    def cog_unload(self):
+        self.sticky.cancel_all()
 
     @commands.Cog.listener()
     async def on_ready(self):
+        # on_ready est rappelé à chaque reconnexion : aucune initialisation DB ici (voir setup_hook)
         logger.info(f"✅ {self.bot.user} connecté à Discord (PID={os.getpid()})")
-        await db.init_db()
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
@@ -28,42 +33,29 @@ class Events(commands.Cog):
 
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
-        async with db.aiosqlite.connect(db.DB_PATH) as conn:
-            await conn.execute("UPDATE users SET leave_date=? WHERE user_id=?", (int(time.time()), member.id))
-            await conn.commit()
+        await db.set_leave_date(member.id, int(time.time()))
         logger.info(f"✅ {member} a quitté le serveur, leave_date mis à jour")
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
+        if message.guild is None or message.channel is None:
+            return
+
+        # Gestion des sticky messages : simple lecture du registre, la DB n'est touchée que si le sticky bouge
+        sticky = stickies.get(message.channel.id)
+        if sticky is None:
+            return
+
+        # Tout message (bots compris) fait remonter le sticky ; seuls les messages de membres déclenchent un repost
+        self.sticky.seen(message, sticky)
+
         if message.author.bot:
             return
 
         if message.content.startswith(self.bot.command_prefix):
             return
-        
-        if message.guild is None or message.channel is None:
-            return
-        
-        guild_id = message.guild.id
-        channel_id = message.channel.id
-
-        # Gestion des sticky messages
-        try:
-            sticky = await db.get_sticky(guild_id, channel_id)
-            if sticky:
-                try:
-                    old_msg = await message.channel.fetch_message(sticky[0])
-                    await old_msg.delete()
-                except Exception:
-                    pass
-                content = sticky[1]
-                new_sticky = await message.channel.send(content)
-                try:
-                    await db.set_sticky(guild_id, channel_id, new_sticky.id, content, sticky[2] if len(sticky) > 2 else None)
-                except Exception:
-                    pass
-        except Exception as e:
-            logger.error(f"❌ Erreur lors de la gestion du sticky: {e}")
+
+        self.sticky.schedule(message.channel)
 
     @commands.Cog.listener()
     async def on_command(self, ctx):
@@ -1,548 +1,375 @@
 # ==========================
 # LRE-BOT/src/cogs/pomodoro.py
 # ==========================
+import asyncio
 import discord
 from discord.ext import commands, tasks
-from core import db
+from core import config, cycles, db
+from core.scheduler import DeadlineScheduler
+from utils import dm
 from utils.time_format import format_seconds
 import logging
 
 logger = logging.getLogger('LRE-BOT.pomodoro')
 
-# Configuration des cycles Pomodoro
-POMODORO_MODES = {
-    "A": {"work": 50 * 60, "break": 10 * 60},  # 50 min travail, 10 min pause
-    "B": {"work": 25 * 60, "break": 5 * 60}     # 25 min travail, 5 min pause
+# Boutons des DM de pause : (libellé, style) par action
+BUTTONS = {
+    "continue": ("✅ Continuer", discord.ButtonStyle.success),
+    "leave": ("❌ Quitter", discord.ButtonStyle.danger),
 }
 
 
-class PresenceView(discord.ui.View):
-    def __init__(self, bot, guild_id, user_id, mode, join_ts, cycles_completed):
-        super().__init__(timeout=None)
-        self.bot = bot
+class PresenceButton(discord.ui.DynamicItem[discord.ui.Button],
+                     template=r"lre:presence:(?P<action>continue|leave):(?P<guild_id>[0-9]+):(?P<user_id>[0-9]+):(?P<cycle>[0-9]+)"):
+    """
+    Bouton de présence persistant et sans état : le custom_id porte (action, serveur, utilisateur, cycle)
+    et l'état vivant est relu dans le registre des participants au clic. Enregistré une fois pour
+    toutes (add_dynamic_items) : aucune vue gardée en mémoire par DM, et les boutons des anciens
+    DM restent valides après un redémarrage.
+    """
+
+    def __init__(self, action: str, guild_id: int, user_id: int, cycle: int, disabled: bool = False):
+        label, style = BUTTONS[action]
+        super().__init__(discord.ui.Button(
+            label=label, style=style, disabled=disabled,
+            custom_id=f"lre:presence:{action}:{guild_id}:{user_id}:{cycle}"
+        ))
+        self.action = action
         self.guild_id = guild_id
         self.user_id = user_id
-        self.mode = mode
-        self.join_ts = join_ts
-        self.cycles_completed = cycles_completed
-
-    @discord.ui.button(label="✅ Continuer", style=discord.ButtonStyle.success)
-    async def btn_continue(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Mettre à jour l'état (validé = 0)
-        await db.update_participant_state(self.guild_id, self.user_id, validated=0)
-        
-        cycle = POMODORO_MODES.get(self.mode)
-        work_duration = cycle["work"]
-        break_duration = cycle["break"]
-        
-        session_work = (self.cycles_completed + 1) * work_duration
-        session_break = self.cycles_completed * break_duration
-        
-        for child in self.children:
-            child.disabled = True
-            
-        await interaction.response.edit_message(
-            content=f"✅ Présence confirmée ! Tu en es à **{format_seconds(session_work)}** de travail et **{format_seconds(session_break)}** de repos pour cette session.",
-            view=self
-        )
-        logger.info(f"✅ {interaction.user} a confirmé sa présence (Mode {self.mode})")
+        self.cycle = cycle
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], int(match["guild_id"]), int(match["user_id"]), int(match["cycle"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        if self.action == "continue":
+            await self.btn_continue(interaction)
+        else:
+            await self.btn_leave(interaction)
+
+    async def btn_continue(self, interaction: discord.Interaction):
+        bot = interaction.client
+        view = presence_view(self.guild_id, self.user_id, self.cycle, disabled=True)
+
+        # État vivant du participant (le DM peut dater d'un autre cycle, voire d'avant un redémarrage)
+        row = await db.get_participant(self.guild_id, self.user_id)
+        if row is None:
+            await interaction.response.edit_message(content="ℹ️ Cette session est déjà terminée.", view=view)
+            return
+        join_ts, mode, _, cycles_completed = row
+        if cycles_completed != self.cycle:
+            await interaction.response.edit_message(content="ℹ️ Ce rappel concerne un cycle déjà terminé.", view=view)
+            return
+        schedule = db.get_mode(self.guild_id, mode)
 
         # Vérifier si on doit enregistrer le cycle MAINTENANT (s'il a cliqué pendant le délai de grâce)
         now = db.now_ts()
-        elapsed = now - self.join_ts
-        total_cycle = work_duration + break_duration
-        
-        if elapsed // total_cycle > self.cycles_completed:
-            # On est déjà dans le cycle suivant, donc l'enregistrement de fin de cycle a été sauté. On le fait ici.
-            await db.ajouter_temps(
-                user_id=self.user_id,
+        cycle_recorded = False
+
+        if cycles.position(join_ts, schedule, cycles_completed, now).cycle_index > cycles_completed:
+            # On est déjà dans le cycle suivant, donc l'enregistrement de fin de cycle a été sauté. On le fait ici
+            # (validé = 0 et cycle suivant, dans la même transaction).
+            session_start, _, session_end = cycles.cycle_bounds(join_ts, schedule, cycles_completed)
+            cycle_recorded = await db.complete_cycle(
                 guild_id=self.guild_id,
-                temps_sec=work_duration,
-                mode=self.mode,
-                is_session_end=False
-            )
-            session_start = self.join_ts + self.cycles_completed * total_cycle
-            session_end = session_start + total_cycle
-            await db.record_session(
                 user_id=self.user_id,
-                guild_id=self.guild_id,
-                mode=self.mode,
-                work_time=work_duration,
-                pause_time=break_duration,
+                mode=mode,
+                work_time=schedule.work,
+                pause_time=schedule.cycle_pause(cycles_completed),
                 start_ts=session_start,
-                end_ts=session_end
+                end_ts=session_end,
+                cycle_index=cycles_completed
             )
-            await db.update_participant_state(self.guild_id, self.user_id, increment_cycles=True)
-            
-            nb_cycles = self.cycles_completed + 1
-            await interaction.followup.send(
-                f"🔄 **Nouveau cycle !**\n"
-                f"C'est parti pour une nouvelle session de {format_seconds(work_duration)} !\n"
-                f"Cycle n°{nb_cycles + 1} 💪"
-            )
-
-    @discord.ui.button(label="❌ Quitter", style=discord.ButtonStyle.danger)
-    async def btn_leave(self, interaction: discord.Interaction, button: discord.ui.Button):
-        cycle = POMODORO_MODES.get(self.mode)
-        work_duration = cycle["work"]
-        break_duration = cycle["break"]
-        
-        # Enregistrer le temps du cycle actuel (travail complété)
-        await db.ajouter_temps(
-            user_id=self.user_id,
-            guild_id=self.guild_id,
-            temps_sec=work_duration,
-            mode=self.mode,
-            is_session_end=True
-        )
-        session_start = self.join_ts + self.cycles_completed * (work_duration + break_duration)
-        session_end = db.now_ts()
-        
-        await db.record_session(
-            user_id=self.user_id,
-            guild_id=self.guild_id,
-            mode=self.mode,
-            work_time=work_duration,
-            pause_time=0,
-            start_ts=session_start,
-            end_ts=session_end
-        )
-        
-        await db.remove_participant(self.guild_id, self.user_id)
-        
-        session_work = (self.cycles_completed + 1) * work_duration
-        session_break = self.cycles_completed * break_duration
-        
-        for child in self.children:
-            child.disabled = True
-            
-        await interaction.response.edit_message(
-            content=f"❌ Tu as quitté la session.\nBilan de ta session : **{format_seconds(session_work)}** de travail et **{format_seconds(session_break)}** de repos. À bientôt ! 👋",
-            view=self
-        )
-        logger.info(f"✅ {interaction.user} a choisi de quitter la session depuis les boutons (Mode {self.mode})")
-
-
-class Pomodoro(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
-        self.pomodoro_task.start()
-        logger.info("✅ Pomodoro Cog initialisé et tâche démarrée")
-
-    def cog_unload(self):
-        self.pomodoro_task.cancel()
-
-    @tasks.loop(minutes=1)
-    async def pomodoro_task(self):
-        """Tâche de fond qui gère les cycles Pomodoro"""
-        # Récupérer tous les participants actifs
-        async with db.aiosqlite.connect(db.DB_PATH) as conn:
-            async with conn.execute("""
-                SELECT guild_id, user_id, join_ts, mode, validated, cycles_completed 
-                FROM participants
-            """) as cursor:
-                participants = await cursor.fetchall()
-
-        now = db.now_ts()
-
-        for guild_id, user_id, join_ts, mode, validated, cycles_completed in participants:
-            elapsed = now - join_ts
-            cycle = POMODORO_MODES.get(mode)
-            
-            if not cycle:
-                continue
-
-            work_duration = cycle["work"]
-            break_duration = cycle["break"]
-            total_cycle = work_duration + break_duration
-
-            position_in_cycle = elapsed % total_cycle
-            current_cycle_index = elapsed // total_cycle
-
-            guild = self.bot.get_guild(guild_id)
-            member = guild.get_member(user_id) if guild else None
-
-            # Événement 1 : Début de la pause -> Envoi du message + boutons
-            if position_in_cycle >= work_duration and validated == 0 and current_cycle_index == cycles_completed:
-                await db.update_participant_state(guild_id, user_id, validated=1)
-                
-                if member:
-                    try:
-                        view = PresenceView(self.bot, guild_id, user_id, mode, join_ts, cycles_completed)
-                        await member.send(
-                            f"⏸️ **Pause bien méritée !**\n"
-                            f"Tu as terminé une session de {format_seconds(work_duration)} !\n"
-                            f"Prends {format_seconds(break_duration)} de repos. 🌟\n\n"
-                            f"⚠️ **Merci de confirmer ta présence pour continuer !**",
-                            view=view
-                        )
-                        logger.info(f"⏳ Boutons de présence envoyés à {member} (mode {mode})")
-                    except discord.Forbidden:
-                        logger.warning(f"⚠️ Impossible d'envoyer un DM à {member}")
-                continue
-
-            # Événement 2 : Rappel 1 minute avant la reprise
-            if position_in_cycle >= (total_cycle - 60) and validated == 1 and current_cycle_index == cycles_completed:
-                await db.update_participant_state(guild_id, user_id, validated=2)
-                if member:
-                    try:
-                        await member.send(f"⏳ <@{user_id}> Plus qu'une minute avant la reprise ! N'oublie pas de valider ta présence en cliquant sur ✅ Continuer !")
-                        logger.info(f"⏳ Rappel 1min envoyé à {member} (mode {mode})")
-                    except:
-                        pass
-                continue
-
-            # Événement 3 : Fin du cycle -> Enregistrement normal (si validé)
-            if current_cycle_index > cycles_completed and validated == 0:
-                try:
-                    await db.ajouter_temps(
-                        user_id=user_id,
-                        guild_id=guild_id,
-                        temps_sec=work_duration,
-                        mode=mode,
-                        is_session_end=False
-                    )
-                    session_start = join_ts + cycles_completed * total_cycle
-                    session_end = session_start + total_cycle
-                    await db.record_session(
-                        user_id=user_id,
-                        guild_id=guild_id,
-                        mode=mode,
-                        work_time=work_duration,
-                        pause_time=break_duration,
-                        start_ts=session_start,
-                        end_ts=session_end
-                    )
-                    await db.update_participant_state(guild_id, user_id, increment_cycles=True)
-                    
-                    if member:
-                        try:
-                            await member.send(
-                                f"🔄 **Nouveau cycle !**\n"
-                                f"C'est parti pour une nouvelle session de {format_seconds(work_duration)} !\n"
-                                f"Cycle n°{cycles_completed + 2} 💪"
-                            )
-                            logger.info(f"✅ Nouveau cycle démarré pour {member} (Cycle {cycles_completed + 2})")
-                        except:
-                            pass
-                except Exception as e:
-                    logger.error(f"❌ Erreur lors de l'enregistrement du cycle: {e}")
-                continue
-
-            # Événement 4 : Délai de grâce expiré (Expulsion)
-            grace_period = 10 * 60 if mode == "A" else 5 * 60
-            if current_cycle_index > cycles_completed and position_in_cycle >= grace_period and validated > 0:
-                # Calcul de la pénalité
-                session_verified_time = cycles_completed * work_duration
-                bonus_time = 0
-                if session_verified_time < 3600:
-                    bonus_time = 25 * 60
-                elif session_verified_time < 7200:
-                    bonus_time = 15 * 60
-                
-                if bonus_time > 0:
-                    await db.ajouter_temps(user_id, guild_id, bonus_time, mode, is_session_end=True)
-                    await db.record_session(
-                        user_id=user_id,
-                        guild_id=guild_id,
-                        mode=mode,
-                        work_time=bonus_time,
-                        pause_time=0,
-                        start_ts=now - bonus_time,
-                        end_ts=now
-                    )
-                
-                await db.remove_participant(guild_id, user_id)
-                logger.info(f"❌ {member} expulsé de la session pour inactivité (bonus: {bonus_time}s).")
-                
-                if member:
-                    try:
-                        msg = f"❌ **Session annulée pour inactivité.** Tu n'as pas validé ta présence après le délai de grâce.\n"
-                        if bonus_time > 0:
-                            msg += f"🎁 Je t'ai tout de même accordé **{format_seconds(bonus_time)}** de révision en guise de consolation pour ce dernier cycle !"
-                        else:
-                            msg += "Aucun temps supplémentaire n'a été ajouté car tu as déjà plus de 2h de révision validée."
-                        await member.send(msg)
-                    except:
-                        pass
-
-    @pomodoro_task.before_loop
-    async def before_pomodoro_task(self):
-        """Attendre que le bot soit prêt avant de démarrer la tâche"""
-        await self.bot.wait_until_ready()
-        logger.info("✅ Pomodoro task prête à démarrer")
-
-async def setup(bot):
-    await bot.add_cog(Pomodoro(bot))
-# ==========================
-# LRE-BOT/src/cogs/pomodoro.py
-# ==========================
-import discord
-from discord.ext import commands, tasks
-from core import db
-from utils.time_format import format_seconds
-import logging
+        else:
+            # Mettre à jour l'état (validé = 0)
+            await db.update_participant_state(self.guild_id, self.user_id, validated=0)
+        bot.dispatch("participant_update", self.guild_id, self.user_id, True)
 
-logger = logging.getLogger('LRE-BOT.pomodoro')
-
-# Configuration des cycles Pomodoro
-POMODORO_MODES = {
-    "A": {"work": 50 * 60, "break": 10 * 60},  # 50 min travail, 10 min pause
-    "B": {"work": 25 * 60, "break": 5 * 60}     # 25 min travail, 5 min pause
-}
+        session_work, session_break = schedule.totals(cycles_completed)
+        session_work += schedule.work
 
-
-class PresenceView(discord.ui.View):
-    def __init__(self, bot, guild_id, user_id, mode, join_ts, cycles_completed):
-        super().__init__(timeout=None)
-        self.bot = bot
-        self.guild_id = guild_id
-        self.user_id = user_id
-        self.mode = mode
-        self.join_ts = join_ts
-        self.cycles_completed = cycles_completed
-
-    @discord.ui.button(label="✅ Continuer", style=discord.ButtonStyle.success)
-    async def btn_continue(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Mettre à jour l'état (validé = 0)
-        await db.update_participant_state(self.guild_id, self.user_id, validated=0)
-        
-        cycle = POMODORO_MODES.get(self.mode)
-        work_duration = cycle["work"]
-        break_duration = cycle["break"]
-        
-        session_work = (self.cycles_completed + 1) * work_duration
-        session_break = self.cycles_completed * break_duration
-        
-        for child in self.children:
-            child.disabled = True
-            
         await interaction.response.edit_message(
             content=f"✅ Présence confirmée ! Tu en es à **{format_seconds(session_work)}** de travail et **{format_seconds(session_break)}** de repos pour cette session.",
-            view=self
+            view=view
         )
+        logger.info(f"✅ {interaction.user} a confirmé sa présence (Mode {mode})")
 
-        # Vérifier si on doit enregistrer le cycle MAINTENANT (s'il a cliqué pendant le délai de grâce)
-        now = db.now_ts()
-        elapsed = now - self.join_ts
-        total_cycle = work_duration + break_duration
-        
-        if elapsed // total_cycle > self.cycles_completed:
-            # On est déjà dans le cycle suivant, donc l'enregistrement de fin de cycle a été sauté. On le fait ici.
-            await db.ajouter_temps(
-                user_id=self.user_id,
-                guild_id=self.guild_id,
-                temps_sec=work_duration,
-                mode=self.mode,
-                is_session_end=False
-            )
-            session_start = self.join_ts + self.cycles_completed * total_cycle
-            session_end = session_start + total_cycle
-            await db.record_session(
-                user_id=self.user_id,
-                guild_id=self.guild_id,
-                mode=self.mode,
-                work_time=work_duration,
-                pause_time=break_duration,
-                start_ts=session_start,
-                end_ts=session_end
-            )
-            await db.update_participant_state(self.guild_id, self.user_id, increment_cycles=True)
-            
-            nb_cycles = self.cycles_completed + 1
+        if cycle_recorded:
+            nb_cycles = cycles_completed + 1
             await interaction.followup.send(
                 f"🔄 **Nouveau cycle !**\n"
-                f"C'est parti pour une nouvelle session de {format_seconds(work_duration)} !\n"
+                f"C'est parti pour une nouvelle session de {format_seconds(schedule.work)} !\n"
                 f"Cycle n°{nb_cycles + 1} 💪"
             )
 
-    @discord.ui.button(label="❌ Quitter", style=discord.ButtonStyle.danger)
-    async def btn_leave(self, interaction: discord.Interaction, button: discord.ui.Button):
-        cycle = POMODORO_MODES.get(self.mode)
-        work_duration = cycle["work"]
-        break_duration = cycle["break"]
-        
-        # Enregistrer le temps du cycle actuel (travail complété)
-        await db.ajouter_temps(
-            user_id=self.user_id,
-            guild_id=self.guild_id,
-            temps_sec=work_duration,
-            mode=self.mode,
-            is_session_end=True
-        )
-        session_start = self.join_ts + self.cycles_completed * (work_duration + break_duration)
-        session_end = db.now_ts()
-        
-        await db.record_session(
-            user_id=self.user_id,
-            guild_id=self.guild_id,
-            mode=self.mode,
-            work_time=work_duration,
-            pause_time=0,
-            start_ts=session_start,
-            end_ts=session_end
-        )
-        
-        await db.remove_participant(self.guild_id, self.user_id)
-        
-        session_work = (self.cycles_completed + 1) * work_duration
-        session_break = self.cycles_completed * break_duration
-        
-        for child in self.children:
-            child.disabled = True
-            
+    async def btn_leave(self, interaction: discord.Interaction):
+        bot = interaction.client
+        view = presence_view(self.guild_id, self.user_id, self.cycle, disabled=True)
+
+        # Crédit du temps réellement passé dans les cycles non clos, puis retrait du participant
+        closed = await db.end_session(self.guild_id, self.user_id)
+        if closed is None:
+            await interaction.response.edit_message(content="ℹ️ Cette session est déjà terminée.", view=view)
+            return
+        bot.dispatch("participant_update", self.guild_id, self.user_id)
+
+        join_ts, schedule, cycles_completed, work, pause = closed
+        mode = schedule.name
+        session_work, session_break = schedule.totals(cycles_completed)
+        session_work += work
+        session_break += pause
+
         await interaction.response.edit_message(
             content=f"❌ Tu as quitté la session.\nBilan de ta session : **{format_seconds(session_work)}** de travail et **{format_seconds(session_break)}** de repos. À bientôt ! 👋",
-            view=self
+            view=view
         )
+        logger.info(f"✅ {interaction.user} a choisi de quitter la session depuis les boutons (Mode {mode})")
+
+
+def presence_view(guild_id: int, user_id: int, cycle: int, disabled: bool = False):
+    """Vue des boutons de présence du cycle `cycle` (entièrement dynamique : jamais stockée par discord.py)"""
+    view = discord.ui.View(timeout=None)
+    for action in BUTTONS:
+        view.add_item(PresenceButton(action, guild_id, user_id, cycle, disabled))
+    return view
 
 
 class Pomodoro(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Boutons de présence des DM (anciens compris) : un seul enregistrement pour tous les messages
+        self.bot.add_dynamic_items(PresenceButton)
+        # (guild_id, user_id) -> prochain événement ; la tâche dort jusqu'à l'échéance la plus proche
+        self.scheduler = DeadlineScheduler()
+        self._notifications = set()
         self.pomodoro_task.start()
-        logger.info("🍅 Pomodoro Cog initialisé")
+        self.checkpoint_task.start()
+        logger.info("✅ Pomodoro Cog initialisé et tâche démarrée")
 
     def cog_unload(self):
+        self.bot.remove_dynamic_items(PresenceButton)
         self.pomodoro_task.cancel()
-
-    @tasks.loop(minutes=1)
+        self.checkpoint_task.cancel()
+        for task in self._notifications:
+            task.cancel()
+
+    def _schedule(self, guild_id: int, user_id: int, row, confirmed: bool = False):
+        """Planifie le prochain événement d'un participant (row : join_ts, mode, validated, cycles_completed)"""
+        schedule = db.get_mode(guild_id, row[1]) if row else None
+        if schedule is None:
+            self.scheduler.cancel((guild_id, user_id))
+            return
+        join_ts, _, validated, cycles_completed = row
+        deadline, name = cycles.next_event(join_ts, schedule, validated, cycles_completed, db.now_ts(), confirmed=confirmed)
+        self.scheduler.schedule((guild_id, user_id), deadline, name)
+
+    @commands.Cog.listener()
+    async def on_participant_update(self, guild_id: int, user_id: int, confirmed: bool = False):
+        """Arrivée, départ ou bouton : replanifie le participant depuis son état en base"""
+        self._schedule(guild_id, user_id, await db.get_participant(guild_id, user_id), confirmed)
+
+    @tasks.loop(seconds=0)
     async def pomodoro_task(self):
-        """Tâche de fond qui gère les cycles Pomodoro"""
-        # Récupérer tous les participants actifs
-        async with db.aiosqlite.connect(db.DB_PATH) as conn:
-            async with conn.execute("""
-                SELECT guild_id, user_id, join_ts, mode, validated, cycles_completed 
-                FROM participants
-            """) as cursor:
-                participants = await cursor.fetchall()
-
+        """Tâche de fond qui gère les cycles Pomodoro : traite les échéances dues, au fil de l'eau"""
+        due = await self.scheduler.wait()
+
+        # Écritures en parallèle (regroupées par le writer), puis DM envoyés en une seule vague
+        results = await asyncio.gather(*(
+            self._process_event(guild_id, user_id, name) for (guild_id, user_id), name in due
+        ))
+        messages = [message for message in results if message]
+        if messages:
+            # La vague de DM part en arrière-plan : la prochaine échéance n'attend pas les envois
+            task = asyncio.create_task(self._notify(messages))
+            self._notifications.add(task)
+            task.add_done_callback(self._notifications.discard)
+
+    async def _notify(self, messages):
+        """Envoie une vague de DM et journalise les échecs par utilisateur"""
+        failed = await dm.send_many(messages)
+        for user_id, error in failed.items():
+            logger.warning(f"⚠️ Impossible d'envoyer un DM à {user_id} ({dm.describe(error)})")
+        if len(messages) > 1:
+            logger.info(f"✅ {len(messages) - len(failed)}/{len(messages)} notification(s) Pomodoro envoyée(s)")
+
+    async def _process_event(self, guild_id: int, user_id: int, name: str):
+        """Traite un événement échu puis replanifie ; retourne le DM à envoyer (ou None)"""
+        try:
+            row = await db.get_participant(guild_id, user_id)
+            if row is None:
+                return None
+            message = await self._handle_event(guild_id, user_id, name, *row)
+            self._schedule(guild_id, user_id, await db.get_participant(guild_id, user_id))
+            return message
+        except Exception as e:
+            logger.error(f"❌ Erreur lors du traitement de l'événement {name} de {user_id}: {e}")
+            # Nouvel essai dans une minute plutôt qu'une boucle serrée
+            self.scheduler.schedule((guild_id, user_id), db.now_ts() + 60, name)
+            return None
+
+    async def _handle_event(self, guild_id: int, user_id: int, name: str,
+                            join_ts: int, mode: str, validated: int, cycles_completed: int):
+        """Applique un événement en base ; retourne (member, contenu, vue) du DM à envoyer, ou None"""
         now = db.now_ts()
-
-        for guild_id, user_id, join_ts, mode, validated, cycles_completed in participants:
-            elapsed = now - join_ts
-            cycle = POMODORO_MODES.get(mode)
-            
-            if not cycle:
+        schedule = db.get_mode(guild_id, mode)
+        if schedule is None:
+            return None
+
+        guild = self.bot.get_guild(guild_id)
+        member = guild.get_member(user_id) if guild else None
+
+        # Événement 1 : Début de la pause -> Envoi du message + boutons
+        if name == cycles.BREAK_START:
+            await db.update_participant_state(guild_id, user_id, validated=1)
+            logger.info(f"⏳ Boutons de présence envoyés à {member or user_id} (mode {mode})")
+            if not member:
+                return None
+            view = presence_view(guild_id, user_id, cycles_completed)
+            return member, (
+                f"⏸️ **Pause bien méritée !**\n"
+                f"Tu as terminé une session de {format_seconds(schedule.work)} !\n"
+                f"Prends {format_seconds(schedule.cycle_pause(cycles_completed))} de repos. 🌟\n\n"
+                f"⚠️ **Merci de confirmer ta présence pour continuer !**"
+            ), view
+
+        # Événement 2 : Rappel 1 minute avant la reprise
+        if name == cycles.REMINDER:
+            await db.update_participant_state(guild_id, user_id, validated=2)
+            logger.info(f"⏳ Rappel 1min envoyé à {member or user_id} (mode {mode})")
+            if not member:
+                return None
+            return member, f"⏳ <@{user_id}> Plus qu'une minute avant la reprise ! N'oublie pas de valider ta présence en cliquant sur ✅ Continuer !", None
+
+        # Événement 3 : Fin du cycle -> Enregistrement normal (si validé)
+        if name == cycles.CYCLE_END:
+            session_start, _, session_end = cycles.cycle_bounds(join_ts, schedule, cycles_completed)
+            recorded = await db.complete_cycle(
+                guild_id=guild_id,
+                user_id=user_id,
+                mode=mode,
+                work_time=schedule.work,
+                pause_time=schedule.cycle_pause(cycles_completed),
+                start_ts=session_start,
+                end_ts=session_end,
+                cycle_index=cycles_completed
+            )
+            if not (recorded and member):
+                return None
+            logger.info(f"✅ Nouveau cycle démarré pour {member} (Cycle {cycles_completed + 2})")
+            return member, (
+                f"🔄 **Nouveau cycle !**\n"
+                f"C'est parti pour une nouvelle session de {format_seconds(schedule.work)} !\n"
+                f"Cycle n°{cycles_completed + 2} 💪"
+            ), None
+
+        # Événement 4 : Délai de grâce expiré (Expulsion)
+        if name == cycles.GRACE_EXPIRED:
+            # Calcul de la pénalité
+            bonus_time = cycles.inactivity_bonus(schedule, cycles_completed)
+
+            if bonus_time > 0:
+                await db.complete_cycle(
+                    guild_id=guild_id,
+                    user_id=user_id,
+                    mode=mode,
+                    work_time=bonus_time,
+                    pause_time=0,
+                    start_ts=now - bonus_time,
+                    end_ts=now,
+                    end_session=True
+                )
+            else:
+                await db.remove_participant(guild_id, user_id)
+            logger.info(f"❌ {member} expulsé de la session pour inactivité (bonus: {bonus_time}s).")
+
+            if not member:
+                return None
+            msg = f"❌ **Session annulée pour inactivité.** Tu n'as pas validé ta présence après le délai de grâce.\n"
+            if bonus_time > 0:
+                msg += f"🎁 Je t'ai tout de même accordé **{format_seconds(bonus_time)}** de révision en guise de consolation pour ce dernier cycle !"
+            elif schedule.bonus:
+                msg += f"Aucun temps supplémentaire n'a été ajouté car tu as déjà plus de {format_seconds(schedule.bonus[-1][0])} de révision validée."
+            else:
+                msg += "Aucun temps supplémentaire n'a été ajouté : ce mode n'accorde pas de temps de consolation."
+            return member, msg, None
+
+        return None
+
+    async def _catch_up(self):
+        """
+        Au démarrage : clôture en une transaction tout ce que la panne a fait échoir
+        (cycles terminés, délais de grâce expirés) et un seul DM récapitulatif par utilisateur.
+        """
+        now = db.now_ts()
+        batch = []
+        pending = []
+        for guild_id, user_id, join_ts, mode, validated, cycles_completed in await db.get_all_participants():
+            schedule = db.get_mode(guild_id, mode)
+            if schedule is None:
                 continue
+            closed, expired = cycles.catch_up(join_ts, schedule, validated, cycles_completed, now)
+            if closed or expired:
+                batch.extend(dict(guild_id=guild_id, user_id=user_id, **cycle) for cycle in closed)
+                pending.append((guild_id, user_id, closed, expired))
 
-            work_duration = cycle["work"]
-            break_duration = cycle["break"]
-            total_cycle = work_duration + break_duration
+        if not pending:
+            return
 
-            position_in_cycle = elapsed % total_cycle
-            current_cycle_index = elapsed // total_cycle
+        await db.complete_cycles(batch)
+
+        messages = []
+        for guild_id, user_id, closed, expired in pending:
+            if expired:
+                # Expiré sans temps de consolation : aucun cycle de fin de session n'a retiré le participant
+                await db.remove_participant(guild_id, user_id)
 
             guild = self.bot.get_guild(guild_id)
             member = guild.get_member(user_id) if guild else None
-
-            # Événement 1 : Début de la pause -> Envoi du message + boutons
-            if position_in_cycle >= work_duration and validated == 0 and current_cycle_index == cycles_completed:
-                await db.update_participant_state(guild_id, user_id, validated=1)
-                
-                if member:
-                    try:
-                        view = PresenceView(self.bot, guild_id, user_id, mode, join_ts, cycles_completed)
-                        await member.send(
-                            f"⏸️ **Pause bien méritée !**\n"
-                            f"Tu as terminé une session de {format_seconds(work_duration)} !\n"
-                            f"Prends {format_seconds(break_duration)} de repos. 🌟\n\n"
-                            f"⚠️ **Merci de confirmer ta présence pour continuer !**",
-                            view=view
-                        )
-                        logger.info(f"🍅 Boutons de présence envoyés à {member} (mode {mode})")
-                    except discord.Forbidden:
-                        logger.warning(f"⚠️ Impossible d'envoyer un DM à {member}")
+            if not member:
                 continue
 
-            # Événement 2 : Rappel 1 minute avant la reprise
-            if position_in_cycle >= (total_cycle - 60) and validated == 1 and current_cycle_index == cycles_completed:
-                await db.update_participant_state(guild_id, user_id, validated=2)
-                if member:
-                    try:
-                        await member.send(f"⏳ <@{user_id}> Plus qu'une minute avant la reprise ! N'oublie pas de valider ta présence en cliquant sur ✅ Continuer !")
-                    except:
-                        pass
-                continue
-
-            # Événement 3 : Fin du cycle -> Enregistrement normal (si validé)
-            if current_cycle_index > cycles_completed and validated == 0:
-                try:
-                    await db.ajouter_temps(
-                        user_id=user_id,
-                        guild_id=guild_id,
-                        temps_sec=work_duration,
-                        mode=mode,
-                        is_session_end=False
-                    )
-                    session_start = join_ts + cycles_completed * total_cycle
-                    session_end = session_start + total_cycle
-                    await db.record_session(
-                        user_id=user_id,
-                        guild_id=guild_id,
-                        mode=mode,
-                        work_time=work_duration,
-                        pause_time=break_duration,
-                        start_ts=session_start,
-                        end_ts=session_end
-                    )
-                    await db.update_participant_state(guild_id, user_id, increment_cycles=True)
-                    
-                    if member:
-                        try:
-                            await member.send(
-                                f"🔄 **Nouveau cycle !**\n"
-                                f"C'est parti pour une nouvelle session de {format_seconds(work_duration)} !\n"
-                                f"Cycle n°{cycles_completed + 2} 💪"
-                            )
-                        except:
-                            pass
-                except Exception as e:
-                    logger.error(f"❌ Erreur lors de l'enregistrement du cycle: {e}")
-                continue
-
-            # Événement 4 : Délai de grâce expiré (Expulsion)
-            grace_period = 10 * 60 if mode == "A" else 5 * 60
-            if current_cycle_index > cycles_completed and position_in_cycle >= grace_period and validated > 0:
-                # Calcul de la pénalité
-                session_verified_time = cycles_completed * work_duration
-                bonus_time = 0
-                if session_verified_time < 3600:
-                    bonus_time = 25 * 60
-                elif session_verified_time < 7200:
-                    bonus_time = 15 * 60
-                
-                if bonus_time > 0:
-                    await db.ajouter_temps(user_id, guild_id, bonus_time, mode, is_session_end=True)
-                    await db.record_session(
-                        user_id=user_id,
-                        guild_id=guild_id,
-                        mode=mode,
-                        work_time=bonus_time,
-                        pause_time=0,
-                        start_ts=now - bonus_time,
-                        end_ts=now
+            lines = ["⚠️ **Le bot a été indisponible pendant ta session Pomodoro.**"]
+            for cycle in closed:
+                if cycle.get("end_session"):
+                    lines.append(f"🎁 Je t'ai accordé **{format_seconds(cycle['work_time'])}** de révision pour ton dernier cycle.")
+                else:
+                    lines.append(
+                        f"✅ Ton cycle en cours a été enregistré : **{format_seconds(cycle['work_time'])}** de travail "
+                        f"et **{format_seconds(cycle['pause_time'])}** de repos."
                     )
-                
-                await db.remove_participant(guild_id, user_id)
-                logger.info(f"🍅 {member} expulsé de la session pour inactivité (bonus: {bonus_time}s).")
-                
-                if member:
-                    try:
-                        msg = f"❌ **Session annulée pour inactivité.** Tu n'as pas validé ta présence après le délai de grâce.\n"
-                        if bonus_time > 0:
-                            msg += f"🎁 Je t'ai tout de même accordé **{format_seconds(bonus_time)}** de révision en guise de consolation pour ce dernier cycle !"
-                        else:
-                            msg += "Aucun temps supplémentaire n'a été ajouté car tu as déjà plus de 2h de révision validée."
-                        await member.send(msg)
-                    except:
-                        pass
+            if expired:
+                lines.append("❌ Ta présence n'a pas pu être confirmée pendant la panne : ta session a été close.")
+            else:
+                lines.append("🔄 Ta session continue : confirme ta présence à la prochaine pause !")
+            messages.append((member, "\n".join(lines), None))
+
+        logger.info(f"✅ Rattrapage après indisponibilité : {len(pending)} participant(s), {len(batch)} cycle(s) enregistré(s)")
+        if messages:
+            task = asyncio.create_task(self._notify(messages))
+            self._notifications.add(task)
+            task.add_done_callback(self._notifications.discard)
 
     @pomodoro_task.before_loop
     async def before_pomodoro_task(self):
-        """Attendre que le bot soit prêt avant de démarrer la tâche"""
+        """Attendre que le bot soit prêt, rattraper la panne éventuelle, puis planifier tous les participants du registre"""
         await self.bot.wait_until_ready()
-        logger.info("🍅 Pomodoro task prête à démarrer")
+        try:
+            await self._catch_up()
+        except Exception as e:
+            logger.error(f"❌ Erreur lors du rattrapage des cycles manqués: {e}")
+        for guild_id, user_id, *row in await db.get_all_participants():
+            self._schedule(guild_id, user_id, row)
+        logger.info(f"✅ Pomodoro task prête à démarrer ({len(self.scheduler)} participant(s) planifié(s))")
+
+    @tasks.loop(seconds=config.PARTICIPANTS_CHECKPOINT_SECONDS)
+    async def checkpoint_task(self):
+        """Report périodique du registre des participants dans SQLite (le journal couvre l'intervalle)"""
+        try:
+            await db.checkpoint_participants()
+        except Exception as e:
+            logger.error(f"❌ Erreur lors du point de contrôle des participants: {e}")
 
 async def setup(bot):
     await bot.add_cog(Pomodoro(bot))
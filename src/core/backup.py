@@ -0,0 +1,88 @@
+# ==========================
+# LRE-BOT/src/core/backup.py
+# ==========================
+import asyncio
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from . import config
+import logging
+
+logger = logging.getLogger('LRE-BOT.backup')
+
+# Dernière sauvegarde réussie (affichée par *status)
+last_backup = {"at": None, "duration": None, "path": None}
+
+_lock = asyncio.Lock()
+
+
+def _snapshot(src_path: str, dst_path: str):
+    """
+    Copie en ligne par l'API de sauvegarde SQLite, par pas de BACKUP_PAGES_PER_STEP pages
+    espacés de BACKUP_STEP_SLEEP_MS (exécutée dans un thread).
+
+    La transaction de lecture gardée sur la source fige un instantané WAL : la copie ne
+    redémarre pas à chaque écriture du bot, et le writer n'attend jamais un lecteur WAL.
+    Retourne le résultat de PRAGMA quick_check sur la copie.
+    """
+    src = sqlite3.connect(f"{Path(src_path).resolve().as_uri()}?mode=ro", uri=True, isolation_level=None)
+    dst = sqlite3.connect(dst_path)
+    try:
+        src.execute("BEGIN")
+        src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        pause = config.BACKUP_STEP_SLEEP_MS / 1000
+        src.backup(
+            dst,
+            pages=config.BACKUP_PAGES_PER_STEP,
+            progress=lambda status, remaining, total: time.sleep(pause)
+        )
+        src.execute("COMMIT")
+        return dst.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+
+
+def _rotate(backup_dir: Path, stem: str):
+    """Ne garde que les BACKUP_KEEP instantanés les plus récents d'une base"""
+    snapshots = sorted(backup_dir.glob(f"{stem}-[0-9]*-[0-9]*.db"))
+    for old in snapshots[:-config.BACKUP_KEEP]:
+        old.unlink(missing_ok=True)
+
+
+async def run_backup():
+    """
+    Sauvegarde la base et l'archive dans BACKUP_DIR (un instantané horodaté par base),
+    vérifie chaque copie avec quick_check puis fait tourner les anciens instantanés.
+    """
+    async with _lock:
+        backup_dir = Path(config.BACKUP_DIR)
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        start = time.monotonic()
+        snapshot = None
+
+        for src_path in (config.DB_PATH, config.ARCHIVE_DB_PATH):
+            if not os.path.exists(src_path):
+                continue
+
+            stem = Path(src_path).stem
+            snapshot = backup_dir / f"{stem}-{stamp}.db"
+            tmp = backup_dir / f"{snapshot.name}.tmp"
+            tmp.unlink(missing_ok=True)
+
+            result = await asyncio.to_thread(_snapshot, src_path, str(tmp))
+            if result != "ok":
+                tmp.unlink(missing_ok=True)
+                raise RuntimeError(f"quick_check en échec sur {snapshot.name} : {result}")
+
+            # Un instantané n'apparaît sous son nom final qu'une fois vérifié
+            os.replace(tmp, snapshot)
+            _rotate(backup_dir, stem)
+
+        duration = time.monotonic() - start
+        last_backup.update(at=int(time.time()), duration=duration, path=str(snapshot) if snapshot else None)
+        logger.info(f"✅ Sauvegarde terminée en {duration:.1f}s dans {backup_dir}")
+        return dict(last_backup)
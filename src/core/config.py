@@ -11,3 +11,51 @@ DB_PATH = os.getenv("DB_PATH", "data/bot.db")
 RESET_HOUR = int(os.getenv("RESET_HOUR", 0))
 TIMEZONE = os.getenv("TIMEZONE", "Europe/Zurich")
 
+# Pool SQLite
+DB_READERS = int(os.getenv("DB_READERS", 3))
+DB_ANALYTICS_READERS = int(os.getenv("DB_ANALYTICS_READERS", 2))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", 5000))
+DB_CACHE_KB = int(os.getenv("DB_CACHE_KB", 16384))
+DB_MMAP_MB = int(os.getenv("DB_MMAP_MB", 64))
+
+# Écritures groupées (group commit)
+DB_WRITE_WINDOW_MS = int(os.getenv("DB_WRITE_WINDOW_MS", 3))
+DB_WRITE_BATCH_MAX = int(os.getenv("DB_WRITE_BATCH_MAX", 256))
+
+# Archivage des sessions froides (archive.db attachée à toutes les connexions)
+ARCHIVE_DB_PATH = os.getenv("ARCHIVE_DB_PATH", os.path.join(os.path.dirname(DB_PATH), "archive.db"))
+# Au moins deux mois gardés en base chaude : les stats semaine/mois ne lisent pas l'archive
+ARCHIVE_AFTER_DAYS = max(62, int(os.getenv("ARCHIVE_AFTER_DAYS", 365)))
+ARCHIVE_INTERVAL_HOURS = int(os.getenv("ARCHIVE_INTERVAL_HOURS", 24))
+
+# Sauvegardes à chaud (API de sauvegarde SQLite, instantanés tournants)
+BACKUP_DIR = os.getenv("BACKUP_DIR", os.path.join(os.path.dirname(DB_PATH), "backups"))
+BACKUP_KEEP = max(1, int(os.getenv("BACKUP_KEEP", 7)))
+BACKUP_INTERVAL_HOURS = int(os.getenv("BACKUP_INTERVAL_HOURS", 6))
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", 256))
+BACKUP_STEP_SLEEP_MS = int(os.getenv("BACKUP_STEP_SLEEP_MS", 5))
+
+# Réinitialisation des stats (*clear_stats) : lignes supprimées par écriture
+CLEAR_BATCH_ROWS = int(os.getenv("CLEAR_BATCH_ROWS", 500))
+
+# Sticky messages : un repost par rafale (fenêtre calme ou délai max), aucun si le sticky est encore visible
+STICKY_QUIET_SECONDS = float(os.getenv("STICKY_QUIET_SECONDS", 5))
+STICKY_MAX_DELAY_SECONDS = float(os.getenv("STICKY_MAX_DELAY_SECONDS", 30))
+STICKY_VISIBLE_WITHIN = int(os.getenv("STICKY_VISIBLE_WITHIN", 3))
+
+# Notifications Pomodoro : DM envoyés en parallèle (requêtes en vol au plus)
+DM_CONCURRENCY = max(1, int(os.getenv("DM_CONCURRENCY", 8)))
+
+# Participants : registre mémoire, journal des transitions et point de contrôle SQLite périodique
+PARTICIPANTS_JOURNAL_PATH = os.getenv("PARTICIPANTS_JOURNAL_PATH", os.path.join(os.path.dirname(DB_PATH), "participants.journal"))
+PARTICIPANTS_CHECKPOINT_SECONDS = int(os.getenv("PARTICIPANTS_CHECKPOINT_SECONDS", 60))
+
+# Noms affichés (classements) : cache LRU avec expiration, récupérations REST en parallèle bornées
+NAME_CACHE_SIZE = int(os.getenv("NAME_CACHE_SIZE", 4096))
+NAME_CACHE_TTL_SECONDS = int(os.getenv("NAME_CACHE_TTL_SECONDS", 6 * 3600))
+NAME_FETCH_CONCURRENCY = max(1, int(os.getenv("NAME_FETCH_CONCURRENCY", 4)))
+
+# Lectures lourdes (*leaderboard, *stats) : résultat partagé, gardé au plus ce délai (invalidé par les écritures)
+READ_CACHE_TTL_SECONDS = float(os.getenv("READ_CACHE_TTL_SECONDS", 30))
+# Nombre maximal de résultats gardés : au-delà, les plus anciens sont retirés
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", 512))
@@ -0,0 +1,265 @@
+# ==========================
+# LRE-BOT/src/core/cycles.py
+# ==========================
+import re
+from bisect import bisect_right
+from typing import NamedTuple
+
+# Phases du planning
+WORK = "travail"
+BREAK = "pause"
+
+# Événements planifiés d'un participant
+BREAK_START = "pause"
+REMINDER = "rappel"
+CYCLE_END = "fin_cycle"
+GRACE_EXPIRED = "expulsion"
+
+# Paliers de consolation à l'expulsion : (travail validé dans la session en dessous duquel, bonus)
+DEFAULT_BONUS = ((3600, 25 * 60), (7200, 15 * 60))
+
+# Nom d'un mode (stocké dans participants.mode et sessions.mode)
+NAME_PATTERN = re.compile(r"^[A-Z0-9_-]{1,16}$")
+MAX_DURATION = 24 * 3600
+
+
+class Schedule(NamedTuple):
+    """
+    Mode Pomodoro compilé, immuable : toutes les échéances et tous les crédits s'en déduisent
+    en forme close, sans I/O ni relecture de la configuration. Construit par compile_schedule().
+    Un cycle = travail puis pause ; la pause du dernier cycle de chaque période est la pause longue.
+    """
+    name: str
+    work: int               # travail par cycle
+    pause: int              # pause courte
+    grace: int              # délai de grâce après la fin d'un cycle non confirmé
+    long_pause: int         # pause longue (0 si long_every vaut 0)
+    long_every: int         # pause longue tous les N cycles (0 : jamais)
+    bonus: tuple            # paliers de consolation, seuils croissants
+    # Précalculs de la période (long_every cycles, ou un seul)
+    slots: int              # cycles par période
+    period: int             # durée d'une période
+    starts: tuple           # début de chaque cycle dans la période
+    pauses: tuple           # pause de chaque cycle de la période
+    pauses_before: tuple    # pause cumulée avant chaque cycle de la période
+    period_pause: int       # pause totale d'une période
+
+    def cycle_offset(self, index: int):
+        """Début du cycle `index` (0 = premier), en secondes depuis l'arrivée"""
+        q, slot = divmod(index, self.slots)
+        return q * self.period + self.starts[slot]
+
+    def cycle_pause(self, index: int):
+        """Pause du cycle `index` (courte ou longue)"""
+        return self.pauses[index % self.slots]
+
+    def split(self, offset: int):
+        """(travail, pause) prévus par le planning entre l'arrivée et `offset` secondes après"""
+        if offset <= 0:
+            return 0, 0
+        q, rest = divmod(offset, self.period)
+        slot = bisect_right(self.starts, rest) - 1
+        in_cycle = rest - self.starts[slot]
+        return ((q * self.slots + slot) * self.work + min(in_cycle, self.work),
+                q * self.period_pause + self.pauses_before[slot] + max(0, in_cycle - self.work))
+
+    def totals(self, cycles_completed: int):
+        """(travail, pause) des `cycles_completed` premiers cycles"""
+        return self.split(self.cycle_offset(cycles_completed))
+
+
+def compile_schedule(name: str, work: int, pause: int, grace: int = None,
+                     long_pause: int = 0, long_every: int = 0, bonus=DEFAULT_BONUS):
+    """
+    Valide et compile un mode (durées en secondes). `grace` vaut la pause courte par défaut.
+    Lève ValueError (message affichable) si la définition est incohérente.
+    """
+    name = str(name).upper()
+    if not NAME_PATTERN.match(name):
+        raise ValueError("nom de mode invalide (1 à 16 caractères : lettres, chiffres, _ ou -)")
+    grace = pause if grace is None else grace
+    long_every = long_every or 0
+    long_pause = long_pause if long_every else 0
+
+    if not 60 <= work <= MAX_DURATION or not 60 <= pause <= MAX_DURATION:
+        raise ValueError("le travail et la pause doivent durer entre 1 minute et 24 heures")
+    if not 0 <= grace <= MAX_DURATION:
+        raise ValueError("le délai de grâce doit être compris entre 0 et 24 heures")
+    if long_every and (long_every < 2 or not pause <= long_pause <= MAX_DURATION):
+        raise ValueError("la pause longue doit revenir tous les 2 cycles ou plus et durer au moins la pause courte")
+
+    bonus = tuple(sorted((int(below), int(extra)) for below, extra in bonus))
+    if any(below <= 0 or not 0 < extra <= MAX_DURATION for below, extra in bonus):
+        raise ValueError("paliers de consolation invalides")
+
+    slots = long_every or 1
+    pauses = (pause,) * (slots - 1) + ((long_pause if long_every else pause),)
+    starts, pauses_before = [], []
+    offset = cumulated = 0
+    for slot_pause in pauses:
+        starts.append(offset)
+        pauses_before.append(cumulated)
+        offset += work + slot_pause
+        cumulated += slot_pause
+
+    return Schedule(
+        name, work, pause, grace, long_pause, long_every, bonus,
+        slots, offset, tuple(starts), pauses, tuple(pauses_before), cumulated
+    )
+
+
+# Modes par défaut, valables sur tous les serveurs (un serveur peut les redéfinir)
+MODES = {
+    "A": compile_schedule("A", 50 * 60, 10 * 60),  # 50 min travail, 10 min pause
+    "B": compile_schedule("B", 25 * 60, 5 * 60),   # 25 min travail, 5 min pause
+}
+
+
+class Position(NamedTuple):
+    """Position d'un participant dans son planning à un instant donné"""
+    phase: str          # WORK ou BREAK
+    cycle_index: int    # index du cycle en cours depuis l'arrivée
+    deadline: int       # prochain changement de phase
+    work: int           # travail crédité pour un départ maintenant (cycles non encore clos)
+    pause: int          # pause créditée pour un départ maintenant
+
+
+def cycle_start(join_ts: int, schedule: Schedule, cycles_completed: int):
+    """Début du cycle non encore clos"""
+    return join_ts + schedule.cycle_offset(cycles_completed)
+
+
+def cycle_bounds(join_ts: int, schedule: Schedule, index: int):
+    """(début, fin du travail, fin) du cycle `index`"""
+    start = join_ts + schedule.cycle_offset(index)
+    return start, start + schedule.work, start + schedule.work + schedule.cycle_pause(index)
+
+
+def credit(join_ts: int, schedule: Schedule, cycles_completed: int, now: int):
+    """(travail, pause) à créditer pour un départ à `now` : uniquement le temps des cycles non clos"""
+    start = schedule.cycle_offset(cycles_completed)
+    if now - join_ts <= start:
+        return 0, 0
+    work, pause = schedule.split(now - join_ts)
+    closed_work, closed_pause = schedule.split(start)
+    return work - closed_work, pause - closed_pause
+
+
+def position(join_ts: int, schedule: Schedule, cycles_completed: int, now: int):
+    """Phase, index du cycle, prochaine échéance et crédit (travail, pause) d'un participant à `now`"""
+    q, rest = divmod(max(0, now - join_ts), schedule.period)
+    slot = bisect_right(schedule.starts, rest) - 1
+    start = join_ts + q * schedule.period + schedule.starts[slot]
+    if rest - schedule.starts[slot] < schedule.work:
+        phase, deadline = WORK, start + schedule.work
+    else:
+        phase, deadline = BREAK, start + schedule.work + schedule.pauses[slot]
+    work, pause = credit(join_ts, schedule, cycles_completed, now)
+    return Position(phase, q * schedule.slots + slot, deadline, work, pause)
+
+
+def positions(join_ts: list, schedules: list, cycles_completed: list, now: int):
+    """
+    Raccourci de position() sur des listes parallèles : retourne les colonnes
+    (phases, index de cycle, échéances, travail, pause).
+    Simple boucle Python, pas un calcul vectorisé : seul le cas sans pause longue est déroulé
+    sur place, les autres plannings passent par position() participant par participant.
+    """
+    count = len(join_ts)
+    phases = [None] * count
+    indexes = [0] * count
+    deadlines = [0] * count
+    works = [0] * count
+    pauses = [0] * count
+
+    for i in range(count):
+        join = join_ts[i]
+        schedule = schedules[i]
+        work_duration = schedule.work
+        elapsed = now - join
+
+        if schedule.slots == 1:
+            # Sans pause longue : un cycle par période, pas de recherche dans la période
+            total_cycle = schedule.period
+            cycle_index, offset = divmod(elapsed if elapsed > 0 else 0, total_cycle)
+            start = join + cycle_index * total_cycle
+            indexes[i] = cycle_index
+            if offset < work_duration:
+                phases[i] = WORK
+                deadlines[i] = start + work_duration
+            else:
+                phases[i] = BREAK
+                deadlines[i] = start + total_cycle
+
+            span = elapsed - cycles_completed[i] * total_cycle
+            if span > 0:
+                full, rest = divmod(span, total_cycle)
+                works[i] = full * work_duration + (rest if rest < work_duration else work_duration)
+                pauses[i] = full * schedule.pause + (rest - work_duration if rest > work_duration else 0)
+        else:
+            phases[i], indexes[i], deadlines[i], works[i], pauses[i] = position(
+                join, schedule, cycles_completed[i], now
+            )
+
+    return phases, indexes, deadlines, works, pauses
+
+
+def inactivity_bonus(schedule: Schedule, cycles_completed: int):
+    """Temps de consolation accordé à l'expulsion, selon le travail déjà validé dans la session"""
+    session_verified_time = cycles_completed * schedule.work
+    for below, bonus in schedule.bonus:
+        if session_verified_time < below:
+            return bonus
+    return 0
+
+
+def next_event(join_ts: int, schedule: Schedule, validated: int, cycles_completed: int, now: int,
+               confirmed: bool = False):
+    """
+    Prochain événement d'un participant : (échéance, événement).
+    `confirmed` : présence confirmée pendant la pause (validated revenu à 0), on attend la fin du cycle.
+    """
+    start, work_end, end = cycle_bounds(join_ts, schedule, cycles_completed)
+
+    if validated == 0:
+        if now < work_end:
+            return work_end, BREAK_START
+        if confirmed or now >= end:
+            return end, CYCLE_END
+        # Début de pause manqué (redémarrage du bot) : boutons envoyés tout de suite
+        return now, BREAK_START
+    if validated == 1 and now < end:
+        return max(now, end - 60), REMINDER
+    return end + schedule.grace, GRACE_EXPIRED
+
+
+def catch_up(join_ts: int, schedule: Schedule, validated: int, cycles_completed: int, now: int):
+    """
+    Rattrapage en forme close après une indisponibilité du bot, avec les règles des événements :
+    un cycle confirmé (validated = 0) terminé pendant la panne est clos ; la pause suivante
+    n'a pas pu être confirmée, le délai de grâce expire donc au plus tard un cycle après.
+    Retourne (cycles à clôturer — paramètres de complete_cycle sans guild/user —, session expirée).
+    """
+    closed = []
+
+    if validated == 0:
+        start, _, end = cycle_bounds(join_ts, schedule, cycles_completed)
+        if end > now:
+            return [], False
+        closed.append(dict(
+            mode=schedule.name, work_time=schedule.work, pause_time=end - start - schedule.work,
+            start_ts=start, end_ts=end, cycle_index=cycles_completed
+        ))
+        cycles_completed += 1
+
+    expires_at = cycle_bounds(join_ts, schedule, cycles_completed)[2] + schedule.grace
+    if expires_at > now:
+        return closed, False
+
+    bonus_time = inactivity_bonus(schedule, cycles_completed)
+    if bonus_time > 0:
+        closed.append(dict(
+            mode=schedule.name, work_time=bonus_time, pause_time=0,
+            start_ts=expires_at - bonus_time, end_ts=expires_at, end_session=True
+        ))
+    return closed, True
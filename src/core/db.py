@@ -1,925 +1,628 @@
 # ==========================
 # LRE-BOT/src/core/db.py
 # ==========================
+import asyncio
 import aiosqlite
 import time
 from pathlib import Path
 from datetime import datetime, timedelta
-from . import config
+from . import config, cycles, migrations, modes, participants, querycache, ranks, settings, stickies, streaks
+from .pool import ConnectionPool
 import logging
 
 logger = logging.getLogger('LRE-BOT.db')
 
 DB_PATH = config.DB_PATH
 
+# Connexions partagées, ouvertes au setup_hook et fermées à l'arrêt du bot
+pool = ConnectionPool(DB_PATH, archive_path=config.ARCHIVE_DB_PATH)
+
 def now_ts():
     """Retourne le timestamp actuel (entier)"""
     return int(time.time())
 
 
-async def init_db():
-    """Initialise la base de données avec toutes les tables"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        # --- VERIFICATION MIGRATION ---
-        async with conn.execute("PRAGMA table_info(users)") as cursor:
-            columns = await cursor.fetchall()
-        
-        column_names = [col[1] for col in columns]
-        needs_migration = bool(column_names and "guild_id" not in column_names)
-
-        if needs_migration:
-            logger.info("⏳ Migration de la table 'users' vers le nouveau format...")
-            await conn.execute("ALTER TABLE users RENAME TO users_old")
-            
-        # Table users (existante avec nouvelles colonnes)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER NOT NULL,
-                guild_id INTEGER NOT NULL,
-                username TEXT,
-                join_date INTEGER,
-                leave_date INTEGER,
-                total_time INTEGER DEFAULT 0,
-                total_A INTEGER DEFAULT 0,
-                total_B INTEGER DEFAULT 0,
-                sessions_count INTEGER DEFAULT 0,
-                streak_current INTEGER DEFAULT 0,
-                streak_best INTEGER DEFAULT 0,
-                last_active_date INTEGER,
-                first_session INTEGER,
-                first_session_date INTEGER,
-                last_session_date INTEGER,
-                pause_time_A INTEGER DEFAULT 0,
-                pause_time_B INTEGER DEFAULT 0,
-                longest_session INTEGER DEFAULT 0,
-                best_week_number INTEGER,
-                best_week_time INTEGER DEFAULT 0,
-                PRIMARY KEY (user_id, guild_id)
-            )
-        """)
-
-        if needs_migration:
-            await conn.execute("""
-                INSERT INTO users (
-                    user_id, guild_id, username, join_date, leave_date,
-                    total_time, total_A, total_B, pause_time_A, pause_time_B,
-                    sessions_count, streak_current, streak_best,
-                    first_session, last_session_date
-                )
-                SELECT 
-                    user_id, 0, username, join_date, leave_date,
-                    total_time, total_A, total_B, pause_A, pause_B,
-                    sessions_count, streak_current, streak_best,
-                    first_session, last_session
-                FROM users_old
-            """)
-            await conn.execute("DROP TABLE users_old")
-
-        # Table sessions (nouvelle)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                guild_id INTEGER NOT NULL,
-                mode TEXT NOT NULL CHECK(mode IN ('A', 'B')),
-                work_time INTEGER NOT NULL,
-                pause_time INTEGER NOT NULL,
-                start_timestamp INTEGER NOT NULL,
-                end_timestamp INTEGER NOT NULL,
-                day_of_week INTEGER NOT NULL CHECK(day_of_week BETWEEN 0 AND 6),
-                hour_of_day INTEGER NOT NULL CHECK(hour_of_day BETWEEN 0 AND 23)
-            )
-        """)
+async def open_db():
+    """Ouvre le pool de connexions (cycle de vie du bot)"""
+    await pool.open()
 
-        # Table participants (existante)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS participants (
-                guild_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                join_ts INTEGER NOT NULL,
-                mode TEXT NOT NULL,
-                validated INTEGER DEFAULT 0,
-                cycles_completed INTEGER DEFAULT 0,
-                PRIMARY KEY (guild_id, user_id)
-            )
-        """)
 
-        # Migration pour ajouter cycles_completed sur base existante
-        try:
-            await conn.execute("ALTER TABLE participants ADD COLUMN cycles_completed INTEGER DEFAULT 0")
-        except aiosqlite.OperationalError:
-            pass
+async def close_db():
+    """Ferme le pool de connexions (cycle de vie du bot), après un dernier point de contrôle des participants"""
+    try:
+        await checkpoint_participants()
+    except Exception as e:
+        logger.error(f"❌ Point de contrôle des participants impossible à l'arrêt (journal conservé): {e}")
+    participants.close()
+    await pool.close()
 
-        # Table sticky_messages (existante)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS sticky_messages (
-                guild_id INTEGER NOT NULL,
-                channel_id INTEGER NOT NULL,
-                message_id INTEGER NOT NULL,
-                content TEXT NOT NULL,
-                author_id INTEGER,
-                PRIMARY KEY (guild_id, channel_id)
-            )
-        """)
 
-        # Table maintenance (existante)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS maintenance (
-                guild_id INTEGER PRIMARY KEY,
-                is_active INTEGER DEFAULT 0
-            )
-        """)
-
-        # Index pour optimiser les requêtes
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id, guild_id)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions(start_timestamp)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_day ON sessions(day_of_week)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_hour ON sessions(hour_of_day)")
-
-        await conn.commit()
-        logger.info("✅ Base de données SQLite initialisée et synchronisée avec succès.")
+async def init_db():
+    """Applique les migrations de schéma en attente (une seule fois, au setup_hook)"""
+    applied = await pool.write(migrations.run_migrations)
+    await pool.write(migrations.init_archive)
+    settings.load(*await pool.write(migrations.load_settings))
+    stickies.load(await pool.write(_load_stickies))
+    modes.load(await pool.write(_load_modes))
+    participants.load(await pool.write(_load_participants), config.PARTICIPANTS_JOURNAL_PATH)
+    await checkpoint_participants()
+    if applied:
+        logger.info(f"✅ {applied} migration(s) appliquée(s), schéma en version {migrations.LATEST_VERSION}.")
+    else:
+        logger.info(f"✅ Schéma de base de données à jour (version {migrations.LATEST_VERSION}).")
 
 
 async def upsert_user(user_id: int, username: str, join_date: int, guild_id: int = 0):
     """Créer ou mettre à jour un utilisateur"""
-    async with aiosqlite.connect(DB_PATH) as conn:
+    async def op(conn):
         await conn.execute("""
             INSERT INTO users (user_id, guild_id, username, join_date)
             VALUES (?, ?, ?, ?)
             ON CONFLICT(user_id, guild_id) DO UPDATE SET
                 username = excluded.username
         """, (user_id, guild_id, username, join_date))
-        await conn.commit()
-
-
-async def get_user_stats(user_id: int, guild_id: int):
-    """Récupérer les infos étendues d'un utilisateur, incluant les rangs"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        conn.row_factory = aiosqlite.Row
-        
-        async with conn.execute("""
-            SELECT *,
-                (total_time + pause_time_A + pause_time_B) as temps_total_global,
-                (pause_time_A + pause_time_B) as temps_repos
-            FROM users WHERE user_id = ? AND guild_id = ?
-        """, (user_id, guild_id)) as cursor:
-            user = await cursor.fetchone()
-            
-        if not user:
-            return None
-            
-        user_data = dict(user)
-        
-        # Rangs personnels
-        async with conn.execute("SELECT COUNT(*) FROM users WHERE guild_id = ? AND total_time > ?", (guild_id, user_data['total_time'])) as cursor:
-            user_data['rank_work'] = (await cursor.fetchone())[0] + 1
-            
-        async with conn.execute("SELECT COUNT(*) FROM users WHERE guild_id = ? AND (total_time + pause_time_A + pause_time_B) > ?", (guild_id, user_data['temps_total_global'])) as cursor:
-            user_data['rank_total'] = (await cursor.fetchone())[0] + 1
-            
-        async with conn.execute("SELECT COUNT(*) FROM users WHERE guild_id = ? AND (pause_time_A + pause_time_B) > ?", (guild_id, user_data['temps_repos'])) as cursor:
-            user_data['rank_rest'] = (await cursor.fetchone())[0] + 1
-            
-        async with conn.execute("SELECT COUNT(*) FROM users WHERE guild_id = ? AND streak_best > ?", (guild_id, user_data['streak_best'])) as cursor:
-            user_data['rank_streak'] = (await cursor.fetchone())[0] + 1
+        return await _rank_values(conn, user_id, guild_id)
 
-        return user_data
+    ranks.update(guild_id, user_id, await pool.write(op))
+    querycache.invalidate(guild_id)
 
 
-async def add_participant(guild_id: int, user_id: int, mode: str):
-    """Ajouter un participant à une session"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        try:
-            await conn.execute("""
-                INSERT INTO participants (guild_id, user_id, join_ts, mode)
-                VALUES (?, ?, ?, ?)
-            """, (guild_id, user_id, now_ts(), mode))
-            await conn.commit()
-            return True
-        except aiosqlite.IntegrityError:
-            return False
+async def get_usernames(user_ids):
+    """Derniers noms connus (users.username, tous serveurs confondus) : {user_id: username}"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    placeholders = ",".join("?" * len(user_ids))
+    async with pool.reader() as conn:
+        async with conn.execute(f"""
+            SELECT user_id, username FROM users
+            WHERE user_id IN ({placeholders}) AND username IS NOT NULL
+        """, user_ids) as cursor:
+            return {user_id: username for user_id, username in await cursor.fetchall()}
 
 
-async def remove_participant(guild_id: int, user_id: int):
-    """Retirer un participant et retourner son temps de session"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT join_ts, mode FROM participants
-            WHERE guild_id = ? AND user_id = ?
-        """, (guild_id, user_id)) as cursor:
-            row = await cursor.fetchone()
+async def set_usernames(guild_id: int, names: dict):
+    """Reporter des noms récupérés par l'API dans users.username (lignes existantes uniquement)"""
+    if not names:
+        return
 
-        if row:
-            await conn.execute("""
-                DELETE FROM participants WHERE guild_id = ? AND user_id = ?
-            """, (guild_id, user_id))
-            await conn.commit()
-            return row
-        return (None, None)
+    async def op(conn):
+        await conn.executemany("""
+            UPDATE users SET username = ? WHERE user_id = ? AND guild_id = ?
+        """, [(username, user_id, guild_id) for user_id, username in names.items()])
 
+    await pool.write(op)
 
-async def get_active_session(guild_id: int, user_id: int):
-    """Récupérer la session active d'un utilisateur"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT join_ts, mode FROM participants
-            WHERE guild_id = ? AND user_id = ?
-        """, (guild_id, user_id)) as cursor:
-            return await cursor.fetchone()
 
+async def set_leave_date(user_id: int, leave_date: int):
+    """Enregistrer la date de départ d'un utilisateur du serveur"""
+    async def op(conn):
+        await conn.execute("UPDATE users SET leave_date = ? WHERE user_id = ?", (leave_date, user_id))
 
-async def update_participant_state(guild_id: int, user_id: int, validated: int = None, increment_cycles: bool = False):
-    """Met à jour l'état de validation et/ou incrémente les cycles complétés d'un participant"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        if validated is not None and increment_cycles:
-            await conn.execute("""
-                UPDATE participants 
-                SET validated = ?, cycles_completed = cycles_completed + 1
-                WHERE guild_id = ? AND user_id = ?
-            """, (validated, guild_id, user_id))
-        elif validated is not None:
-            await conn.execute("""
-                UPDATE participants 
-                SET validated = ?
-                WHERE guild_id = ? AND user_id = ?
-            """, (validated, guild_id, user_id))
-        elif increment_cycles:
-            await conn.execute("""
-                UPDATE participants 
-                SET cycles_completed = cycles_completed + 1
-                WHERE guild_id = ? AND user_id = ?
-            """, (guild_id, user_id))
-        await conn.commit()
+    await pool.write(op)
 
 
-async def ajouter_temps(user_id: int, guild_id: int, temps_sec: int, mode: str, is_session_end: bool = False):
-    """
-    Ajouter du temps de travail à un utilisateur
-    Si is_session_end=True, on enregistre aussi la session détaillée
-    """
-    async with aiosqlite.connect(DB_PATH) as conn:
-        # Récupérer les stats actuelles
+async def get_user_stats(user_id: int, guild_id: int):
+    """Récupérer les infos étendues d'un utilisateur, incluant les rangs"""
+    async with pool.reader() as conn:
         async with conn.execute("""
-            SELECT total_time, total_A, total_B, sessions_count, longest_session, 
-                   first_session_date, last_active_date
-            FROM users WHERE user_id = ? AND guild_id = ?
+            SELECT * FROM users WHERE user_id = ? AND guild_id = ?
         """, (user_id, guild_id)) as cursor:
+            # row_factory sur le curseur : la connexion est partagée par le pool
+            cursor.row_factory = aiosqlite.Row
             user = await cursor.fetchone()
-
-        now = now_ts()
-        
-        # Calculer le nouveau total
-        if user:
-            total_time = user[0] + temps_sec
-            total_A = user[1] + (temps_sec if mode == 'A' else 0)
-            total_B = user[2] + (temps_sec if mode == 'B' else 0)
-            sessions_count = user[3] + (1 if is_session_end else 0)
-            longest_session = max(user[4] or 0, temps_sec) if is_session_end else user[4]
-            first_session_date = user[5] or now
-            last_session_date = now if is_session_end else user[6]
-        else:
-            total_time = temps_sec
-            total_A = temps_sec if mode == 'A' else 0
-            total_B = temps_sec if mode == 'B' else 0
-            sessions_count = 1 if is_session_end else 0
-            longest_session = temps_sec if is_session_end else 0
-            first_session_date = now
-            last_session_date = now if is_session_end else None
-
-        # Mettre à jour l'utilisateur
-        await conn.execute("""
-            INSERT INTO users (
-                user_id, guild_id, total_time, total_A, total_B, 
-                sessions_count, longest_session, first_session_date, 
-                last_session_date, last_active_date
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(user_id, guild_id) DO UPDATE SET
-                total_time = excluded.total_time,
-                total_A = excluded.total_A,
-                total_B = excluded.total_B,
-                sessions_count = excluded.sessions_count,
-                longest_session = excluded.longest_session,
-                first_session_date = COALESCE(users.first_session_date, excluded.first_session_date),
-                last_session_date = excluded.last_session_date,
-                last_active_date = excluded.last_active_date
-        """, (user_id, guild_id, total_time, total_A, total_B, sessions_count, 
-              longest_session, first_session_date, last_session_date, now))
-
-        await conn.commit()
-
-
-async def record_session(user_id: int, guild_id: int, mode: str, work_time: int, 
-                        pause_time: int, start_ts: int, end_ts: int):
-    """Enregistrer une session détaillée dans l'historique"""
-    dt = datetime.fromtimestamp(start_ts)
-    day_of_week = dt.weekday()  # 0=Lundi, 6=Dimanche
-    hour_of_day = dt.hour
-
-    async with aiosqlite.connect(DB_PATH) as conn:
-        await conn.execute("""
-            INSERT INTO sessions (
-                user_id, guild_id, mode, work_time, pause_time,
-                start_timestamp, end_timestamp, day_of_week, hour_of_day
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (user_id, guild_id, mode, work_time, pause_time, 
-              start_ts, end_ts, day_of_week, hour_of_day))
-        
-        # Mettre à jour le temps de pause
-        pause_column = f"pause_time_{mode}"
-        await conn.execute(f"""
-            UPDATE users 
-            SET {pause_column} = {pause_column} + ?
-            WHERE user_id = ? AND guild_id = ?
-        """, (pause_time, user_id, guild_id))
-        
-        await conn.commit()
-
-
-async def get_server_stats(guild_id: int):
-    """Récupérer les statistiques globales et calendaires du serveur"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        # Stats globales
-        async with conn.execute("""
-            SELECT 
-                COUNT(DISTINCT user_id) as users,
-                COALESCE(SUM(total_time), 0) as total_time,
-                COALESCE(AVG(total_time), 0) as avg_time
-            FROM users WHERE guild_id = ?
-        """, (guild_id,)) as cursor:
-            stats = await cursor.fetchone()
-
-        now = datetime.now()
-        start_of_week = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        ts_week = int(start_of_week.timestamp())
-        ts_month = int(start_of_month.timestamp())
-
-        async with conn.execute("SELECT COUNT(DISTINCT user_id) FROM sessions WHERE guild_id = ? AND start_timestamp >= ?", (guild_id, ts_week)) as cursor:
-            unique_users_week = (await cursor.fetchone())[0]
-            
-        async with conn.execute("SELECT COUNT(DISTINCT user_id) FROM sessions WHERE guild_id = ? AND start_timestamp >= ?", (guild_id, ts_month)) as cursor:
-            unique_users_month = (await cursor.fetchone())[0]
-            
-        async with conn.execute("SELECT COUNT(*) FROM sessions WHERE guild_id = ? AND start_timestamp >= ?", (guild_id, ts_week)) as cursor:
-            sessions_week = (await cursor.fetchone())[0]
             
-        async with conn.execute("SELECT COUNT(*) FROM sessions WHERE guild_id = ? AND start_timestamp >= ?", (guild_id, ts_month)) as cursor:
-            sessions_month = (await cursor.fetchone())[0]
-            
-        async with conn.execute("SELECT COUNT(*) FROM sessions WHERE guild_id = ?", (guild_id,)) as cursor:
-            total_sessions = (await cursor.fetchone())[0]
-
-        return {
-            "users": stats[0],
-            "total_time": stats[1],
-            "avg_time": int(stats[2]),
-            "unique_users_week": unique_users_week,
-            "unique_users_month": unique_users_month,
-            "sessions_week": sessions_week,
-            "sessions_month": sessions_month,
-            "total_sessions": total_sessions
-        }
-
-
-async def get_leaderboards(guild_id: int):
-    """Récupérer les classements étendus"""
-    now = datetime.now()
-    start_of_week = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    ts_week = int(start_of_week.timestamp())
-    ts_month = int(start_of_month.timestamp())
-
-    async with aiosqlite.connect(DB_PATH) as conn:
-        # Top temps global (travail + repos)
-        async with conn.execute("""
-            SELECT user_id, (total_time + pause_time_A + pause_time_B) as total_global 
-            FROM users 
-            WHERE guild_id = ? AND (total_time + pause_time_A + pause_time_B) > 0
-            ORDER BY total_global DESC LIMIT 10
-        """, (guild_id,)) as cursor:
-            top_global = await cursor.fetchall()
-
-        # Top temps travail
-        async with conn.execute("""
-            SELECT user_id, total_time FROM users 
-            WHERE guild_id = ? AND total_time > 0
-            ORDER BY total_time DESC LIMIT 10
-        """, (guild_id,)) as cursor:
-            top_work = await cursor.fetchall()
-            
-        # Top repos (Le flemmard)
-        async with conn.execute("""
-            SELECT user_id, (pause_time_A + pause_time_B) as repos 
-            FROM users 
-            WHERE guild_id = ? AND (pause_time_A + pause_time_B) > 0
-            ORDER BY repos DESC LIMIT 10
-        """, (guild_id,)) as cursor:
-            top_rest = await cursor.fetchall()
-
-        # Top semaine calendaire
-        async with conn.execute("""
-            SELECT user_id, SUM(work_time) as work_week 
-            FROM sessions 
-            WHERE guild_id = ? AND start_timestamp >= ? 
-            GROUP BY user_id 
-            ORDER BY work_week DESC LIMIT 10
-        """, (guild_id, ts_week)) as cursor:
-            top_week = await cursor.fetchall()
-
-        # Top mois calendaire
-        async with conn.execute("""
-            SELECT user_id, SUM(work_time) as work_month
-            FROM sessions 
-            WHERE guild_id = ? AND start_timestamp >= ? 
-            GROUP BY user_id 
-            ORDER BY work_month DESC LIMIT 10
-        """, (guild_id, ts_month)) as cursor:
-            top_month = await cursor.fetchall()
-
-        # Top streaks
-        async with conn.execute("""
-            SELECT user_id, streak_current, streak_best FROM users 
-            WHERE guild_id = ? AND streak_best > 0
-            ORDER BY streak_best DESC LIMIT 10
-        """, (guild_id,)) as cursor:
-            top_streak = await cursor.fetchall()
-
-        return {
-            "🌎 Temps Total (Travail + Repos)": top_global,
-            "⏱️ Meilleur Temps de Travail": top_work,
-            "🛌 Le Flemmard (Meilleur Repos)": top_rest,
-            "📅 Temps de Travail (Cette Semaine)": top_week,
-            "📆 Temps de Travail (Ce Mois)": top_month,
-            "🔥 Meilleurs Streaks": top_streak
-        }
-
-async def get_yearly_analytics(guild_id: int, year: int):
-    """Récupère les statistiques agrégées par mois pour une année spécifique."""
-    dt_start = datetime(year, 1, 1)
-    dt_end = datetime(year + 1, 1, 1) if year < 9999 else datetime(year, 12, 31, 23, 59, 59)
-    ts_start = int(dt_start.timestamp())
-    ts_end = int(dt_end.timestamp())
-    
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT 
-                CAST(strftime('%m', datetime(start_timestamp, 'unixepoch', 'localtime')) AS INTEGER) as month,
-                COUNT(DISTINCT user_id) as unique_users,
-                COUNT(*) as total_sessions,
-                SUM(work_time) as total_work,
-                SUM(pause_time) as total_pause
-            FROM sessions
-            WHERE guild_id = ? AND start_timestamp >= ? AND start_timestamp < ?
-            GROUP BY month
-            ORDER BY month ASC
-        """, (guild_id, ts_start, ts_end)) as cursor:
-            rows = await cursor.fetchall()
+        if not user:
+            return None
             
-    analytics = {m: {"users": 0, "sessions": 0, "work": 0, "pause": 0} for m in range(1, 13)}
-    for row in rows:
-        month = row[0]
-        if month in analytics:
-            analytics[month] = {
-                "users": row[1],
-                "sessions": row[2],
-                "work": row[3] or 0,
-                "pause": row[4] or 0
-            }
-    return analytics
+        user_data = dict(user)
 
+    user_data['streak_current'] = streaks.current_streak(
+        user_data['streak_current'], user_data['last_active_date'], now_ts()
+    )
 
-# Fonctions sticky messages (existantes)
-async def get_sticky(guild_id: int, channel_id: int):
-    """Récupérer un sticky message"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT message_id, content, author_id FROM sticky_messages
-            WHERE guild_id = ? AND channel_id = ?
-        """, (guild_id, channel_id)) as cursor:
-            return await cursor.fetchone()
+    # Rangs personnels (index en mémoire, O(log n) par dimension)
+    index = await ranks.get_index(guild_id, _load_rank_rows)
+    user_data['rank_total'] = index.rank("total", user_data['temps_total_global'] or 0)
+    user_data['rank_work'] = index.rank("work", user_data['total_time'] or 0)
+    user_data['rank_rest'] = index.rank("rest", user_data['temps_repos'] or 0)
+    user_data['rank_streak'] = index.rank("streak", user_data['streak_best'] or 0)
 
+    return user_data
 
-async def set_sticky(guild_id: int, channel_id: int, message_id: int, content: str, author_id: int = None):
-    """Définir ou mettre à jour un sticky message"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        await conn.execute("""
-            INSERT INTO sticky_messages (guild_id, channel_id, message_id, content, author_id)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(guild_id, channel_id) DO UPDATE SET
-                message_id = excluded.message_id,
-                content = excluded.content,
-                author_id = excluded.author_id
-        """, (guild_id, channel_id, message_id, content, author_id))
-        await conn.commit()
 
+# Valeurs classées, dans l'ordre de ranks.DIMENSIONS
+_RANK_COLUMNS = """
+    COALESCE(temps_total_global, 0),
+    COALESCE(total_time, 0),
+    COALESCE(temps_repos, 0),
+    COALESCE(streak_best, 0)
+"""
 
-async def remove_sticky(guild_id: int, channel_id: int):
-    """Supprimer un sticky message"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        await conn.execute("""
-            DELETE FROM sticky_messages 
-            WHERE guild_id = ? AND channel_id = ?
-        """, (guild_id, channel_id))
-        await conn.commit()
 
+async def _load_rank_rows(guild_id: int):
+    """Charger les valeurs classées de tous les utilisateurs d'un serveur (index de rangs)"""
+    async with pool.reader(analytics=True) as conn:
+        async with conn.execute(f"SELECT user_id, {_RANK_COLUMNS} FROM users WHERE guild_id = ?", (guild_id,)) as cursor:
+            return await cursor.fetchall()
 
-# Fonctions maintenance (existantes)
-async def is_maintenance_active(guild_id: int):
-    """Vérifier si le mode maintenance est actif"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT is_active FROM maintenance WHERE guild_id = ?
-        """, (guild_id,)) as cursor:
-            row = await cursor.fetchone()
-            return bool(row[0]) if row else False
 
+async def _rank_values(conn, user_id: int, guild_id: int):
+    """Relire les valeurs classées d'un utilisateur dans la transaction d'écriture"""
+    async with conn.execute(f"SELECT {_RANK_COLUMNS} FROM users WHERE user_id = ? AND guild_id = ?", (user_id, guild_id)) as cursor:
+        return await cursor.fetchone()
 
-async def toggle_maintenance(guild_id: int):
-    """Activer/désactiver le mode maintenance"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT is_active FROM maintenance WHERE guild_id = ?
-        """, (guild_id,)) as cursor:
-            row = await cursor.fetchone()
 
-        new_state = 0 if (row and row[0]) else 1
+# Participants : registre mémoire (core/participants.py), reporté dans la table par point de contrôle
+_checkpoint_lock = asyncio.Lock()
 
-        await conn.execute("""
-            INSERT INTO maintenance (guild_id, is_active) VALUES (?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET is_active = excluded.is_active
-        """, (guild_id, new_state))
-        await conn.commit()
 
-        return bool(new_state)
-# ==========================
-# LRE-BOT/src/core/db.py
-# ==========================
-import aiosqlite
-import time
-from pathlib import Path
-from datetime import datetime, timedelta
-from . import config
-import logging
+async def _load_participants(conn):
+    async with conn.execute("""
+        SELECT guild_id, user_id, join_ts, mode, validated, cycles_completed FROM participants
+    """) as cursor:
+        return await cursor.fetchall()
 
-logger = logging.getLogger('LRE-BOT.db')
 
-DB_PATH = config.DB_PATH
+async def checkpoint_participants():
+    """
+    Reporter le registre des participants dans la table participants (une transaction),
+    puis oublier le journal correspondant. Retourne le nombre de lignes écrites (0 si inchangé).
+    """
+    async with _checkpoint_lock:
+        rows = participants.snapshot()
+        if rows is None:
+            return 0
+
+        async def op(conn):
+            await conn.execute("DELETE FROM participants")
+            await conn.executemany("""
+                INSERT INTO participants (guild_id, user_id, join_ts, mode, validated, cycles_completed)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
 
-def now_ts():
-    """Retourne le timestamp actuel (entier)"""
-    return int(time.time())
+        try:
+            await pool.write(op)
+        except Exception:
+            participants.checkpoint_failed()
+            raise
+        participants.checkpoint_done()
+        return len(rows)
 
 
-async def init_db():
-    """Initialise la base de données avec toutes les tables"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        # --- VERIFICATION MIGRATION ---
-        async with conn.execute("PRAGMA table_info(users)") as cursor:
-            columns = await cursor.fetchall()
-        
-        column_names = [col[1] for col in columns]
-        needs_migration = bool(column_names and "guild_id" not in column_names)
-
-        if needs_migration:
-            logger.info("⏳ Migration de la table 'users' vers le nouveau format...")
-            await conn.execute("ALTER TABLE users RENAME TO users_old")
-            
-        # Table users (existante avec nouvelles colonnes)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER NOT NULL,
-                guild_id INTEGER NOT NULL,
-                username TEXT,
-                join_date INTEGER,
-                leave_date INTEGER,
-                total_time INTEGER DEFAULT 0,
-                total_A INTEGER DEFAULT 0,
-                total_B INTEGER DEFAULT 0,
-                sessions_count INTEGER DEFAULT 0,
-                streak_current INTEGER DEFAULT 0,
-                streak_best INTEGER DEFAULT 0,
-                last_active_date INTEGER,
-                first_session INTEGER,
-                first_session_date INTEGER,
-                last_session_date INTEGER,
-                pause_time_A INTEGER DEFAULT 0,
-                pause_time_B INTEGER DEFAULT 0,
-                longest_session INTEGER DEFAULT 0,
-                best_week_number INTEGER,
-                best_week_time INTEGER DEFAULT 0,
-                PRIMARY KEY (user_id, guild_id)
-            )
-        """)
+async def add_participant(guild_id: int, user_id: int, mode: str):
+    """Ajouter un participant à une session"""
+    if participants.get(guild_id, user_id) is not None:
+        return False
+    participants.save(guild_id, user_id, participants.Participant(now_ts(), mode))
+    return True
 
-        if needs_migration:
-            await conn.execute("""
-                INSERT INTO users (
-                    user_id, guild_id, username, join_date, leave_date,
-                    total_time, total_A, total_B, pause_time_A, pause_time_B,
-                    sessions_count, streak_current, streak_best,
-                    first_session, last_session_date
-                )
-                SELECT 
-                    user_id, 0, username, join_date, leave_date,
-                    total_time, total_A, total_B, pause_A, pause_B,
-                    sessions_count, streak_current, streak_best,
-                    first_session, last_session
-                FROM users_old
-            """)
-            await conn.execute("DROP TABLE users_old")
-
-        # Table sessions (nouvelle)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                guild_id INTEGER NOT NULL,
-                mode TEXT NOT NULL CHECK(mode IN ('A', 'B')),
-                work_time INTEGER NOT NULL,
-                pause_time INTEGER NOT NULL,
-                start_timestamp INTEGER NOT NULL,
-                end_timestamp INTEGER NOT NULL,
-                day_of_week INTEGER NOT NULL CHECK(day_of_week BETWEEN 0 AND 6),
-                hour_of_day INTEGER NOT NULL CHECK(hour_of_day BETWEEN 0 AND 23)
-            )
-        """)
 
-        # Table participants (existante)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS participants (
-                guild_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                join_ts INTEGER NOT NULL,
-                mode TEXT NOT NULL,
-                validated INTEGER DEFAULT 0,
-                cycles_completed INTEGER DEFAULT 0,
-                PRIMARY KEY (guild_id, user_id)
-            )
-        """)
+async def remove_participant(guild_id: int, user_id: int):
+    """Retirer un participant et retourner son temps de session"""
+    participant = participants.remove(guild_id, user_id)
+    if participant is None:
+        return (None, None)
+    return participant.join_ts, participant.mode
 
-        # Migration pour ajouter cycles_completed sur base existante
-        try:
-            await conn.execute("ALTER TABLE participants ADD COLUMN cycles_completed INTEGER DEFAULT 0")
-        except aiosqlite.OperationalError:
-            pass
 
-        # Table sticky_messages (existante)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS sticky_messages (
-                guild_id INTEGER NOT NULL,
-                channel_id INTEGER NOT NULL,
-                message_id INTEGER NOT NULL,
-                content TEXT NOT NULL,
-                author_id INTEGER,
-                PRIMARY KEY (guild_id, channel_id)
-            )
-        """)
+async def get_all_participants():
+    """Récupérer tous les participants actifs (tous serveurs confondus)"""
+    return participants.all_rows()
 
-        # Table maintenance (existante)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS maintenance (
-                guild_id INTEGER PRIMARY KEY,
-                is_active INTEGER DEFAULT 0
-            )
-        """)
 
-        # Index pour optimiser les requêtes
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id, guild_id)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions(start_timestamp)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_day ON sessions(day_of_week)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_hour ON sessions(hour_of_day)")
+async def get_participants(guild_id: int):
+    """Participants d'un serveur : (user_id, join_ts, mode, validated)"""
+    return [
+        (user_id, p.join_ts, p.mode, p.validated)
+        for user_id, p in participants.guild(guild_id).items()
+    ]
 
-        await conn.commit()
-        logger.info("✅ Base de données SQLite initialisée et synchronisée avec succès.")
 
+async def get_active_session(guild_id: int, user_id: int):
+    """Récupérer la session active d'un utilisateur"""
+    participant = participants.get(guild_id, user_id)
+    return (participant.join_ts, participant.mode) if participant else None
 
-async def upsert_user(user_id: int, username: str, join_date: int, guild_id: int = 0):
-    """Créer ou mettre à jour un utilisateur"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        await conn.execute("""
-            INSERT INTO users (user_id, guild_id, username, join_date)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(user_id, guild_id) DO UPDATE SET
-                username = excluded.username
-        """, (user_id, guild_id, username, join_date))
-        await conn.commit()
 
+async def get_participant(guild_id: int, user_id: int):
+    """État d'un participant : (join_ts, mode, validated, cycles_completed) ou None"""
+    participant = participants.get(guild_id, user_id)
+    return participant.row() if participant else None
 
-async def get_user_stats(user_id: int, guild_id: int):
-    """Récupérer les infos étendues d'un utilisateur, incluant les rangs"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        conn.row_factory = aiosqlite.Row
-        
-        async with conn.execute("""
-            SELECT *,
-                (total_time + pause_time_A + pause_time_B) as temps_total_global,
-                (pause_time_A + pause_time_B) as temps_repos
-            FROM users WHERE user_id = ? AND guild_id = ?
-        """, (user_id, guild_id)) as cursor:
-            user = await cursor.fetchone()
-            
-        if not user:
-            return None
-            
-        user_data = dict(user)
-        
-        # Rangs personnels
-        async with conn.execute("SELECT COUNT(*) FROM users WHERE guild_id = ? AND total_time > ?", (guild_id, user_data['total_time'])) as cursor:
-            user_data['rank_work'] = (await cursor.fetchone())[0] + 1
-            
-        async with conn.execute("SELECT COUNT(*) FROM users WHERE guild_id = ? AND (total_time + pause_time_A + pause_time_B) > ?", (guild_id, user_data['temps_total_global'])) as cursor:
-            user_data['rank_total'] = (await cursor.fetchone())[0] + 1
-            
-        async with conn.execute("SELECT COUNT(*) FROM users WHERE guild_id = ? AND (pause_time_A + pause_time_B) > ?", (guild_id, user_data['temps_repos'])) as cursor:
-            user_data['rank_rest'] = (await cursor.fetchone())[0] + 1
-            
-        async with conn.execute("SELECT COUNT(*) FROM users WHERE guild_id = ? AND streak_best > ?", (guild_id, user_data['streak_best'])) as cursor:
-            user_data['rank_streak'] = (await cursor.fetchone())[0] + 1
 
-        return user_data
+async def update_participant_state(guild_id: int, user_id: int, validated: int = None, increment_cycles: bool = False):
+    """Met à jour l'état de validation et/ou incrémente les cycles complétés d'un participant"""
+    participant = participants.get(guild_id, user_id)
+    if participant is None:
+        return
+    if validated is not None:
+        participant.validated = validated
+    if increment_cycles:
+        participant.cycles_completed += 1
+    participants.save(guild_id, user_id, participant)
+
+
+async def _credit_user(conn, user_id: int, guild_id: int, mode: str, work_time: int,
+                       pause_time: int, is_session_end: bool, now: int):
+    """
+    Créditer travail/pause à un utilisateur par UPSERT arithmétique
+    (colonnes A, B, ou pause_time_other pour un mode personnalisé).
+    Le streak et last_active_date n'avancent que s'il y a du travail, en O(1) depuis
+    last_active_date (une lecture par clé primaire).
+    """
+    async with conn.execute("""
+        SELECT streak_current, streak_best, last_active_date FROM users
+        WHERE user_id = ? AND guild_id = ?
+    """, (user_id, guild_id)) as cursor:
+        row = await cursor.fetchone()
+
+    streak_current, streak_best, last_active = row if row else (0, 0, None)
+    # Seul le travail fait un jour actif : une pause seule ne prolonge pas le streak
+    active_date = None
+    if work_time > 0:
+        last_day = streaks.streak_day(last_active) if last_active else None
+        streak_current, streak_best = streaks.advance(
+            streak_current, streak_best, last_day, streaks.streak_day(now)
+        )
+        active_date = now
+
+    await conn.execute("""
+        INSERT INTO users (
+            user_id, guild_id, total_time, total_A, total_B,
+            pause_time_A, pause_time_B, pause_time_other, sessions_count, longest_session,
+            first_session_date, last_session_date, last_active_date,
+            streak_current, streak_best
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, guild_id) DO UPDATE SET
+            total_time = total_time + excluded.total_time,
+            total_A = total_A + excluded.total_A,
+            total_B = total_B + excluded.total_B,
+            pause_time_A = pause_time_A + excluded.pause_time_A,
+            pause_time_B = pause_time_B + excluded.pause_time_B,
+            pause_time_other = COALESCE(pause_time_other, 0) + excluded.pause_time_other,
+            sessions_count = sessions_count + excluded.sessions_count,
+            longest_session = MAX(COALESCE(longest_session, 0), excluded.longest_session),
+            first_session_date = COALESCE(first_session_date, excluded.first_session_date),
+            last_session_date = COALESCE(excluded.last_session_date, last_session_date),
+            last_active_date = COALESCE(excluded.last_active_date, last_active_date),
+            streak_current = excluded.streak_current,
+            streak_best = excluded.streak_best
+    """, (
+        user_id, guild_id, work_time,
+        work_time if mode == 'A' else 0,
+        work_time if mode == 'B' else 0,
+        pause_time if mode == 'A' else 0,
+        pause_time if mode == 'B' else 0,
+        pause_time if mode not in ('A', 'B') else 0,
+        1 if is_session_end else 0,
+        work_time if is_session_end else 0,
+        now,
+        now if is_session_end else None,
+        active_date,
+        streak_current,
+        streak_best
+    ))
+
+
+async def _insert_session(conn, user_id: int, guild_id: int, mode: str, work_time: int,
+                          pause_time: int, start_ts: int, end_ts: int):
+    """
+    Insérer une ligne dans sessions, sauf si (guild, user, début) existe déjà.
+    Retourne True si la ligne a été insérée.
+    """
+    dt = datetime.fromtimestamp(start_ts)
+    day_of_week = dt.weekday()  # 0=Lundi, 6=Dimanche
+    hour_of_day = dt.hour
 
+    async with conn.execute("""
+        INSERT INTO sessions (
+            user_id, guild_id, mode, work_time, pause_time,
+            start_timestamp, end_timestamp, day_of_week, hour_of_day
+        )
+        SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?
+        WHERE NOT EXISTS (
+            SELECT 1 FROM sessions
+            WHERE guild_id = ? AND user_id = ? AND start_timestamp = ?
+        )
+    """, (user_id, guild_id, mode, work_time, pause_time,
+          start_ts, end_ts, day_of_week, hour_of_day,
+          guild_id, user_id, start_ts)) as cursor:
+        inserted = cursor.rowcount > 0
+
+    if inserted:
+        await _rollup_session(conn, user_id, guild_id, mode, work_time, pause_time, start_ts)
+    return inserted
+
+
+async def _rollup_session(conn, user_id: int, guild_id: int, mode: str, work_time: int,
+                          pause_time: int, start_ts: int):
+    """Reporter une session dans daily_rollup (même transaction que l'insertion)"""
+    day = datetime.fromtimestamp(start_ts).strftime("%Y-%m-%d")
+    await conn.execute("""
+        INSERT INTO daily_rollup (guild_id, user_id, day, mode, work, pause, sessions)
+        VALUES (?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT(guild_id, day, user_id, mode) DO UPDATE SET
+            work = work + excluded.work,
+            pause = pause + excluded.pause,
+            sessions = sessions + 1
+    """, (guild_id, user_id, day, mode, work_time, pause_time))
+
+
+async def complete_cycle(guild_id: int, user_id: int, mode: str, work_time: int, pause_time: int,
+                         start_ts: int, end_ts: int, end_session: bool = False, cycle_index: int = None):
+    """
+    Clôturer un cycle : ligne de session et temps de travail/pause en une transaction,
+    puis cycles_completed + 1 dans le registre (ou retrait du participant si end_session).
+    Idempotent sur (guild, user, début du cycle) : retourne False si déjà enregistré.
+    `cycle_index` (cycles_completed du cycle clôturé) permet de rattraper le registre si la
+    session était déjà en base mais le journal en retard (crash entre le commit et le journal).
+    """
+    recorded, = await complete_cycles([dict(
+        guild_id=guild_id, user_id=user_id, mode=mode, work_time=work_time, pause_time=pause_time,
+        start_ts=start_ts, end_ts=end_ts, end_session=end_session, cycle_index=cycle_index
+    )])
+    return recorded
 
-async def add_participant(guild_id: int, user_id: int, mode: str):
-    """Ajouter un participant à une session"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        try:
-            await conn.execute("""
-                INSERT INTO participants (guild_id, user_id, join_ts, mode)
-                VALUES (?, ?, ?, ?)
-            """, (guild_id, user_id, now_ts(), mode))
-            await conn.commit()
-            return True
-        except aiosqlite.IntegrityError:
-            return False
 
+async def complete_cycles(cycles: list):
+    """
+    Clôturer plusieurs cycles (paramètres de complete_cycle) dans une seule transaction,
+    puis appliquer les transitions du registre dans l'ordre. Retourne la liste des "enregistré".
+    """
+    async def op(conn):
+        now = now_ts()
+        results = []
+        for cycle in cycles:
+            guild_id, user_id, mode = cycle["guild_id"], cycle["user_id"], cycle["mode"]
+            if not await _insert_session(conn, user_id, guild_id, mode, cycle["work_time"], cycle["pause_time"],
+                                         cycle["start_ts"], cycle["end_ts"]):
+                results.append((False, None))
+                continue
+
+            # Horodaté à la fin du cycle (rattrapage après une panne : jour de streak exact)
+            await _credit_user(conn, user_id, guild_id, mode, cycle["work_time"], cycle["pause_time"],
+                               cycle.get("end_session", False), min(cycle["end_ts"], now))
+            results.append((True, await _rank_values(conn, user_id, guild_id)))
+        return results
+
+    results = await pool.write(op)
+
+    # Stats en cache des serveurs crédités : une invalidation par serveur, pas par cycle
+    for guild_id in {cycle["guild_id"] for cycle, (recorded, _) in zip(cycles, results) if recorded}:
+        querycache.invalidate(guild_id)
+
+    for cycle, (recorded, values) in zip(cycles, results):
+        guild_id, user_id = cycle["guild_id"], cycle["user_id"]
+        ranks.update(guild_id, user_id, values)
+
+        if cycle.get("end_session"):
+            participants.remove(guild_id, user_id)
+            continue
+        participant = participants.get(guild_id, user_id)
+        if participant is not None and (recorded or participant.cycles_completed == cycle.get("cycle_index")):
+            participant.validated = 0
+            participant.cycles_completed += 1
+            participants.save(guild_id, user_id, participant)
+
+    return [recorded for recorded, _ in results]
+
+
+async def end_sessions(members: list):
+    """
+    Clôturer les sessions de plusieurs participants (guild_id, user_id) à l'instant présent :
+    crédit des cycles non clos évalué par lot (core/cycles.py), une seule transaction.
+    Retourne {(guild_id, user_id): (join_ts, planning, cycles_completed, travail, pause)} des sessions closes.
+    """
+    now = now_ts()
+    found = []
+    for guild_id, user_id in members:
+        participant = participants.get(guild_id, user_id)
+        if participant is None:
+            continue
+        schedule = modes.get(guild_id, participant.mode)
+        if schedule is None:
+            logger.warning(f"⚠️ Mode {participant.mode} inconnu pour {user_id} : session close sans crédit")
+            participants.remove(guild_id, user_id)
+            continue
+        found.append((guild_id, user_id, participant, schedule))
+    if not found:
+        return {}
+
+    _, _, _, works, pauses = cycles.positions(
+        [p.join_ts for _, _, p, _ in found], [schedule for _, _, _, schedule in found],
+        [p.cycles_completed for _, _, p, _ in found], now
+    )
+
+    closed = {}
+    batch = []
+    for (guild_id, user_id, p, schedule), work, pause in zip(found, works, pauses):
+        closed[(guild_id, user_id)] = (p.join_ts, schedule, p.cycles_completed, work, pause)
+        if work or pause:
+            batch.append(dict(
+                guild_id=guild_id, user_id=user_id, mode=p.mode, work_time=work, pause_time=pause,
+                start_ts=cycles.cycle_start(p.join_ts, schedule, p.cycles_completed), end_ts=now, end_session=True
+            ))
+        else:
+            participants.remove(guild_id, user_id)
 
-async def remove_participant(guild_id: int, user_id: int):
-    """Retirer un participant et retourner son temps de session"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT join_ts, mode FROM participants
-            WHERE guild_id = ? AND user_id = ?
-        """, (guild_id, user_id)) as cursor:
-            row = await cursor.fetchone()
+    if batch:
+        await complete_cycles(batch)
+    return closed
 
-        if row:
-            await conn.execute("""
-                DELETE FROM participants WHERE guild_id = ? AND user_id = ?
-            """, (guild_id, user_id))
-            await conn.commit()
-            return row
-        return (None, None)
 
+async def end_session(guild_id: int, user_id: int):
+    """Clôturer la session d'un participant ; (join_ts, planning, cycles_completed, travail, pause) ou None"""
+    return (await end_sessions([(guild_id, user_id)])).get((guild_id, user_id))
 
-async def get_active_session(guild_id: int, user_id: int):
-    """Récupérer la session active d'un utilisateur"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT join_ts, mode FROM participants
-            WHERE guild_id = ? AND user_id = ?
-        """, (guild_id, user_id)) as cursor:
-            return await cursor.fetchone()
 
+async def rebuild_daily_rollup(guild_id: int = None):
+    """Reconstruire daily_rollup depuis l'historique des sessions (commande *backfill)"""
+    async def op(conn):
+        return await migrations.backfill_daily_rollup(conn, guild_id)
 
-async def update_participant_state(guild_id: int, user_id: int, validated: int = None, increment_cycles: bool = False):
-    """Met à jour l'état de validation et/ou incrémente les cycles complétés d'un participant"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        if validated is not None and increment_cycles:
-            await conn.execute("""
-                UPDATE participants 
-                SET validated = ?, cycles_completed = cycles_completed + 1
-                WHERE guild_id = ? AND user_id = ?
-            """, (validated, guild_id, user_id))
-        elif validated is not None:
-            await conn.execute("""
-                UPDATE participants 
-                SET validated = ?
-                WHERE guild_id = ? AND user_id = ?
-            """, (validated, guild_id, user_id))
-        elif increment_cycles:
-            await conn.execute("""
-                UPDATE participants 
-                SET cycles_completed = cycles_completed + 1
-                WHERE guild_id = ? AND user_id = ?
-            """, (guild_id, user_id))
-        await conn.commit()
+    rows = await pool.write(op)
+    querycache.invalidate(guild_id)
+    return rows
 
 
-async def ajouter_temps(user_id: int, guild_id: int, temps_sec: int, mode: str, is_session_end: bool = False):
+async def recompute_streaks(guild_id: int = None, batch_size: int = 500):
     """
-    Ajouter du temps de travail à un utilisateur
-    Si is_session_end=True, on enregistre aussi la session détaillée
+    Recalculer les streaks depuis sessions en un seul passage trié (commande *backfill).
+    Les mises à jour partent au writer par lots ; retourne le nombre d'utilisateurs traités.
     """
-    async with aiosqlite.connect(DB_PATH) as conn:
-        # Récupérer les stats actuelles
-        async with conn.execute("""
-            SELECT total_time, total_A, total_B, sessions_count, longest_session, 
-                   first_session_date, last_active_date
-            FROM users WHERE user_id = ? AND guild_id = ?
-        """, (user_id, guild_id)) as cursor:
-            user = await cursor.fetchone()
-
-        now = now_ts()
-        
-        # Calculer le nouveau total
-        if user:
-            total_time = user[0] + temps_sec
-            total_A = user[1] + (temps_sec if mode == 'A' else 0)
-            total_B = user[2] + (temps_sec if mode == 'B' else 0)
-            sessions_count = user[3] + (1 if is_session_end else 0)
-            longest_session = max(user[4] or 0, temps_sec) if is_session_end else user[4]
-            first_session_date = user[5] or now
-            last_session_date = now if is_session_end else user[6]
-        else:
-            total_time = temps_sec
-            total_A = temps_sec if mode == 'A' else 0
-            total_B = temps_sec if mode == 'B' else 0
-            sessions_count = 1 if is_session_end else 0
-            longest_session = temps_sec if is_session_end else 0
-            first_session_date = now
-            last_session_date = now if is_session_end else None
-
-        # Mettre à jour l'utilisateur
+    where, params = ("AND guild_id = ?", (guild_id,)) if guild_id is not None else ("", ())
+
+    async def flush(rows):
+        async def op(conn):
+            await conn.executemany(streaks.UPDATE_SQL, rows)
+        await pool.write(op)
+
+    batch = []
+    guilds = set()
+    count = 0
+    async with pool.reader(analytics=True) as conn:
+        async with conn.execute(streaks.REPLAY_SQL.format(where=where), params) as cursor:
+            cursor.arraysize = batch_size
+            async for row in streaks.replay(cursor):
+                batch.append(row)
+                guilds.add(row[3])
+                if len(batch) >= batch_size:
+                    await flush(batch)
+                    count += len(batch)
+                    batch = []
+    if batch:
+        await flush(batch)
+        count += len(batch)
+
+    for gid in guilds:
+        ranks.invalidate(gid)
+        querycache.invalidate(gid)
+    return count
+
+
+async def _delete_in_batches(sql: str, params: tuple, batch_size: int, done: int, total: int, progress):
+    """Rejoue un DELETE borné (LIMIT batch_size) jusqu'à épuisement, une écriture par lot"""
+    async def op(conn):
+        async with conn.execute(sql, (*params, batch_size)) as cursor:
+            return cursor.rowcount
+
+    while True:
+        deleted = await pool.write(op)
+        if not deleted:
+            return done
+        done += deleted
+        if progress:
+            await progress(min(done, total), total)
+
+
+async def clear_all_stats(guild_id: int, batch_size: int = None, progress=None):
+    """
+    Réinitialiser les stats d'un serveur sans bloquer le writer :
+    compteurs users remis à zéro, puis sessions, daily_rollup et archive supprimés par lots
+    (les écritures des autres serveurs passent entre deux lots).
+    `progress(fait, total)` est attendu après chaque lot. Retourne le nombre de sessions supprimées.
+    """
+    async def reset_users(conn):
         await conn.execute("""
-            INSERT INTO users (
-                user_id, guild_id, total_time, total_A, total_B, 
-                sessions_count, longest_session, first_session_date, 
-                last_session_date, last_active_date
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(user_id, guild_id) DO UPDATE SET
-                total_time = excluded.total_time,
-                total_A = excluded.total_A,
-                total_B = excluded.total_B,
-                sessions_count = excluded.sessions_count,
-                longest_session = excluded.longest_session,
-                first_session_date = COALESCE(users.first_session_date, excluded.first_session_date),
-                last_session_date = excluded.last_session_date,
-                last_active_date = excluded.last_active_date
-        """, (user_id, guild_id, total_time, total_A, total_B, sessions_count, 
-              longest_session, first_session_date, last_session_date, now))
-
-        await conn.commit()
-
-
-async def record_session(user_id: int, guild_id: int, mode: str, work_time: int, 
-                        pause_time: int, start_ts: int, end_ts: int):
-    """Enregistrer une session détaillée dans l'historique"""
-    dt = datetime.fromtimestamp(start_ts)
-    day_of_week = dt.weekday()  # 0=Lundi, 6=Dimanche
-    hour_of_day = dt.hour
+            UPDATE users SET
+                total_time = 0, total_A = 0, total_B = 0,
+                pause_time_A = 0, pause_time_B = 0, pause_time_other = 0,
+                sessions_count = 0, longest_session = 0,
+                streak_current = 0, streak_best = 0,
+                first_session = NULL, first_session_date = NULL,
+                last_session_date = NULL, last_active_date = NULL,
+                best_week_number = NULL, best_week_time = 0
+            WHERE guild_id = ?
+        """, (guild_id,))
+        # Les sessions enregistrées pendant la réinitialisation (id plus grand) sont conservées
+        async with conn.execute("""
+            SELECT COALESCE(MAX(id), 0), COUNT(*) FROM sessions WHERE guild_id = ?
+        """, (guild_id,)) as cursor:
+            return await cursor.fetchone()
 
-    async with aiosqlite.connect(DB_PATH) as conn:
-        await conn.execute("""
-            INSERT INTO sessions (
-                user_id, guild_id, mode, work_time, pause_time,
-                start_timestamp, end_timestamp, day_of_week, hour_of_day
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (user_id, guild_id, mode, work_time, pause_time, 
-              start_ts, end_ts, day_of_week, hour_of_day))
-        
-        # Mettre à jour le temps de pause
-        pause_column = f"pause_time_{mode}"
-        await conn.execute(f"""
-            UPDATE users 
-            SET {pause_column} = {pause_column} + ?
-            WHERE user_id = ? AND guild_id = ?
-        """, (pause_time, user_id, guild_id))
-        
-        await conn.commit()
+    batch_size = batch_size or config.CLEAR_BATCH_ROWS
+    max_id, total = await pool.write(reset_users)
+    ranks.invalidate(guild_id)
+    querycache.invalidate(guild_id)
+
+    deleted = await _delete_in_batches("""
+        DELETE FROM sessions WHERE id IN (
+            SELECT id FROM sessions WHERE guild_id = ? AND id <= ? LIMIT ?
+        )
+    """, (guild_id, max_id), batch_size, 0, total, progress)
+
+    # Agrégats : par tranches de jours (ou de mois) couvrant au moins batch_size lignes
+    await _delete_in_batches("""
+        DELETE FROM daily_rollup WHERE guild_id = ? AND day <= (
+            SELECT MAX(day) FROM (SELECT day FROM daily_rollup WHERE guild_id = ? ORDER BY day LIMIT ?)
+        )
+    """, (guild_id, guild_id), batch_size, deleted, total, None)
+    await _delete_in_batches("""
+        DELETE FROM archive.monthly_rollup WHERE guild_id = ? AND month <= (
+            SELECT MAX(month) FROM (SELECT month FROM archive.monthly_rollup WHERE guild_id = ? ORDER BY month LIMIT ?)
+        )
+    """, (guild_id, guild_id), batch_size, deleted, total, None)
+    await _delete_in_batches("""
+        DELETE FROM archive.archived_days WHERE guild_id = ? AND day <= (
+            SELECT MAX(day) FROM (SELECT day FROM archive.archived_days WHERE guild_id = ? ORDER BY day LIMIT ?)
+        )
+    """, (guild_id, guild_id), batch_size, deleted, total, None)
+
+    # Agrégat des sessions arrivées pendant la réinitialisation
+    async def rebuild(conn):
+        return await migrations.backfill_daily_rollup(conn, guild_id)
+
+    await pool.write(rebuild)
+    ranks.invalidate(guild_id)
+    querycache.invalidate(guild_id)
+    logger.warning(f"⚠️ Stats du serveur {guild_id} réinitialisées ({deleted} sessions supprimées)")
+    return deleted
+
+
+def _period_starts():
+    """Premiers jours (locaux) de la semaine et du mois en cours, au format de daily_rollup"""
+    today = datetime.now().date()
+    start_of_week = today - timedelta(days=today.weekday())
+    start_of_month = today.replace(day=1)
+    return start_of_week.isoformat(), start_of_month.isoformat()
 
 
 async def get_server_stats(guild_id: int):
-    """Récupérer les statistiques globales et calendaires du serveur"""
-    async with aiosqlite.connect(DB_PATH) as conn:
+    """Récupérer les statistiques globales et calendaires du serveur (calcul partagé, voir core/querycache.py)"""
+    return await querycache.get(guild_id, "server_stats", _server_stats, guild_id)
+
+
+async def _server_stats(guild_id: int):
+    async with pool.reader(analytics=True) as conn:
         # Stats globales
         async with conn.execute("""
             SELECT 
-                COUNT(DISTINCT user_id) as users,
+                COUNT(*) as users,
                 COALESCE(SUM(total_time), 0) as total_time,
                 COALESCE(AVG(total_time), 0) as avg_time
             FROM users WHERE guild_id = ?
         """, (guild_id,)) as cursor:
             stats = await cursor.fetchone()
 
-        now = datetime.now()
-        start_of_week = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        ts_week = int(start_of_week.timestamp())
-        ts_month = int(start_of_month.timestamp())
+        day_week, day_month = _period_starts()
 
-        async with conn.execute("SELECT COUNT(DISTINCT user_id) FROM sessions WHERE guild_id = ? AND start_timestamp >= ?", (guild_id, ts_week)) as cursor:
-            unique_users_week = (await cursor.fetchone())[0]
-            
-        async with conn.execute("SELECT COUNT(DISTINCT user_id) FROM sessions WHERE guild_id = ? AND start_timestamp >= ?", (guild_id, ts_month)) as cursor:
-            unique_users_month = (await cursor.fetchone())[0]
-            
-        async with conn.execute("SELECT COUNT(*) FROM sessions WHERE guild_id = ? AND start_timestamp >= ?", (guild_id, ts_week)) as cursor:
-            sessions_week = (await cursor.fetchone())[0]
-            
-        async with conn.execute("SELECT COUNT(*) FROM sessions WHERE guild_id = ? AND start_timestamp >= ?", (guild_id, ts_month)) as cursor:
-            sessions_month = (await cursor.fetchone())[0]
-            
-        async with conn.execute("SELECT COUNT(*) FROM sessions WHERE guild_id = ?", (guild_id,)) as cursor:
+        # Périodes lues dans daily_rollup : coût en jours x utilisateurs, pas en sessions
+        async with conn.execute("""
+            SELECT
+                COUNT(DISTINCT CASE WHEN day >= ? THEN user_id END),
+                COUNT(DISTINCT CASE WHEN day >= ? THEN user_id END),
+                COALESCE(SUM(CASE WHEN day >= ? THEN sessions END), 0),
+                COALESCE(SUM(CASE WHEN day >= ? THEN sessions END), 0)
+            FROM daily_rollup WHERE guild_id = ? AND day >= ?
+        """, (day_week, day_month, day_week, day_month, guild_id, min(day_week, day_month))) as cursor:
+            unique_users_week, unique_users_month, sessions_week, sessions_month = await cursor.fetchone()
+
+        async with conn.execute("""
+            SELECT
+                (SELECT COALESCE(SUM(sessions), 0) FROM daily_rollup WHERE guild_id = ?)
+                + (SELECT COALESCE(SUM(sessions), 0) FROM archive.monthly_rollup WHERE guild_id = ?)
+        """, (guild_id, guild_id)) as cursor:
             total_sessions = (await cursor.fetchone())[0]
 
         return {
@@ -935,20 +638,19 @@ async def get_server_stats(guild_id: int):
 
 
 async def get_leaderboards(guild_id: int):
-    """Récupérer les classements étendus"""
-    now = datetime.now()
-    start_of_week = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    ts_week = int(start_of_week.timestamp())
-    ts_month = int(start_of_month.timestamp())
-
-    async with aiosqlite.connect(DB_PATH) as conn:
+    """Récupérer les classements étendus (calcul partagé, voir core/querycache.py)"""
+    return await querycache.get(guild_id, "leaderboards", _leaderboards, guild_id)
+
+
+async def _leaderboards(guild_id: int):
+    day_week, day_month = _period_starts()
+
+    async with pool.reader(analytics=True) as conn:
         # Top temps global (travail + repos)
         async with conn.execute("""
-            SELECT user_id, (total_time + pause_time_A + pause_time_B) as total_global 
-            FROM users 
-            WHERE guild_id = ? AND (total_time + pause_time_A + pause_time_B) > 0
-            ORDER BY total_global DESC LIMIT 10
+            SELECT user_id, temps_total_global FROM users 
+            WHERE guild_id = ? AND temps_total_global > 0
+            ORDER BY temps_total_global DESC LIMIT 10
         """, (guild_id,)) as cursor:
             top_global = await cursor.fetchall()
 
@@ -962,40 +664,43 @@ async def get_leaderboards(guild_id: int):
             
         # Top repos (Le flemmard)
         async with conn.execute("""
-            SELECT user_id, (pause_time_A + pause_time_B) as repos 
-            FROM users 
-            WHERE guild_id = ? AND (pause_time_A + pause_time_B) > 0
-            ORDER BY repos DESC LIMIT 10
+            SELECT user_id, temps_repos FROM users 
+            WHERE guild_id = ? AND temps_repos > 0
+            ORDER BY temps_repos DESC LIMIT 10
         """, (guild_id,)) as cursor:
             top_rest = await cursor.fetchall()
 
         # Top semaine calendaire
         async with conn.execute("""
-            SELECT user_id, SUM(work_time) as work_week 
-            FROM sessions 
-            WHERE guild_id = ? AND start_timestamp >= ? 
+            SELECT user_id, SUM(work) as work_week 
+            FROM daily_rollup 
+            WHERE guild_id = ? AND day >= ? 
             GROUP BY user_id 
             ORDER BY work_week DESC LIMIT 10
-        """, (guild_id, ts_week)) as cursor:
+        """, (guild_id, day_week)) as cursor:
             top_week = await cursor.fetchall()
 
         # Top mois calendaire
         async with conn.execute("""
-            SELECT user_id, SUM(work_time) as work_month
-            FROM sessions 
-            WHERE guild_id = ? AND start_timestamp >= ? 
+            SELECT user_id, SUM(work) as work_month
+            FROM daily_rollup 
+            WHERE guild_id = ? AND day >= ? 
             GROUP BY user_id 
             ORDER BY work_month DESC LIMIT 10
-        """, (guild_id, ts_month)) as cursor:
+        """, (guild_id, day_month)) as cursor:
             top_month = await cursor.fetchall()
 
         # Top streaks
         async with conn.execute("""
-            SELECT user_id, streak_current, streak_best FROM users 
+            SELECT user_id, streak_current, streak_best, last_active_date FROM users 
             WHERE guild_id = ? AND streak_best > 0
             ORDER BY streak_best DESC LIMIT 10
         """, (guild_id,)) as cursor:
-            top_streak = await cursor.fetchall()
+            now = now_ts()
+            top_streak = [
+                (user_id, streaks.current_streak(current, last_active, now), best)
+                for user_id, current, best, last_active in await cursor.fetchall()
+            ]
 
         return {
             "🌎 Temps Total (Travail + Repos)": top_global,
@@ -1007,25 +712,33 @@ async def get_leaderboards(guild_id: int):
         }
 
 async def get_yearly_analytics(guild_id: int, year: int):
-    """Récupère les statistiques agrégées par mois pour une année spécifique."""
-    dt_start = datetime(year, 1, 1)
-    dt_end = datetime(year + 1, 1, 1) if year < 9999 else datetime(year, 12, 31, 23, 59, 59)
-    ts_start = int(dt_start.timestamp())
-    ts_end = int(dt_end.timestamp())
-    
-    async with aiosqlite.connect(DB_PATH) as conn:
+    """Récupère les statistiques agrégées par mois pour une année spécifique (calcul partagé)."""
+    return await querycache.get(guild_id, "yearly_analytics", _yearly_analytics, guild_id, year)
+
+
+async def _yearly_analytics(guild_id: int, year: int):
+    async with pool.reader(analytics=True) as conn:
+        # Les mois archivés viennent de archive.monthly_rollup, les autres de daily_rollup
         async with conn.execute("""
             SELECT 
-                CAST(strftime('%m', datetime(start_timestamp, 'unixepoch', 'localtime')) AS INTEGER) as month,
+                month,
                 COUNT(DISTINCT user_id) as unique_users,
-                COUNT(*) as total_sessions,
-                SUM(work_time) as total_work,
-                SUM(pause_time) as total_pause
-            FROM sessions
-            WHERE guild_id = ? AND start_timestamp >= ? AND start_timestamp < ?
+                SUM(sessions) as total_sessions,
+                SUM(work) as total_work,
+                SUM(pause) as total_pause
+            FROM (
+                SELECT CAST(substr(day, 6, 2) AS INTEGER) as month, user_id, sessions, work, pause
+                FROM daily_rollup
+                WHERE guild_id = ? AND day BETWEEN ? AND ?
+                UNION ALL
+                SELECT CAST(substr(month, 6, 2) AS INTEGER), user_id, sessions, work, pause
+                FROM archive.monthly_rollup
+                WHERE guild_id = ? AND month BETWEEN ? AND ?
+            )
             GROUP BY month
             ORDER BY month ASC
-        """, (guild_id, ts_start, ts_end)) as cursor:
+        """, (guild_id, f"{year:04d}-01-01", f"{year:04d}-12-31",
+              guild_id, f"{year:04d}-01", f"{year:04d}-12")) as cursor:
             rows = await cursor.fetchall()
             
     analytics = {m: {"users": 0, "sessions": 0, "work": 0, "pause": 0} for m in range(1, 13)}
@@ -1041,20 +754,204 @@ async def get_yearly_analytics(guild_id: int, year: int):
     return analytics
 
 
-# Fonctions sticky messages (existantes)
+# Export brut (pagination par clé : le reader est rendu entre deux pages)
+EXPORT_USER_COLUMNS = (
+    "user_id", "username", "join_date", "leave_date",
+    "total_time", "total_A", "total_B", "pause_time_A", "pause_time_B", "pause_time_other",
+    "sessions_count", "longest_session", "streak_current", "streak_best",
+    "first_session_date", "last_session_date", "last_active_date"
+)
+EXPORT_SESSION_COLUMNS = (
+    "id", "user_id", "mode", "work_time", "pause_time",
+    "start_timestamp", "end_timestamp", "day_of_week", "hour_of_day"
+)
+# Historique archivé : les sessions brutes n'existent plus, seuls les agrégats mensuels restent
+EXPORT_ARCHIVE_COLUMNS = ("month", "user_id", "mode", "work", "pause", "sessions")
+
+
+async def iter_users(guild_id: int, chunk_size: int = 1000):
+    """Parcourt les utilisateurs d'un serveur par pages de `chunk_size` (ordre user_id)"""
+    last_user = -1
+    while True:
+        async with pool.reader(analytics=True) as conn:
+            async with conn.execute(f"""
+                SELECT {", ".join(EXPORT_USER_COLUMNS)} FROM users
+                WHERE guild_id = ? AND user_id > ?
+                ORDER BY user_id LIMIT ?
+            """, (guild_id, last_user, chunk_size)) as cursor:
+                rows = await cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        last_user = rows[-1][0]
+
+
+async def iter_sessions(guild_id: int, chunk_size: int = 1000):
+    """Parcourt les sessions d'un serveur par pages de `chunk_size` (ordre chronologique)"""
+    last_key = (-1, -1)
+    while True:
+        async with pool.reader(analytics=True) as conn:
+            async with conn.execute(f"""
+                SELECT {", ".join(EXPORT_SESSION_COLUMNS)} FROM sessions
+                WHERE guild_id = ? AND (start_timestamp, id) > (?, ?)
+                ORDER BY start_timestamp, id LIMIT ?
+            """, (guild_id, *last_key, chunk_size)) as cursor:
+                rows = await cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        last_key = (rows[-1][5], rows[-1][0])
+
+
+async def iter_archive(guild_id: int, chunk_size: int = 1000):
+    """Parcourt les agrégats mensuels archivés d'un serveur par pages de `chunk_size` (ordre chronologique)"""
+    last_key = ("", -1, "")
+    while True:
+        async with pool.reader(analytics=True) as conn:
+            async with conn.execute(f"""
+                SELECT {", ".join(EXPORT_ARCHIVE_COLUMNS)} FROM archive.monthly_rollup
+                WHERE guild_id = ? AND (month, user_id, mode) > (?, ?, ?)
+                ORDER BY month, user_id, mode LIMIT ?
+            """, (guild_id, *last_key, chunk_size)) as cursor:
+                rows = await cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        last_key = rows[-1][:3]
+
+
+# Archivage des sessions froides
+_archive_lock = asyncio.Lock()
+
+
+def _archive_cutoff():
+    """Premier jour (local) du plus ancien mois gardé en base chaude"""
+    horizon = datetime.now().date() - timedelta(days=config.ARCHIVE_AFTER_DAYS)
+    return horizon.replace(day=1)
+
+
+async def _space(conn):
+    """(taille du fichier, octets des pages libres) de la base chaude"""
+    async with conn.execute("PRAGMA main.page_count") as cursor:
+        page_count = (await cursor.fetchone())[0]
+    async with conn.execute("PRAGMA main.freelist_count") as cursor:
+        freelist = (await cursor.fetchone())[0]
+    async with conn.execute("PRAGMA main.page_size") as cursor:
+        page_size = (await cursor.fetchone())[0]
+    return page_count * page_size, freelist * page_size
+
+
+async def archive_cold_data():
+    """
+    Déplace l'historique antérieur à ARCHIVE_AFTER_DAYS (arrondi au début du mois)
+    dans archive.db : daily_rollup est agrégé par utilisateur et par mois dans
+    archive.monthly_rollup, les lignes brutes de sessions sont supprimées.
+
+    Par (serveur, jour) : report dans l'archive, puis suppression en base chaude, en deux
+    écritures (deux fichiers ne se commitent pas atomiquement en WAL). Un crash entre les
+    deux laisse le jour dans les deux bases, compté deux fois jusqu'au passage suivant :
+    archive.archived_days marque les jours reportés, ce passage supprime alors les lignes
+    chaudes sans les reporter une seconde fois. Le writer reste disponible entre deux jours.
+    Retourne un bilan : jours, lignes agrégées, sessions supprimées, `freed` (octets de pages
+    libérées dans le fichier, réutilisées par les écritures suivantes) et `returned` (octets
+    rendus au disque : 0 tant que auto_vacuum n'est pas INCREMENTAL).
+    """
+    async with _archive_lock:
+        cutoff_day = _archive_cutoff().isoformat()
+        report = {"days": 0, "rows": 0, "sessions": 0, "freed": 0, "returned": 0}
+
+        async with pool.reader(analytics=True) as conn:
+            async with conn.execute("""
+                SELECT DISTINCT guild_id, day FROM daily_rollup WHERE day < ? ORDER BY guild_id, day
+            """, (cutoff_day,)) as cursor:
+                cold_days = await cursor.fetchall()
+
+        if not cold_days:
+            return report
+
+        size_before, free_before = await pool.write(_space)
+
+        for guild_id, day in cold_days:
+            day_start = datetime.fromisoformat(day)
+            ts_start = int(day_start.timestamp())
+            ts_end = int((day_start + timedelta(days=1)).timestamp())
+
+            async def copy(conn):
+                async with conn.execute("""
+                    INSERT INTO archive.archived_days (guild_id, day) VALUES (?, ?)
+                    ON CONFLICT DO NOTHING
+                """, (guild_id, day)) as cursor:
+                    if cursor.rowcount == 0:
+                        logger.warning(f"⚠️ Jour {day} du serveur {guild_id} déjà archivé : seules ses lignes chaudes sont supprimées")
+                        return 0
+                async with conn.execute("""
+                    INSERT INTO archive.monthly_rollup (guild_id, user_id, month, mode, work, pause, sessions)
+                    SELECT guild_id, user_id, substr(day, 1, 7), mode, work, pause, sessions
+                    FROM daily_rollup
+                    WHERE guild_id = ? AND day = ?
+                    ON CONFLICT(guild_id, month, user_id, mode) DO UPDATE SET
+                        work = work + excluded.work,
+                        pause = pause + excluded.pause,
+                        sessions = sessions + excluded.sessions
+                """, (guild_id, day)) as cursor:
+                    return cursor.rowcount
+
+            async def purge(conn):
+                await conn.execute("DELETE FROM daily_rollup WHERE guild_id = ? AND day = ?", (guild_id, day))
+                async with conn.execute("""
+                    DELETE FROM sessions WHERE guild_id = ? AND start_timestamp >= ? AND start_timestamp < ?
+                """, (guild_id, ts_start, ts_end)) as cursor:
+                    return cursor.rowcount
+
+            # Report dans l'archive commité avant la suppression : un crash entre les deux
+            # laisse le jour en double (rattrapé au passage suivant), jamais perdu
+            rows = await pool.write(copy)
+            sessions = await pool.write(purge)
+            report["days"] += 1
+            report["rows"] += rows
+            report["sessions"] += sessions
+
+        if report["days"]:
+            querycache.invalidate()
+
+        # Pages rendues au système si auto_vacuum = INCREMENTAL (sans effet sinon), puis mesure
+        async def reclaim(conn):
+            async with conn.execute("PRAGMA main.incremental_vacuum") as cursor:
+                await cursor.fetchall()
+            return await _space(conn)
+
+        size_after, free_after = await pool.write(reclaim)
+        report["returned"] = max(0, size_before - size_after)
+        report["freed"] = max(0, free_after - free_before) + report["returned"]
+        logger.info(
+            f"✅ Archivage avant le {cutoff_day} : {report['days']} jour(s), "
+            f"{report['sessions']} sessions supprimées, {report['freed']} octets de pages libérées, "
+            f"{report['returned']} octets rendus au disque"
+        )
+        return report
+
+
+# Fonctions sticky messages (registre mémoire write-through, voir core/stickies.py)
+async def _load_stickies(conn):
+    async with conn.execute("""
+        SELECT channel_id, message_id, content, author_id FROM sticky_messages
+        ORDER BY guild_id
+    """) as cursor:
+        return await cursor.fetchall()
+
+
 async def get_sticky(guild_id: int, channel_id: int):
-    """Récupérer un sticky message"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT message_id, content, author_id FROM sticky_messages
-            WHERE guild_id = ? AND channel_id = ?
-        """, (guild_id, channel_id)) as cursor:
-            return await cursor.fetchone()
+    """Récupérer un sticky message (depuis le registre, sans I/O)"""
+    return stickies.get(channel_id)
 
 
 async def set_sticky(guild_id: int, channel_id: int, message_id: int, content: str, author_id: int = None):
     """Définir ou mettre à jour un sticky message"""
-    async with aiosqlite.connect(DB_PATH) as conn:
+    async def op(conn):
+        # Reprend la ligne héritée d'init_db.sql (guild_id = 0) : une seule ligne par salon
+        await conn.execute("""
+            DELETE FROM sticky_messages WHERE channel_id = ? AND guild_id <> ?
+        """, (channel_id, guild_id))
         await conn.execute("""
             INSERT INTO sticky_messages (guild_id, channel_id, message_id, content, author_id)
             VALUES (?, ?, ?, ?, ?)
@@ -1063,484 +960,116 @@ async def set_sticky(guild_id: int, channel_id: int, message_id: int, content: s
                 content = excluded.content,
                 author_id = excluded.author_id
         """, (guild_id, channel_id, message_id, content, author_id))
-        await conn.commit()
+
+    await pool.write(op)
+    stickies.update(channel_id, message_id, content, author_id)
 
 
 async def remove_sticky(guild_id: int, channel_id: int):
     """Supprimer un sticky message"""
-    async with aiosqlite.connect(DB_PATH) as conn:
+    async def op(conn):
         await conn.execute("""
             DELETE FROM sticky_messages 
-            WHERE guild_id = ? AND channel_id = ?
+            WHERE guild_id IN (?, 0) AND channel_id = ?
         """, (guild_id, channel_id))
-        await conn.commit()
-
-
-# Fonctions maintenance (existantes)
-async def is_maintenance_active(guild_id: int):
-    """Vérifier si le mode maintenance est actif"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT is_active FROM maintenance WHERE guild_id = ?
-        """, (guild_id,)) as cursor:
-            row = await cursor.fetchone()
-            return bool(row[0]) if row else False
-
-
-async def toggle_maintenance(guild_id: int):
-    """Activer/désactiver le mode maintenance"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT is_active FROM maintenance WHERE guild_id = ?
-        """, (guild_id,)) as cursor:
-            row = await cursor.fetchone()
-
-        new_state = 0 if (row and row[0]) else 1
-
-        await conn.execute("""
-            INSERT INTO maintenance (guild_id, is_active) VALUES (?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET is_active = excluded.is_active
-        """, (guild_id, new_state))
-        await conn.commit()
-
-        return bool(new_state)
-# ==========================
-# LRE-BOT/src/core/db.py
-# ==========================
-import aiosqlite
-import time
-from pathlib import Path
-from datetime import datetime, timedelta
-from . import config
-import logging
-
-logger = logging.getLogger('LRE-BOT.db')
-
-DB_PATH = config.DB_PATH
-
-def now_ts():
-    """Retourne le timestamp actuel (entier)"""
-    return int(time.time())
-
-
-async def init_db():
-    """Initialise la base de données avec toutes les tables"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        # --- VERIFICATION MIGRATION ---
-        async with conn.execute("PRAGMA table_info(users)") as cursor:
-            columns = await cursor.fetchall()
-        
-        column_names = [col[1] for col in columns]
-        needs_migration = bool(column_names and "guild_id" not in column_names)
-
-        if needs_migration:
-            logger.info("⏳ Migration de la table 'users' vers le nouveau format...")
-            await conn.execute("ALTER TABLE users RENAME TO users_old")
-            
-        # Table users (existante avec nouvelles colonnes)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER NOT NULL,
-                guild_id INTEGER NOT NULL,
-                username TEXT,
-                join_date INTEGER,
-                leave_date INTEGER,
-                total_time INTEGER DEFAULT 0,
-                total_A INTEGER DEFAULT 0,
-                total_B INTEGER DEFAULT 0,
-                sessions_count INTEGER DEFAULT 0,
-                streak_current INTEGER DEFAULT 0,
-                streak_best INTEGER DEFAULT 0,
-                last_active_date INTEGER,
-                first_session INTEGER,
-                first_session_date INTEGER,
-                last_session_date INTEGER,
-                pause_time_A INTEGER DEFAULT 0,
-                pause_time_B INTEGER DEFAULT 0,
-                longest_session INTEGER DEFAULT 0,
-                best_week_number INTEGER,
-                best_week_time INTEGER DEFAULT 0,
-                PRIMARY KEY (user_id, guild_id)
-            )
-        """)
-
-        if needs_migration:
-            await conn.execute("""
-                INSERT INTO users (
-                    user_id, guild_id, username, join_date, leave_date,
-                    total_time, total_A, total_B, pause_time_A, pause_time_B,
-                    sessions_count, streak_current, streak_best,
-                    first_session, last_session_date
-                )
-                SELECT 
-                    user_id, 0, username, join_date, leave_date,
-                    total_time, total_A, total_B, pause_A, pause_B,
-                    sessions_count, streak_current, streak_best,
-                    first_session, last_session
-                FROM users_old
-            """)
-            await conn.execute("DROP TABLE users_old")
-
-        # Table sessions (nouvelle)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                guild_id INTEGER NOT NULL,
-                mode TEXT NOT NULL CHECK(mode IN ('A', 'B')),
-                work_time INTEGER NOT NULL,
-                pause_time INTEGER NOT NULL,
-                start_timestamp INTEGER NOT NULL,
-                end_timestamp INTEGER NOT NULL,
-                day_of_week INTEGER NOT NULL CHECK(day_of_week BETWEEN 0 AND 6),
-                hour_of_day INTEGER NOT NULL CHECK(hour_of_day BETWEEN 0 AND 23)
-            )
-        """)
-
-        # Table participants (existante)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS participants (
-                guild_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                join_ts INTEGER NOT NULL,
-                mode TEXT NOT NULL,
-                validated INTEGER DEFAULT 0,
-                cycles_completed INTEGER DEFAULT 0,
-                PRIMARY KEY (guild_id, user_id)
-            )
-        """)
-
-        # Migration pour ajouter cycles_completed sur base existante
-        try:
-            await conn.execute("ALTER TABLE participants ADD COLUMN cycles_completed INTEGER DEFAULT 0")
-        except aiosqlite.OperationalError:
-            pass
-
-        # Table sticky_messages (existante)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS sticky_messages (
-                guild_id INTEGER NOT NULL,
-                channel_id INTEGER NOT NULL,
-                message_id INTEGER NOT NULL,
-                content TEXT NOT NULL,
-                author_id INTEGER,
-                PRIMARY KEY (guild_id, channel_id)
-            )
-        """)
-
-        # Table maintenance (existante)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS maintenance (
-                guild_id INTEGER PRIMARY KEY,
-                is_active INTEGER DEFAULT 0
-            )
-        """)
-
-        # Index pour optimiser les requêtes
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id, guild_id)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions(start_timestamp)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_day ON sessions(day_of_week)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_hour ON sessions(hour_of_day)")
-
-        await conn.commit()
-        logger.info("✅ Base de données SQLite initialisée et synchronisée avec succès.")
-
-
-async def upsert_user(user_id: int, username: str, join_date: int, guild_id: int = 0):
-    """Créer ou mettre à jour un utilisateur"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        await conn.execute("""
-            INSERT INTO users (user_id, guild_id, username, join_date)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(user_id, guild_id) DO UPDATE SET
-                username = excluded.username
-        """, (user_id, guild_id, username, join_date))
-        await conn.commit()
-
-
-async def get_user(user_id: int, guild_id: int):
-    """Récupérer les infos d'un utilisateur"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        conn.row_factory = aiosqlite.Row
-        async with conn.execute("""
-            SELECT * FROM users WHERE user_id = ? AND guild_id = ?
-        """, (user_id, guild_id)) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
-
-
-async def add_participant(guild_id: int, user_id: int, mode: str):
-    """Ajouter un participant à une session"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        try:
-            await conn.execute("""
-                INSERT INTO participants (guild_id, user_id, join_ts, mode)
-                VALUES (?, ?, ?, ?)
-            """, (guild_id, user_id, now_ts(), mode))
-            await conn.commit()
-            return True
-        except aiosqlite.IntegrityError:
-            return False
-
 
-async def remove_participant(guild_id: int, user_id: int):
-    """Retirer un participant et retourner son temps de session"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT join_ts, mode FROM participants
-            WHERE guild_id = ? AND user_id = ?
-        """, (guild_id, user_id)) as cursor:
-            row = await cursor.fetchone()
+    await pool.write(op)
+    stickies.remove(channel_id)
 
-        if row:
-            await conn.execute("""
-                DELETE FROM participants WHERE guild_id = ? AND user_id = ?
-            """, (guild_id, user_id))
-            await conn.commit()
-            return row
-        return (None, None)
 
+# Réglages par serveur (cache write-through, voir core/settings.py)
+def get_setting(guild_id: int, key: str):
+    """Lire un réglage du serveur depuis le cache mémoire (aucune I/O)"""
+    return settings.get(guild_id, key)
 
-async def get_active_session(guild_id: int, user_id: int):
-    """Récupérer la session active d'un utilisateur"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT join_ts, mode FROM participants
-            WHERE guild_id = ? AND user_id = ?
-        """, (guild_id, user_id)) as cursor:
-            return await cursor.fetchone()
 
+async def set_setting(guild_id: int, key: str, value):
+    """Enregistrer un réglage du serveur, puis mettre à jour le cache une fois commité"""
+    value = settings.coerce(key, value)
 
-async def update_participant_state(guild_id: int, user_id: int, validated: int = None, increment_cycles: bool = False):
-    """Met à jour l'état de validation et/ou incrémente les cycles complétés d'un participant"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        if validated is not None and increment_cycles:
-            await conn.execute("""
-                UPDATE participants 
-                SET validated = ?, cycles_completed = cycles_completed + 1
-                WHERE guild_id = ? AND user_id = ?
-            """, (validated, guild_id, user_id))
-        elif validated is not None:
+    async def op(conn):
+        if key == "maintenance":
             await conn.execute("""
-                UPDATE participants 
-                SET validated = ?
-                WHERE guild_id = ? AND user_id = ?
-            """, (validated, guild_id, user_id))
-        elif increment_cycles:
-            await conn.execute("""
-                UPDATE participants 
-                SET cycles_completed = cycles_completed + 1
-                WHERE guild_id = ? AND user_id = ?
-            """, (guild_id, user_id))
-        await conn.commit()
-
-
-async def ajouter_temps(user_id: int, guild_id: int, temps_sec: int, mode: str, is_session_end: bool = False):
-    """
-    Ajouter du temps de travail à un utilisateur
-    Si is_session_end=True, on enregistre aussi la session détaillée
-    """
-    async with aiosqlite.connect(DB_PATH) as conn:
-        # Récupérer les stats actuelles
-        async with conn.execute("""
-            SELECT total_time, total_A, total_B, sessions_count, longest_session, 
-                   first_session_date, last_active_date
-            FROM users WHERE user_id = ? AND guild_id = ?
-        """, (user_id, guild_id)) as cursor:
-            user = await cursor.fetchone()
-
-        now = now_ts()
-        
-        # Calculer le nouveau total
-        if user:
-            total_time = user[0] + temps_sec
-            total_A = user[1] + (temps_sec if mode == 'A' else 0)
-            total_B = user[2] + (temps_sec if mode == 'B' else 0)
-            sessions_count = user[3] + (1 if is_session_end else 0)
-            longest_session = max(user[4] or 0, temps_sec) if is_session_end else user[4]
-            first_session_date = user[5] or now
-            last_session_date = now if is_session_end else user[6]
+                INSERT INTO maintenance (guild_id, is_active) VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET is_active = excluded.is_active
+            """, (guild_id, int(value)))
         else:
-            total_time = temps_sec
-            total_A = temps_sec if mode == 'A' else 0
-            total_B = temps_sec if mode == 'B' else 0
-            sessions_count = 1 if is_session_end else 0
-            longest_session = temps_sec if is_session_end else 0
-            first_session_date = now
-            last_session_date = now if is_session_end else None
-
-        # Mettre à jour l'utilisateur
-        await conn.execute("""
-            INSERT INTO users (
-                user_id, guild_id, total_time, total_A, total_B, 
-                sessions_count, longest_session, first_session_date, 
-                last_session_date, last_active_date
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(user_id, guild_id) DO UPDATE SET
-                total_time = excluded.total_time,
-                total_A = excluded.total_A,
-                total_B = excluded.total_B,
-                sessions_count = excluded.sessions_count,
-                longest_session = excluded.longest_session,
-                first_session_date = COALESCE(users.first_session_date, excluded.first_session_date),
-                last_session_date = excluded.last_session_date,
-                last_active_date = excluded.last_active_date
-        """, (user_id, guild_id, total_time, total_A, total_B, sessions_count, 
-              longest_session, first_session_date, last_session_date, now))
-
-        await conn.commit()
-
-
-async def record_session(user_id: int, guild_id: int, mode: str, work_time: int, 
-                        pause_time: int, start_ts: int, end_ts: int):
-    """Enregistrer une session détaillée dans l'historique"""
-    dt = datetime.fromtimestamp(start_ts)
-    day_of_week = dt.weekday()  # 0=Lundi, 6=Dimanche
-    hour_of_day = dt.hour
-
-    async with aiosqlite.connect(DB_PATH) as conn:
-        await conn.execute("""
-            INSERT INTO sessions (
-                user_id, guild_id, mode, work_time, pause_time,
-                start_timestamp, end_timestamp, day_of_week, hour_of_day
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (user_id, guild_id, mode, work_time, pause_time, 
-              start_ts, end_ts, day_of_week, hour_of_day))
-        
-        # Mettre à jour le temps de pause
-        pause_column = f"pause_time_{mode}"
-        await conn.execute(f"""
-            UPDATE users 
-            SET {pause_column} = {pause_column} + ?
-            WHERE user_id = ? AND guild_id = ?
-        """, (pause_time, user_id, guild_id))
-        
-        await conn.commit()
-
-
-async def get_server_stats(guild_id: int):
-    """Récupérer les statistiques du serveur"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        # Stats globales
-        async with conn.execute("""
-            SELECT 
-                COUNT(DISTINCT user_id) as users,
-                COALESCE(SUM(total_time), 0) as total_time,
-                COALESCE(AVG(total_time), 0) as avg_time
-            FROM users WHERE guild_id = ?
-        """, (guild_id,)) as cursor:
-            stats = await cursor.fetchone()
+            await conn.execute("""
+                INSERT INTO guild_settings (guild_id, key, value) VALUES (?, ?, ?)
+                ON CONFLICT(guild_id, key) DO UPDATE SET value = excluded.value
+            """, (guild_id, key, None if value is None else str(value)))
 
-        # Sessions 7 derniers jours
-        seven_days_ago = now_ts() - (7 * 24 * 3600)
-        async with conn.execute("""
-            SELECT COUNT(*) FROM sessions 
-            WHERE guild_id = ? AND end_timestamp >= ?
-        """, (guild_id, seven_days_ago)) as cursor:
-            last_7_days = (await cursor.fetchone())[0]
+    await pool.write(op)
+    settings.update(guild_id, key, value)
 
-        # Sessions 4 dernières semaines
-        four_weeks_ago = now_ts() - (28 * 24 * 3600)
-        async with conn.execute("""
-            SELECT COUNT(*) FROM sessions 
-            WHERE guild_id = ? AND end_timestamp >= ?
-        """, (guild_id, four_weeks_ago)) as cursor:
-            last_4_weeks = (await cursor.fetchone())[0]
 
-        return {
-            "users": stats[0],
-            "total_time": stats[1],
-            "avg_time": int(stats[2]),
-            "last_7_days": last_7_days,
-            "last_4_weeks": last_4_weeks
-        }
+# Modes Pomodoro par serveur (plannings compilés en mémoire, voir core/modes.py)
+async def _load_modes(conn):
+    async with conn.execute("""
+        SELECT guild_id, mode, work, pause, grace, long_pause, long_every, bonus FROM guild_modes
+    """) as cursor:
+        return await cursor.fetchall()
 
 
-async def get_leaderboards(guild_id: int):
-    """Récupérer les classements"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        # Top temps total
-        async with conn.execute("""
-            SELECT user_id, total_time FROM users 
-            WHERE guild_id = ? AND total_time > 0
-            ORDER BY total_time DESC LIMIT 10
-        """, (guild_id,)) as cursor:
-            top_time = await cursor.fetchall()
+def get_mode(guild_id: int, name: str):
+    """Planning compilé d'un mode du serveur, ou None (aucune I/O)"""
+    return modes.get(guild_id, name)
 
-        # Top streaks
-        async with conn.execute("""
-            SELECT user_id, streak_current, streak_best FROM users 
-            WHERE guild_id = ? AND streak_best > 0
-            ORDER BY streak_best DESC LIMIT 10
-        """, (guild_id,)) as cursor:
-            top_streak = await cursor.fetchall()
 
-        return {
-            "⏱ Temps total": top_time,
-            "🔥 Meilleurs streaks": top_streak
-        }
+def mode_in_use(guild_id: int, name: str):
+    """Nombre de participants du serveur actuellement dans ce mode"""
+    return sum(1 for p in participants.guild(guild_id).values() if p.mode == name)
 
 
-# Fonctions sticky messages (existantes)
-async def get_sticky(guild_id: int, channel_id: int):
-    """Récupérer un sticky message"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT message_id, content, author_id FROM sticky_messages
-            WHERE guild_id = ? AND channel_id = ?
-        """, (guild_id, channel_id)) as cursor:
-            return await cursor.fetchone()
-
-
-async def set_sticky(guild_id: int, channel_id: int, message_id: int, content: str, author_id: int = None):
-    """Définir ou mettre à jour un sticky message"""
-    async with aiosqlite.connect(DB_PATH) as conn:
+async def set_mode(guild_id: int, schedule: cycles.Schedule):
+    """Définir ou remplacer un mode du serveur, puis mettre à jour le cache une fois commité"""
+    async def op(conn):
         await conn.execute("""
-            INSERT INTO sticky_messages (guild_id, channel_id, message_id, content, author_id)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(guild_id, channel_id) DO UPDATE SET
-                message_id = excluded.message_id,
-                content = excluded.content,
-                author_id = excluded.author_id
-        """, (guild_id, channel_id, message_id, content, author_id))
-        await conn.commit()
+            INSERT INTO guild_modes (guild_id, mode, work, pause, grace, long_pause, long_every, bonus)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, mode) DO UPDATE SET
+                work = excluded.work,
+                pause = excluded.pause,
+                grace = excluded.grace,
+                long_pause = excluded.long_pause,
+                long_every = excluded.long_every,
+                bonus = excluded.bonus
+        """, (guild_id, schedule.name, schedule.work, schedule.pause, schedule.grace,
+              schedule.long_pause, schedule.long_every, modes.encode_bonus(schedule.bonus)))
+
+    await pool.write(op)
+    modes.update(guild_id, schedule)
+
+
+async def remove_mode(guild_id: int, name: str):
+    """Supprimer un mode du serveur ; retourne False s'il n'était pas défini"""
+    async def op(conn):
+        async with conn.execute("DELETE FROM guild_modes WHERE guild_id = ? AND mode = ?", (guild_id, name)) as cursor:
+            return cursor.rowcount > 0
+
+    removed = await pool.write(op)
+    modes.remove(guild_id, name)
+    return removed
+
+
+# Fonctions maintenance
+async def is_maintenance_active(guild_id: int):
+    """Vérifier si le mode maintenance est actif"""
+    return settings.get(guild_id, "maintenance")
 
 
-async def remove_sticky(guild_id: int, channel_id: int):
-    """Supprimer un sticky message"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        await conn.execute("""
-            DELETE FROM sticky_messages 
-            WHERE guild_id = ? AND channel_id = ?
-        """, (guild_id, channel_id))
-        await conn.commit()
+async def get_maintenance(guild_id: int):
+    """État du mode maintenance du serveur"""
+    return settings.get(guild_id, "maintenance")
 
 
-# Fonctions maintenance (existantes)
-async def is_maintenance_active(guild_id: int):
-    """Vérifier si le mode maintenance est actif"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT is_active FROM maintenance WHERE guild_id = ?
-        """, (guild_id,)) as cursor:
-            row = await cursor.fetchone()
-            return bool(row[0]) if row else False
+async def set_maintenance(guild_id: int, enabled: bool):
+    """Activer ou désactiver le mode maintenance"""
+    await set_setting(guild_id, "maintenance", bool(enabled))
 
 
 async def toggle_maintenance(guild_id: int):
     """Activer/désactiver le mode maintenance"""
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("""
-            SELECT is_active FROM maintenance WHERE guild_id = ?
-        """, (guild_id,)) as cursor:
-            row = await cursor.fetchone()
-
-        new_state = 0 if (row and row[0]) else 1
-
-        await conn.execute("""
-            INSERT INTO maintenance (guild_id, is_active) VALUES (?, ?)
-            ON CONFLICT(guild_id) DO UPDATE SET is_active = excluded.is_active
-        """, (guild_id, new_state))
-        await conn.commit()
-
-        return bool(new_state)
+    enabled = not settings.get(guild_id, "maintenance")
+    await set_maintenance(guild_id, enabled)
+    return enabled
@@ -0,0 +1,434 @@
+# ==========================
+# LRE-BOT/src/core/migrations.py
+# ==========================
+from . import streaks
+import logging
+
+logger = logging.getLogger('LRE-BOT.migrations')
+
+
+async def _table_exists(conn, name: str):
+    async with conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)) as cursor:
+        return await cursor.fetchone() is not None
+
+
+async def _archive_table_exists(conn, name: str):
+    """Table présente dans la base d'archive attachée (créée par init_archive, après les migrations)"""
+    async with conn.execute("SELECT 1 FROM archive.sqlite_master WHERE type = 'table' AND name = ?", (name,)) as cursor:
+        return await cursor.fetchone() is not None
+
+
+async def _columns(conn, table: str):
+    async with conn.execute(f"PRAGMA table_info({table})") as cursor:
+        return [col[1] for col in await cursor.fetchall()]
+
+
+async def _m001_schema_initial(conn):
+    """Schéma de base (users par serveur, sessions, participants, sticky, maintenance)"""
+    # Ancienne table users sans guild_id (init_db.sql)
+    column_names = await _columns(conn, "users")
+    legacy_users = bool(column_names and "guild_id" not in column_names)
+
+    if legacy_users:
+        logger.info("⏳ Migration de la table 'users' vers le nouveau format...")
+        await conn.execute("ALTER TABLE users RENAME TO users_old")
+
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            username TEXT,
+            join_date INTEGER,
+            leave_date INTEGER,
+            total_time INTEGER DEFAULT 0,
+            total_A INTEGER DEFAULT 0,
+            total_B INTEGER DEFAULT 0,
+            sessions_count INTEGER DEFAULT 0,
+            streak_current INTEGER DEFAULT 0,
+            streak_best INTEGER DEFAULT 0,
+            last_active_date INTEGER,
+            first_session INTEGER,
+            first_session_date INTEGER,
+            last_session_date INTEGER,
+            pause_time_A INTEGER DEFAULT 0,
+            pause_time_B INTEGER DEFAULT 0,
+            longest_session INTEGER DEFAULT 0,
+            best_week_number INTEGER,
+            best_week_time INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, guild_id)
+        )
+    """)
+
+    if legacy_users:
+        await conn.execute("""
+            INSERT INTO users (
+                user_id, guild_id, username, join_date, leave_date,
+                total_time, total_A, total_B, pause_time_A, pause_time_B,
+                sessions_count, streak_current, streak_best,
+                first_session, last_session_date
+            )
+            SELECT
+                user_id, 0, username, join_date, leave_date,
+                total_time, total_A, total_B, pause_A, pause_B,
+                sessions_count, streak_current, streak_best,
+                first_session, last_session
+            FROM users_old
+        """)
+        await conn.execute("DROP TABLE users_old")
+
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            mode TEXT NOT NULL CHECK(mode IN ('A', 'B')),
+            work_time INTEGER NOT NULL,
+            pause_time INTEGER NOT NULL,
+            start_timestamp INTEGER NOT NULL,
+            end_timestamp INTEGER NOT NULL,
+            day_of_week INTEGER NOT NULL CHECK(day_of_week BETWEEN 0 AND 6),
+            hour_of_day INTEGER NOT NULL CHECK(hour_of_day BETWEEN 0 AND 23)
+        )
+    """)
+
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS participants (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            join_ts INTEGER NOT NULL,
+            mode TEXT NOT NULL,
+            validated INTEGER DEFAULT 0,
+            cycles_completed INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        )
+    """)
+
+    # Table participants créée par init_db.sql : pas de cycles_completed
+    if "cycles_completed" not in await _columns(conn, "participants"):
+        await conn.execute("ALTER TABLE participants ADD COLUMN cycles_completed INTEGER DEFAULT 0")
+
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS sticky_messages (
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            author_id INTEGER,
+            PRIMARY KEY (guild_id, channel_id)
+        )
+    """)
+
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance (
+            guild_id INTEGER PRIMARY KEY,
+            is_active INTEGER DEFAULT 0
+        )
+    """)
+
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id, guild_id)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions(start_timestamp)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_cycle ON sessions(guild_id, user_id, start_timestamp)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_day ON sessions(day_of_week)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_hour ON sessions(hour_of_day)")
+
+
+async def _m002_legacy_init_db_sql(conn):
+    """Reprise des tables héritées de init_db.sql (session_logs, stickies, presence_checks)"""
+    # session_logs -> sessions : seules les sessions terminées sont reprises, comptées en travail
+    if await _table_exists(conn, "session_logs"):
+        await conn.execute("""
+            INSERT INTO sessions (
+                user_id, guild_id, mode, work_time, pause_time,
+                start_timestamp, end_timestamp, day_of_week, hour_of_day
+            )
+            SELECT
+                user_id, guild_id, mode, end_ts - start_ts, 0,
+                start_ts, end_ts,
+                (CAST(strftime('%w', start_ts, 'unixepoch', 'localtime') AS INTEGER) + 6) % 7,
+                CAST(strftime('%H', start_ts, 'unixepoch', 'localtime') AS INTEGER)
+            FROM session_logs
+            WHERE end_ts IS NOT NULL AND end_ts >= start_ts AND mode IN ('A', 'B')
+        """)
+        await conn.execute("DROP TABLE session_logs")
+
+    # stickies -> sticky_messages : l'ancien schéma ne connaissait pas le serveur (guild_id = 0)
+    if await _table_exists(conn, "stickies"):
+        await conn.execute("""
+            INSERT OR IGNORE INTO sticky_messages (guild_id, channel_id, message_id, content, author_id)
+            SELECT 0, channel_id, message_id, text, requested_by
+            FROM stickies
+            WHERE message_id IS NOT NULL AND text IS NOT NULL
+        """)
+        await conn.execute("DROP TABLE stickies")
+
+    # presence_checks : état transitoire remplacé par participants.validated
+    await conn.execute("DROP TABLE IF EXISTS presence_checks")
+
+
+async def _m003_leaderboard_indexes(conn):
+    """Totaux composites en colonnes générées + index couvrants des classements et stats"""
+    # ALTER TABLE n'accepte que des colonnes générées VIRTUAL ; l'index matérialise la valeur
+    await conn.execute("""
+        ALTER TABLE users ADD COLUMN temps_total_global INTEGER
+        GENERATED ALWAYS AS (total_time + pause_time_A + pause_time_B) VIRTUAL
+    """)
+    await conn.execute("""
+        ALTER TABLE users ADD COLUMN temps_repos INTEGER
+        GENERATED ALWAYS AS (pause_time_A + pause_time_B) VIRTUAL
+    """)
+
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_users_guild_total ON users(guild_id, temps_total_global DESC, user_id)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_users_guild_work ON users(guild_id, total_time DESC, user_id)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_users_guild_rest ON users(guild_id, temps_repos DESC, user_id)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_users_guild_streak ON users(guild_id, streak_best DESC, user_id, streak_current)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_guild_period ON sessions(guild_id, start_timestamp, user_id, work_time)")
+
+
+async def _m004_daily_rollup(conn):
+    """Agrégat journalier des sessions (jour local du début de session), rempli depuis l'historique"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            work INTEGER NOT NULL DEFAULT 0,
+            pause INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, day, user_id, mode)
+        ) WITHOUT ROWID
+    """)
+    await backfill_daily_rollup(conn)
+
+
+async def backfill_daily_rollup(conn, guild_id: int = None):
+    """
+    Reconstruit daily_rollup depuis sessions (tous les serveurs, ou un seul).
+    Retourne le nombre de lignes (jour, utilisateur, mode) écrites.
+    """
+    where, params = ("WHERE guild_id = ?", (guild_id,)) if guild_id is not None else ("", ())
+    await conn.execute(f"DELETE FROM daily_rollup {where}", params)
+    async with conn.execute(f"""
+        INSERT INTO daily_rollup (guild_id, user_id, day, mode, work, pause, sessions)
+        SELECT guild_id, user_id, date(start_timestamp, 'unixepoch', 'localtime'), mode,
+               SUM(work_time), SUM(pause_time), COUNT(*)
+        FROM sessions
+        {where}
+        GROUP BY guild_id, user_id, date(start_timestamp, 'unixepoch', 'localtime'), mode
+    """, params) as cursor:
+        return cursor.rowcount
+
+
+async def _m005_streaks(conn):
+    """Calcul initial des streaks depuis l'historique des sessions"""
+    async with conn.execute(streaks.REPLAY_SQL.format(where="")) as cursor:
+        rows = [row async for row in streaks.replay(cursor)]
+    await conn.executemany(streaks.UPDATE_SQL, rows)
+
+
+async def _m006_guild_settings(conn):
+    """Réglages par serveur (clé / valeur), la maintenance garde sa table"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (guild_id, key)
+        ) WITHOUT ROWID
+    """)
+
+
+async def _m007_guild_modes(conn):
+    """Modes Pomodoro par serveur ; sessions.mode n'est plus limité à A/B (table reconstruite)"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS guild_modes (
+            guild_id INTEGER NOT NULL,
+            mode TEXT NOT NULL,
+            work INTEGER NOT NULL,
+            pause INTEGER NOT NULL,
+            grace INTEGER NOT NULL,
+            long_pause INTEGER NOT NULL DEFAULT 0,
+            long_every INTEGER NOT NULL DEFAULT 0,
+            bonus TEXT,
+            PRIMARY KEY (guild_id, mode)
+        ) WITHOUT ROWID
+    """)
+
+    # SQLite ne sait pas retirer une contrainte CHECK : copie vers une nouvelle table
+    async with conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'sessions'") as cursor:
+        sequence = await cursor.fetchone()
+
+    await conn.execute("""
+        CREATE TABLE sessions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            mode TEXT NOT NULL,
+            work_time INTEGER NOT NULL,
+            pause_time INTEGER NOT NULL,
+            start_timestamp INTEGER NOT NULL,
+            end_timestamp INTEGER NOT NULL,
+            day_of_week INTEGER NOT NULL CHECK(day_of_week BETWEEN 0 AND 6),
+            hour_of_day INTEGER NOT NULL CHECK(hour_of_day BETWEEN 0 AND 23)
+        )
+    """)
+    await conn.execute("""
+        INSERT INTO sessions_new (
+            id, user_id, guild_id, mode, work_time, pause_time,
+            start_timestamp, end_timestamp, day_of_week, hour_of_day
+        )
+        SELECT id, user_id, guild_id, mode, work_time, pause_time,
+               start_timestamp, end_timestamp, day_of_week, hour_of_day
+        FROM sessions
+    """)
+    await conn.execute("DROP TABLE sessions")
+    await conn.execute("ALTER TABLE sessions_new RENAME TO sessions")
+    if sequence:
+        # Les id supprimés (clear_stats, archivage) ne doivent pas être réattribués
+        await conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'sessions'", (sequence[0],))
+
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id, guild_id)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions(start_timestamp)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_cycle ON sessions(guild_id, user_id, start_timestamp)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_day ON sessions(day_of_week)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_hour ON sessions(hour_of_day)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_guild_period ON sessions(guild_id, start_timestamp, user_id, work_time)")
+
+
+async def _m008_pause_other_modes(conn):
+    """Pause des modes personnalisés (pause_time_other), comptée dans temps_repos et temps_total_global"""
+    await conn.execute("ALTER TABLE users ADD COLUMN pause_time_other INTEGER DEFAULT 0")
+
+    # Une colonne générée ne se redéfinit pas : index, colonnes, puis les deux recréés
+    await conn.execute("DROP INDEX IF EXISTS idx_users_guild_total")
+    await conn.execute("DROP INDEX IF EXISTS idx_users_guild_rest")
+    await conn.execute("ALTER TABLE users DROP COLUMN temps_total_global")
+    await conn.execute("ALTER TABLE users DROP COLUMN temps_repos")
+    await conn.execute("""
+        ALTER TABLE users ADD COLUMN temps_total_global INTEGER
+        GENERATED ALWAYS AS (total_time + pause_time_A + pause_time_B + pause_time_other) VIRTUAL
+    """)
+    await conn.execute("""
+        ALTER TABLE users ADD COLUMN temps_repos INTEGER
+        GENERATED ALWAYS AS (pause_time_A + pause_time_B + pause_time_other) VIRTUAL
+    """)
+
+    # Pause déjà enregistrée hors A/B : sessions en base chaude + agrégats archivés
+    sources = ["SELECT guild_id, user_id, pause_time AS pause FROM sessions WHERE mode NOT IN ('A', 'B')"]
+    if await _archive_table_exists(conn, "monthly_rollup"):
+        sources.append("SELECT guild_id, user_id, pause FROM archive.monthly_rollup WHERE mode NOT IN ('A', 'B')")
+    await conn.execute(f"""
+        UPDATE users SET pause_time_other = other.pause
+        FROM (
+            SELECT guild_id, user_id, SUM(pause) AS pause
+            FROM ({" UNION ALL ".join(sources)})
+            GROUP BY guild_id, user_id
+        ) AS other
+        WHERE users.guild_id = other.guild_id AND users.user_id = other.user_id
+    """)
+
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_users_guild_total ON users(guild_id, temps_total_global DESC, user_id)")
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_users_guild_rest ON users(guild_id, temps_repos DESC, user_id)")
+
+
+async def _m009_streaks_work_only(conn):
+    """
+    Recalcul exact des streaks sur les seuls jours de travail : une pause seule prolongeait le
+    streak, et UPDATE_SQL (MAX) ne peut pas faire redescendre un streak_best déjà gonflé.
+    Les utilisateurs dont une partie de l'historique est archivée gardent leurs valeurs
+    (leurs sessions anciennes ne sont plus rejouables).
+    """
+    replayable = "1"
+    if await _archive_table_exists(conn, "monthly_rollup"):
+        replayable = """NOT EXISTS (
+            SELECT 1 FROM archive.monthly_rollup AS archived
+            WHERE archived.guild_id = users.guild_id AND archived.user_id = users.user_id
+        )"""
+
+    await conn.execute(f"""
+        UPDATE users SET streak_current = 0, streak_best = 0, last_active_date = NULL
+        WHERE {replayable}
+    """)
+    async with conn.execute(streaks.REPLAY_SQL.format(where="")) as cursor:
+        rows = [row async for row in streaks.replay(cursor)]
+    await conn.executemany(f"""
+        UPDATE users SET streak_current = ?, streak_best = ?, last_active_date = ?
+        WHERE guild_id = ? AND user_id = ? AND {replayable}
+    """, rows)
+
+
+async def load_settings(conn):
+    """Lignes de chargement du cache de réglages : (maintenance, guild_settings, settings hérité)"""
+    async with conn.execute("SELECT guild_id, is_active FROM maintenance") as cursor:
+        maintenance_rows = await cursor.fetchall()
+    async with conn.execute("SELECT guild_id, key, value FROM guild_settings") as cursor:
+        guild_rows = await cursor.fetchall()
+    legacy_rows = []
+    if await _table_exists(conn, "settings"):
+        async with conn.execute("SELECT key, value FROM settings") as cursor:
+            legacy_rows = await cursor.fetchall()
+    return maintenance_rows, guild_rows, legacy_rows
+
+
+async def init_archive(conn):
+    """
+    Schéma de la base d'archive attachée (fichier séparé, hors user_version) :
+    sessions anciennes agrégées par utilisateur et par mois, et jours déjà archivés.
+    """
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive.monthly_rollup (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            work INTEGER NOT NULL DEFAULT 0,
+            pause INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, month, user_id, mode)
+        ) WITHOUT ROWID
+    """)
+    # Jours déjà reportés dans monthly_rollup : l'archivage d'un jour reste idempotent si un
+    # crash sépare le commit de l'archive de celui de la base chaude (deux fichiers)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive.archived_days (
+            guild_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            PRIMARY KEY (guild_id, day)
+        ) WITHOUT ROWID
+    """)
+
+
+# (version, description, fonction) — ne jamais renuméroter une migration publiée
+MIGRATIONS = [
+    (1, "schéma initial", _m001_schema_initial),
+    (2, "reprise du schéma init_db.sql", _m002_legacy_init_db_sql),
+    (3, "index des classements", _m003_leaderboard_indexes),
+    (4, "agrégat journalier des sessions", _m004_daily_rollup),
+    (5, "calcul initial des streaks", _m005_streaks),
+    (6, "réglages par serveur", _m006_guild_settings),
+    (7, "modes Pomodoro par serveur", _m007_guild_modes),
+    (8, "pause des modes personnalisés", _m008_pause_other_modes),
+    (9, "streaks recalculés sur les jours de travail", _m009_streaks_work_only),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+async def run_migrations(conn):
+    """
+    Applique les migrations dont la version dépasse PRAGMA user_version.
+    Retourne le nombre de migrations appliquées.
+    """
+    async with conn.execute("PRAGMA user_version") as cursor:
+        current = (await cursor.fetchone())[0]
+
+    applied = 0
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info(f"⏳ Migration {version} : {description}")
+        await migrate(conn)
+        await conn.execute(f"PRAGMA user_version = {version}")
+        applied += 1
+
+    return applied
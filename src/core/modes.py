@@ -0,0 +1,72 @@
+# ==========================
+# LRE-BOT/src/core/modes.py
+# ==========================
+import json
+from . import cycles
+import logging
+
+logger = logging.getLogger('LRE-BOT.modes')
+
+# guild_id -> {nom: Schedule} : modes propres au serveur, compilés au chargement
+# (un mode du serveur remplace le mode par défaut de même nom)
+_guilds = {}
+
+
+def encode_bonus(bonus: tuple):
+    """Paliers de consolation -> texte stocké (JSON)"""
+    return json.dumps([list(tier) for tier in bonus], separators=(",", ":"))
+
+
+def decode_bonus(text: str):
+    """Texte stocké -> paliers ; NULL = paliers par défaut"""
+    if text is None:
+        return cycles.DEFAULT_BONUS
+    return tuple(tuple(tier) for tier in json.loads(text))
+
+
+def load(rows):
+    """
+    Compile les modes au démarrage depuis les lignes (guild_id, mode, work, pause, grace,
+    long_pause, long_every, bonus) de guild_modes. Une ligne invalide est ignorée.
+    """
+    _guilds.clear()
+    for guild_id, name, work, pause, grace, long_pause, long_every, bonus in rows:
+        try:
+            schedule = cycles.compile_schedule(name, work, pause, grace, long_pause, long_every, decode_bonus(bonus))
+        except ValueError as e:
+            logger.warning(f"⚠️ Mode {name} du serveur {guild_id} ignoré : {e}")
+            continue
+        _guilds.setdefault(guild_id, {})[schedule.name] = schedule
+    logger.info(f"✅ {sum(len(m) for m in _guilds.values())} mode(s) personnalisé(s) chargé(s)")
+
+
+def get(guild_id: int, name: str):
+    """Planning compilé d'un mode pour un serveur, ou None si inconnu (sans I/O)"""
+    guild = _guilds.get(guild_id)
+    if guild is not None and name in guild:
+        return guild[name]
+    return cycles.MODES.get(name)
+
+
+def available(guild_id: int):
+    """Modes utilisables sur un serveur : {nom: Schedule}, triés par nom"""
+    merged = {**cycles.MODES, **_guilds.get(guild_id, {})}
+    return dict(sorted(merged.items()))
+
+
+def is_custom(guild_id: int, name: str):
+    return name in _guilds.get(guild_id, {})
+
+
+def update(guild_id: int, schedule: cycles.Schedule):
+    """À appeler après l'écriture commitée du mode"""
+    _guilds.setdefault(guild_id, {})[schedule.name] = schedule
+
+
+def remove(guild_id: int, name: str):
+    """À appeler après la suppression commitée du mode (le mode par défaut redevient visible)"""
+    guild = _guilds.get(guild_id)
+    if guild is not None:
+        guild.pop(name, None)
+        if not guild:
+            del _guilds[guild_id]
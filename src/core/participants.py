@@ -0,0 +1,173 @@
+# ==========================
+# LRE-BOT/src/core/participants.py
+# ==========================
+import json
+import os
+import logging
+
+logger = logging.getLogger('LRE-BOT.participants')
+
+
+class Participant:
+    """État vivant d'un participant (source de vérité ; la table participants n'en est qu'un point de contrôle)"""
+
+    __slots__ = ("join_ts", "mode", "validated", "cycles_completed")
+
+    def __init__(self, join_ts: int, mode: str, validated: int = 0, cycles_completed: int = 0):
+        self.join_ts = join_ts
+        self.mode = mode
+        self.validated = validated
+        self.cycles_completed = cycles_completed
+
+    def row(self):
+        return self.join_ts, self.mode, self.validated, self.cycles_completed
+
+
+# guild_id -> {user_id: Participant}
+_live = {}
+
+# Journal des transitions depuis le dernier point de contrôle : une ligne JSON par transition,
+# toujours l'état complet (["S", guild, user, join_ts, mode, validated, cycles] ou ["D", guild, user]),
+# donc rejouable plusieurs fois sans effet de bord
+_journal = None
+_journal_path = None
+_dirty = False
+
+
+def _old_path():
+    return f"{_journal_path}.old"
+
+
+def _replay(path: str):
+    """Rejoue un fichier journal sur le registre ; une dernière ligne tronquée (crash) est ignorée"""
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning(f"⚠️ Ligne de journal illisible ignorée dans {path}")
+                continue
+            if entry[0] == "S":
+                _, guild_id, user_id, *state = entry
+                _live.setdefault(guild_id, {})[user_id] = Participant(*state)
+            elif entry[0] == "D":
+                _, guild_id, user_id = entry
+                _live.get(guild_id, {}).pop(user_id, None)
+            count += 1
+    return count
+
+
+def load(rows, journal_path: str):
+    """
+    Reconstruit le registre au démarrage : point de contrôle (lignes guild_id, user_id, join_ts,
+    mode, validated, cycles_completed) puis journal non encore reporté (.old d'abord).
+    Retourne le nombre de transitions rejouées.
+    """
+    global _journal, _journal_path, _dirty
+    _live.clear()
+    for guild_id, user_id, *state in rows:
+        _live.setdefault(guild_id, {})[user_id] = Participant(*state)
+
+    _journal_path = journal_path
+    replayed = _replay(_old_path()) + _replay(journal_path)
+    _journal = open(journal_path, "a", encoding="utf-8")
+    _dirty = replayed > 0
+    logger.info(f"✅ {count()} participant(s) chargé(s) ({replayed} transition(s) rejouée(s) depuis le journal)")
+    return replayed
+
+
+def _append(entry: list):
+    global _dirty
+    _dirty = True
+    if _journal is not None:
+        # flush : survit à un crash du processus ; la durabilité disque vient du point de contrôle
+        _journal.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        _journal.flush()
+
+
+def count():
+    return sum(len(users) for users in _live.values())
+
+
+def get(guild_id: int, user_id: int):
+    """Participant vivant ou None"""
+    return _live.get(guild_id, {}).get(user_id)
+
+
+def guild(guild_id: int):
+    """Participants d'un serveur : {user_id: Participant}"""
+    return _live.get(guild_id, {})
+
+
+def all_rows():
+    """(guild_id, user_id, join_ts, mode, validated, cycles_completed) pour tous les serveurs"""
+    return [
+        (guild_id, user_id, *participant.row())
+        for guild_id, users in _live.items()
+        for user_id, participant in users.items()
+    ]
+
+
+def save(guild_id: int, user_id: int, participant: Participant):
+    """Ajoute ou remplace un participant, puis journalise son nouvel état"""
+    _live.setdefault(guild_id, {})[user_id] = participant
+    _append(["S", guild_id, user_id, *participant.row()])
+
+
+def remove(guild_id: int, user_id: int):
+    """Retire un participant ; retourne l'état retiré ou None"""
+    users = _live.get(guild_id)
+    participant = users.pop(user_id, None) if users else None
+    if participant is not None:
+        if not users:
+            del _live[guild_id]
+        _append(["D", guild_id, user_id])
+    return participant
+
+
+def snapshot():
+    """
+    Prépare un point de contrôle : lignes de l'état courant et bascule du journal vers .old,
+    sans await entre les deux (les transitions suivantes vont dans le nouveau journal).
+    Retourne None si rien n'a changé depuis le dernier point de contrôle.
+    """
+    global _journal, _dirty
+    if not _dirty:
+        return None
+    _dirty = False
+
+    rows = all_rows()
+    if _journal is not None:
+        _journal.close()
+        old = _old_path()
+        if os.path.exists(old):
+            # Point de contrôle précédent en échec : on conserve les deux journaux, dans l'ordre
+            with open(_journal_path, encoding="utf-8") as src, open(old, "a", encoding="utf-8") as dst:
+                dst.write(src.read())
+            os.remove(_journal_path)
+        else:
+            os.replace(_journal_path, old)
+        _journal = open(_journal_path, "a", encoding="utf-8")
+    return rows
+
+
+def checkpoint_done():
+    """À appeler une fois le point de contrôle commité : le journal basculé n'est plus utile"""
+    if _journal_path is not None and os.path.exists(_old_path()):
+        os.remove(_old_path())
+
+
+def checkpoint_failed():
+    """Point de contrôle en échec : le registre reste à reporter au prochain passage"""
+    global _dirty
+    _dirty = True
+
+
+def close():
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
@@ -0,0 +1,274 @@
+# ==========================
+# LRE-BOT/src/core/pool.py
+# ==========================
+import asyncio
+import aiosqlite
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from . import config
+import logging
+
+logger = logging.getLogger('LRE-BOT.pool')
+
+
+class _ReaderQueue:
+    """
+    File de connexions équitable : une connexion rendue passe directement au plus ancien
+    appelant en attente. Avec asyncio.Queue, une tâche qui rend puis redemande aussitôt
+    sa connexion la reprend avant l'appelant réveillé, qui peut attendre indéfiniment.
+    """
+
+    def __init__(self):
+        self._idle = deque()
+        self._waiters = deque()
+
+    def put_nowait(self, conn):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(conn)
+                return
+        self._idle.append(conn)
+
+    async def get(self):
+        if self._idle and not self._waiters:
+            return self._idle.popleft()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # Connexion reçue juste avant l'annulation : la rendre au suivant
+            if waiter.done() and not waiter.cancelled():
+                self.put_nowait(waiter.result())
+            raise
+
+
+class ConnectionPool:
+    """
+    Connexions SQLite longue durée : un writer unique + des readers en lecture seule.
+    Chaque connexion est configurée une seule fois (WAL, busy_timeout, cache, mmap)
+    et voit la base d'archive sous le schéma `archive`.
+
+    Les readers sont ouverts en `mode=ro` et répartis en deux files : les lectures
+    courtes (checks, *me, tâche pomodoro) et les agrégats lourds (stats, classements),
+    pour qu'une rafale de *stats ne prive jamais les commandes d'une connexion.
+
+    Toutes les écritures passent par une file drainée par une seule tâche :
+    les opérations arrivées dans la même fenêtre de quelques millisecondes
+    partagent une transaction (un seul fsync), chacune isolée par un SAVEPOINT.
+    """
+
+    def __init__(self, path: str, readers: int = config.DB_READERS, archive_path: str = None,
+                 analytics_readers: int = config.DB_ANALYTICS_READERS):
+        self.path = path
+        self.archive_path = archive_path
+        self.nb_readers = max(1, readers)
+        self.nb_analytics = max(0, analytics_readers)
+        self._writer = None
+        self._writer_task = None
+        self._write_queue = asyncio.Queue()
+        self._readers = _ReaderQueue()
+        self._analytics = _ReaderQueue()
+        self._all_readers = []
+        self.batches_committed = 0
+        self.writes_committed = 0
+
+    @property
+    def is_open(self):
+        return self._writer is not None
+
+    @staticmethod
+    def _read_only_uri(path: str):
+        """URI SQLite en lecture seule (chemin absolu encodé)"""
+        return f"{Path(path).resolve().as_uri()}?mode=ro"
+
+    async def _configure(self, conn: aiosqlite.Connection, read_only: bool = False):
+        """PRAGMAs appliqués une fois à l'ouverture de chaque connexion"""
+        await conn.execute(f"PRAGMA busy_timeout = {config.DB_BUSY_TIMEOUT_MS}")
+        await conn.execute("PRAGMA synchronous = NORMAL")
+        await conn.execute(f"PRAGMA cache_size = -{config.DB_CACHE_KB}")
+        await conn.execute(f"PRAGMA mmap_size = {config.DB_MMAP_MB * 1024 * 1024}")
+        await conn.execute("PRAGMA temp_store = MEMORY")
+        if self.archive_path:
+            archive = self._read_only_uri(self.archive_path) if read_only else self.archive_path
+            await conn.execute("ATTACH DATABASE ? AS archive", (archive,))
+
+    async def open(self):
+        """Ouvre le writer puis les readers (appelé une seule fois au démarrage du bot)"""
+        if self.is_open:
+            return
+
+        self._writer = await self._connect_writer()
+        # File neuve à chaque ouverture : une asyncio.Queue reste liée à la boucle qui l'a utilisée
+        self._write_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop(), name="db-writer")
+
+        # Readers ouverts après le writer : le fichier, le WAL et l'archive existent déjà
+        for queue, count in ((self._readers, self.nb_readers), (self._analytics, self.nb_analytics)):
+            for _ in range(count):
+                reader = await aiosqlite.connect(self._read_only_uri(self.path), uri=True)
+                await self._configure(reader, read_only=True)
+                self._all_readers.append(reader)
+                queue.put_nowait(reader)
+
+        logger.info(
+            f"✅ Pool SQLite ouvert (1 writer, {self.nb_readers} readers, "
+            f"{self.nb_analytics} readers d'analyse) sur {self.path}"
+        )
+
+    async def _connect_writer(self):
+        """Ouvre et configure la connexion d'écriture"""
+        # isolation_level=None : les transactions sont pilotées explicitement par le writer
+        writer = await aiosqlite.connect(self.path, isolation_level=None)
+        # journal_mode est persistant dans le fichier : le writer suffit à l'activer
+        await writer.execute("PRAGMA journal_mode = WAL")
+        await self._configure(writer)
+        if self.archive_path:
+            # En WAL, une transaction sur les deux fichiers n'est atomique que fichier par fichier
+            # (voir archive.archived_days dans db.archive_cold_data)
+            # Curseur lu jusqu'au bout : sur un fichier neuf le PRAGMA garde sinon le verrou d'écriture
+            async with writer.execute("PRAGMA archive.journal_mode = WAL") as cursor:
+                await cursor.fetchall()
+        return writer
+
+    async def _reopen_writer(self):
+        """Remplace une connexion d'écriture devenue inutilisable (ROLLBACK impossible)"""
+        try:
+            await self._writer.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Fermeture de l'ancien writer impossible: {e}")
+        self._writer = await self._connect_writer()
+        logger.info("🔄 Connexion d'écriture rouverte")
+
+    async def close(self):
+        """Vide la file d'écriture puis ferme toutes les connexions (arrêt du bot)"""
+        if not self.is_open:
+            return
+
+        # Le sentinel passe après toutes les écritures déjà soumises
+        self._write_queue.put_nowait(None)
+        await self._writer_task
+        self._writer_task = None
+
+        await self._writer.close()
+        self._writer = None
+
+        for reader in self._all_readers:
+            await reader.close()
+        self._all_readers.clear()
+        self._readers = _ReaderQueue()
+        self._analytics = _ReaderQueue()
+        logger.info("✅ Pool SQLite fermé")
+
+    def _ensure_open(self):
+        if not self.is_open:
+            raise RuntimeError("Le pool SQLite n'est pas ouvert (db.open_db() non appelé)")
+
+    @asynccontextmanager
+    async def reader(self, analytics: bool = False):
+        """
+        Emprunte une connexion en lecture seule au pool.
+        `analytics=True` pour les agrégats lourds : file séparée des lectures courtes.
+        """
+        self._ensure_open()
+        queue = self._analytics if analytics and self.nb_analytics else self._readers
+        conn = await queue.get()
+        try:
+            yield conn
+        finally:
+            queue.put_nowait(conn)
+
+    async def write(self, op):
+        """
+        Soumet une écriture au writer et attend le commit du lot qui la contient.
+        `op` est une coroutine `async def op(conn)` ; sa valeur de retour (ou son
+        exception) est renvoyée à l'appelant.
+        """
+        self._ensure_open()
+        future = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait((op, future))
+        return await future
+
+    async def _writer_loop(self):
+        """Tâche unique qui draine la file et regroupe les écritures en transactions"""
+        window = config.DB_WRITE_WINDOW_MS / 1000
+        stopping = False
+
+        while not stopping:
+            item = await self._write_queue.get()
+            if item is None:
+                break
+
+            # Laisser les écritures du même tick s'accumuler avant d'ouvrir la transaction
+            if window > 0:
+                await asyncio.sleep(window)
+
+            batch = [item]
+            while len(batch) < config.DB_WRITE_BATCH_MAX:
+                try:
+                    item = self._write_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                await self._run_batch(batch)
+            except Exception as e:
+                # La tâche ne doit jamais mourir : sinon chaque pool.write() attendrait indéfiniment
+                logger.error(f"❌ Writer SQLite en erreur, lot abandonné: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _run_batch(self, batch):
+        """Exécute un lot d'écritures dans une seule transaction"""
+        conn = self._writer
+        results = []
+
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            for op, future in batch:
+                if future.cancelled():
+                    continue
+                await conn.execute("SAVEPOINT op")
+                try:
+                    result = await op(conn)
+                except Exception as e:
+                    # Seule l'opération fautive est annulée, le reste du lot est conservé
+                    await conn.execute("ROLLBACK TO op")
+                    await conn.execute("RELEASE op")
+                    results.append((future, None, e))
+                else:
+                    await conn.execute("RELEASE op")
+                    results.append((future, result, None))
+            await conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"❌ Échec du commit d'un lot de {len(batch)} écriture(s): {e}")
+            try:
+                if conn.in_transaction:
+                    await conn.execute("ROLLBACK")
+            except Exception as rollback_error:
+                logger.error(f"❌ ROLLBACK impossible, réouverture du writer: {rollback_error}")
+                await self._reopen_writer()
+            finally:
+                # Toutes les écritures du lot échouent avec l'erreur, même si le ROLLBACK échoue aussi
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        self.batches_committed += 1
+        self.writes_committed += len(results)
+
+        for future, result, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -0,0 +1,88 @@
+# ==========================
+# LRE-BOT/src/core/querycache.py
+# ==========================
+import asyncio
+import time
+from . import config
+import logging
+
+logger = logging.getLogger('LRE-BOT.querycache')
+
+# Compteurs depuis le démarrage (affichés par *status)
+stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0, "evictions": 0}
+
+# (guild_id, requête, arguments) -> (expiration monotonic, résultat), dans l'ordre d'expiration
+# (TTL constant et clé réinsérée à chaque calcul : la plus ancienne est en tête)
+_results = {}
+# (guild_id, requête, arguments) -> tâche de calcul en cours, partagée par les appelants
+_inflight = {}
+# guild_id -> génération, incrémentée à chaque écriture : un calcul lancé avant n'est pas mis en cache
+_generations = {}
+
+
+async def get(guild_id: int, name: str, loader, *args):
+    """
+    Résultat d'une lecture lourde `loader(*args)` pour un serveur : depuis le cache tant qu'il a
+    moins de READ_CACHE_TTL_SECONDS et qu'aucune écriture du serveur n'est passée, sinon un
+    seul calcul pour tous les appelants simultanés. Le résultat est partagé : ne pas le modifier.
+    """
+    key = (guild_id, name, args)
+    entry = _results.get(key)
+    if entry is not None:
+        if entry[0] > time.monotonic():
+            stats["hits"] += 1
+            return entry[1]
+        del _results[key]
+
+    task = _inflight.get(key)
+    if task is None:
+        stats["misses"] += 1
+        task = asyncio.ensure_future(_compute(key, loader, args))
+        _inflight[key] = task
+    else:
+        stats["coalesced"] += 1
+    # Un appelant annulé n'annule pas le calcul des autres
+    return await asyncio.shield(task)
+
+
+async def _compute(key, loader, args):
+    guild_id = key[0]
+    generation = _generations.get(guild_id, 0)
+    try:
+        result = await loader(*args)
+    finally:
+        if _inflight.get(key) is asyncio.current_task():
+            del _inflight[key]
+    if _generations.get(guild_id, 0) == generation:
+        now = time.monotonic()
+        _results.pop(key, None)
+        _results[key] = (now + config.READ_CACHE_TTL_SECONDS, result)
+        _sweep(now)
+    return result
+
+
+def _sweep(now: float):
+    """Retire les entrées expirées en tête, puis les plus anciennes au-delà de READ_CACHE_MAX_ENTRIES"""
+    while _results:
+        key = next(iter(_results))
+        if _results[key][0] > now and len(_results) <= config.READ_CACHE_MAX_ENTRIES:
+            break
+        del _results[key]
+        stats["evictions"] += 1
+
+
+def size():
+    """Nombre de résultats actuellement en cache"""
+    return len(_results)
+
+
+def invalidate(guild_id: int = None):
+    """À appeler après chaque écriture commitée qui change les stats d'un serveur (None : tous)"""
+    stats["invalidations"] += 1
+    guilds = set(_generations) | {key[0] for key in _results} | {key[0] for key in _inflight}
+    for gid in (guilds if guild_id is None else {guild_id}):
+        _generations[gid] = _generations.get(gid, 0) + 1
+    for store in (_results, _inflight):
+        # Les calculs en cours terminent pour leurs appelants, les suivants en relancent un
+        for key in [key for key in store if guild_id is None or key[0] == guild_id]:
+            del store[key]
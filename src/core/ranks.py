@@ -0,0 +1,104 @@
+# ==========================
+# LRE-BOT/src/core/ranks.py
+# ==========================
+import asyncio
+from sortedcontainers import SortedList
+import logging
+
+logger = logging.getLogger('LRE-BOT.ranks')
+
+# Dimensions classées dans *me (même ordre que les valeurs stockées)
+DIMENSIONS = ("total", "work", "rest", "streak")
+
+
+class RankIndex:
+    """Index de rang d'un serveur : une liste triée par dimension, rang en O(log n)"""
+
+    __slots__ = ("values", "lists")
+
+    def __init__(self, rows):
+        self.values = {}
+        self.lists = tuple(SortedList() for _ in DIMENSIONS)
+        for user_id, *values in rows:
+            self.set(user_id, tuple(values))
+
+    def set(self, user_id: int, values: tuple):
+        """Remplace les valeurs d'un utilisateur (valeurs absolues, pas des deltas)"""
+        old = self.values.get(user_id)
+        if old == values:
+            return
+        for i, sorted_values in enumerate(self.lists):
+            if old is not None:
+                sorted_values.remove(old[i])
+            sorted_values.add(values[i])
+        self.values[user_id] = values
+
+    def rank(self, dimension: str, value: int):
+        """Rang d'une valeur : 1 + nombre d'utilisateurs strictement au-dessus"""
+        sorted_values = self.lists[DIMENSIONS.index(dimension)]
+        return len(sorted_values) - sorted_values.bisect_right(value) + 1
+
+
+_indexes = {}
+_loading = {}
+_pending = {}
+# guild_id -> génération, incrémentée par invalidate : un chargement lancé avant n'est pas installé
+_generations = {}
+
+
+async def get_index(guild_id: int, loader):
+    """
+    Retourne l'index du serveur, chargé paresseusement via `loader(guild_id)`
+    (lignes user_id, total, work, rest, streak). Un seul chargement par serveur.
+    """
+    index = _indexes.get(guild_id)
+    if index is not None:
+        return index
+
+    task = _loading.get(guild_id)
+    if task is None:
+        # Les mises à jour reçues pendant le chargement sont rejouées ensuite
+        _pending[guild_id] = {}
+        task = asyncio.ensure_future(_load(guild_id, loader))
+        _loading[guild_id] = task
+    return await asyncio.shield(task)
+
+
+async def _load(guild_id: int, loader):
+    generation = _generations.get(guild_id, 0)
+    try:
+        index = RankIndex(await loader(guild_id))
+        for user_id, values in _pending.get(guild_id, {}).items():
+            index.set(user_id, values)
+        if _generations.get(guild_id, 0) != generation:
+            # Invalidé pendant le chargement : l'index sert aux appelants en attente, pas au suivant
+            logger.info(f"ℹ️ Index de rangs du serveur {guild_id} invalidé pendant son chargement, non conservé")
+            return index
+        _indexes[guild_id] = index
+        logger.info(f"✅ Index de rangs chargé pour le serveur {guild_id} ({len(index.values)} utilisateurs)")
+        return index
+    finally:
+        if _loading.get(guild_id) is asyncio.current_task():
+            del _loading[guild_id]
+            _pending.pop(guild_id, None)
+
+
+def update(guild_id: int, user_id: int, values: tuple):
+    """À appeler après chaque écriture commitée des stats d'un utilisateur"""
+    if values is None:
+        return
+    index = _indexes.get(guild_id)
+    if index is not None:
+        index.set(user_id, tuple(values))
+    elif guild_id in _pending:
+        _pending[guild_id][user_id] = tuple(values)
+
+
+def invalidate(guild_id: int):
+    """Oublie l'index d'un serveur (rechargé au prochain *me), y compris un chargement en cours"""
+    _generations[guild_id] = _generations.get(guild_id, 0) + 1
+    _indexes.pop(guild_id, None)
+    if _loading.pop(guild_id, None) is not None:
+        # Le prochain appel relance un chargement qui voit l'écriture ; le chargement en cours
+        # termine pour ses appelants sans être installé
+        _pending.pop(guild_id, None)
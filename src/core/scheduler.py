@@ -0,0 +1,75 @@
+# ==========================
+# LRE-BOT/src/core/scheduler.py
+# ==========================
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class DeadlineScheduler:
+    """
+    Tas min d'échéances, une au plus par clé (horloge murale, en secondes).
+    Replanifier ou annuler une clé est O(log n) : les anciennes entrées du tas
+    sont ignorées au moment où elles remontent (suppression paresseuse).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._current = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self):
+        return len(self._current)
+
+    def __contains__(self, key):
+        return key in self._current
+
+    def schedule(self, key, deadline: float, payload=None):
+        """Place (ou remplace) l'échéance de `key` ; réveille wait() si elle devient la plus proche"""
+        seq = next(self._seq)
+        self._current[key] = seq
+        heapq.heappush(self._heap, (deadline, seq, key, payload))
+        if self._heap[0][1] == seq:
+            self._wakeup.set()
+        # Trop d'entrées périmées : on reconstruit le tas
+        if len(self._heap) > 2 * len(self._current) + 64:
+            self._heap = [entry for entry in self._heap if self._current.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
+
+    def cancel(self, key):
+        """Oublie l'échéance de `key` (sans effet si absente)"""
+        self._current.pop(key, None)
+
+    def clear(self):
+        self._heap.clear()
+        self._current.clear()
+
+    def next_deadline(self):
+        """Échéance la plus proche, ou None si le tas est vide"""
+        while self._heap and self._current.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def wait(self):
+        """Dort jusqu'à l'échéance la plus proche puis retourne les (clé, payload) échus"""
+        while True:
+            deadline = self.next_deadline()
+            delay = None if deadline is None else deadline - time.time()
+            if delay is not None and delay <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+        due = []
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, seq, key, payload = heapq.heappop(self._heap)
+            if self._current.get(key) == seq:
+                del self._current[key]
+                due.append((key, payload))
+        return due
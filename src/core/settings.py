@@ -0,0 +1,68 @@
+# ==========================
+# LRE-BOT/src/core/settings.py
+# ==========================
+from . import config
+import logging
+
+logger = logging.getLogger('LRE-BOT.settings')
+
+# Réglages connus et leur valeur par défaut (le type de la valeur sert à convertir le texte stocké)
+DEFAULTS = {
+    "maintenance": False,
+    "sticky_quiet_seconds": config.STICKY_QUIET_SECONDS,
+    "sticky_max_delay_seconds": config.STICKY_MAX_DELAY_SECONDS,
+    "sticky_visible_within": config.STICKY_VISIBLE_WITHIN,
+}
+
+_TRUE = ("1", "true", "on", "yes", "oui")
+
+# guild_id -> {clé: valeur} ; réglages globaux hérités de la table settings (init_db.sql)
+_guilds = {}
+_legacy = {}
+
+
+def coerce(key: str, value):
+    """Convertit une valeur stockée (texte ou entier) vers le type du défaut de la clé"""
+    default = DEFAULTS.get(key)
+    if value is None or default is None or isinstance(value, type(default)):
+        return value
+    if isinstance(default, bool):
+        return str(value).strip().lower() in _TRUE
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return str(value)
+
+
+def load(maintenance_rows, guild_rows, legacy_rows):
+    """
+    Remplit le cache au démarrage : lignes (guild_id, is_active) de maintenance,
+    (guild_id, key, value) de guild_settings et (key, value) de l'ancienne table settings.
+    """
+    _guilds.clear()
+    _legacy.clear()
+
+    for key, value in legacy_rows:
+        if key in DEFAULTS:
+            _legacy[key] = coerce(key, value)
+    for guild_id, key, value in guild_rows:
+        if key in DEFAULTS:
+            _guilds.setdefault(guild_id, {})[key] = coerce(key, value)
+    for guild_id, is_active in maintenance_rows:
+        _guilds.setdefault(guild_id, {})["maintenance"] = bool(is_active)
+
+    logger.info(f"✅ Réglages chargés pour {len(_guilds)} serveur(s)")
+
+
+def get(guild_id: int, key: str):
+    """Valeur d'un réglage, servie depuis la mémoire : serveur, puis global hérité, puis défaut"""
+    guild = _guilds.get(guild_id)
+    if guild is not None and key in guild:
+        return guild[key]
+    return _legacy.get(key, DEFAULTS[key])
+
+
+def update(guild_id: int, key: str, value):
+    """À appeler après l'écriture commitée du réglage (write-through)"""
+    _guilds.setdefault(guild_id, {})[key] = coerce(key, value)
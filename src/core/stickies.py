@@ -0,0 +1,32 @@
+# ==========================
+# LRE-BOT/src/core/stickies.py
+# ==========================
+import logging
+
+logger = logging.getLogger('LRE-BOT.stickies')
+
+# channel_id -> (message_id, content, author_id) : seuls les salons avec un sticky y figurent
+_by_channel = {}
+
+
+def load(rows):
+    """Remplit le registre au démarrage depuis les lignes (channel_id, message_id, content, author_id)"""
+    _by_channel.clear()
+    for channel_id, message_id, content, author_id in rows:
+        _by_channel[channel_id] = (message_id, content, author_id)
+    logger.info(f"✅ {len(_by_channel)} sticky message(s) chargé(s)")
+
+
+def get(channel_id: int):
+    """Sticky du salon (message_id, content, author_id) ou None, sans I/O"""
+    return _by_channel.get(channel_id)
+
+
+def update(channel_id: int, message_id: int, content: str, author_id: int = None):
+    """À appeler après l'écriture commitée du sticky"""
+    _by_channel[channel_id] = (message_id, content, author_id)
+
+
+def remove(channel_id: int):
+    """À appeler après la suppression commitée du sticky"""
+    _by_channel.pop(channel_id, None)
@@ -0,0 +1,79 @@
+# ==========================
+# LRE-BOT/src/core/streaks.py
+# ==========================
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from . import config
+
+_TZ = ZoneInfo(config.TIMEZONE)
+
+# Sessions avec du travail, triées par utilisateur puis chronologiquement (parcours de idx_sessions_cycle)
+# Une pause seule ne compte pas comme un jour actif
+REPLAY_SQL = """
+    SELECT guild_id, user_id, end_timestamp FROM sessions
+    WHERE work_time > 0 {where}
+    ORDER BY guild_id, user_id, start_timestamp
+"""
+
+# best et last_active ne reculent jamais : l'historique archivé ou importé n'est plus rejouable
+UPDATE_SQL = """
+    UPDATE users SET
+        streak_current = ?,
+        streak_best = MAX(COALESCE(streak_best, 0), ?),
+        last_active_date = MAX(COALESCE(last_active_date, 0), ?)
+    WHERE guild_id = ? AND user_id = ?
+"""
+
+
+def streak_day(ts: int):
+    """Numéro du jour de streak d'un timestamp : la journée commence à RESET_HOUR (heure de TIMEZONE)"""
+    local = datetime.fromtimestamp(ts, _TZ) - timedelta(hours=config.RESET_HOUR)
+    return local.date().toordinal()
+
+
+def advance(current: int, best: int, last_day, day: int):
+    """
+    Transition O(1) à chaque activité : même jour -> inchangé, jour suivant -> +1,
+    trou d'au moins un jour -> 1. Une activité antérieure à la dernière ne change rien.
+    Retourne (current, best).
+    """
+    current = current or 0
+    if last_day is None or current <= 0 or day > last_day + 1:
+        current = 1
+    elif day == last_day + 1:
+        current += 1
+    return current, max(best or 0, current)
+
+
+def current_streak(current: int, last_active_ts, now: int):
+    """Streak affiché : retombe à 0 si la dernière activité date d'avant-hier (jour de streak)"""
+    if not current or last_active_ts is None:
+        return 0
+    return current if streak_day(now) - streak_day(last_active_ts) <= 1 else 0
+
+
+async def replay(cursor):
+    """
+    Rejoue en un seul passage un curseur REPLAY_SQL et produit, par utilisateur,
+    les paramètres de UPDATE_SQL (current, best, dernière fin de session, guild_id, user_id).
+    """
+    key = None
+    current = best = 0
+    last_day = last_ts = None
+
+    async for guild_id, user_id, end_ts in cursor:
+        if (guild_id, user_id) != key:
+            if key is not None:
+                yield (current, best, last_ts, *key)
+            key = (guild_id, user_id)
+            current = best = 0
+            last_day = last_ts = None
+
+        day = streak_day(end_ts)
+        current, best = advance(current, best, last_day, day)
+        if last_day is None or day > last_day:
+            last_day = day
+        last_ts = max(last_ts or 0, end_ts)
+
+    if key is not None:
+        yield (current, best, last_ts, *key)
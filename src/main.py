@@ -4,7 +4,7 @@
 import discord
 from discord.ext import commands
 from pathlib import Path
-from core import config
+from core import config, db
 import logging
 import os
 import sys
@@ -51,7 +51,10 @@ class LREBot(commands.Bot):
         logger.info("✅ Instance LREBot initialisée")
 
     async def setup_hook(self):
-        """Chargement automatique des Cogs au démarrage"""
+        """Ouverture et migration de la base puis chargement automatique des Cogs au démarrage"""
+        await db.open_db()
+        await db.init_db()
+
         logger.info("⏳ Chargement des extensions (Cogs)...")
         
         initial_cogs = ["cogs.admin", "cogs.user", "cogs.pomodoro", "cogs.events"]
@@ -69,6 +72,11 @@ class LREBot(commands.Bot):
 
         logger.info(f"✅ {cogs_loaded}/{len(initial_cogs)} extensions chargées avec succès.")
 
+    async def close(self):
+        """Arrêt du bot : fermeture des connexions SQLite après Discord"""
+        await super().close()
+        await db.close_db()
+
 # ─── Vérification du token ───────────────────────────────────
 if not config.TOKEN:
     logger.error("❌ Le token Discord est introuvable. Vérifie ton fichier .env !")
@@ -2,7 +2,7 @@
 # LRE-BOT/src/utils/checks.py
 # ==========================
 from discord.ext import commands
-from core import db
+from core import settings
 
 
 def is_admin():
@@ -13,11 +13,10 @@ def is_admin():
 
 
 def not_in_maintenance():
-    """Décorateur pour bloquer les commandes en mode maintenance"""
+    """Décorateur pour bloquer les commandes en mode maintenance (lu en mémoire)"""
     async def predicate(ctx):
         if ctx.guild is not None:
-            is_maint = await db.is_maintenance_active(ctx.guild.id)
-            if is_maint:
+            if settings.get(ctx.guild.id, "maintenance"):
                 raise commands.CheckFailure("MAINTENANCE_ACTIVE")
         return True
     return commands.check(predicate)
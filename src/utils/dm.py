@@ -0,0 +1,58 @@
+# ==========================
+# LRE-BOT/src/utils/dm.py
+# ==========================
+import asyncio
+import discord
+from core import config
+import logging
+
+logger = logging.getLogger('LRE-BOT.dm')
+
+# Compteurs depuis le démarrage et dernier échec par utilisateur
+stats = {"sent": 0, "failed": 0}
+failures = {}
+
+# Partagé entre les vagues : la borne vaut pour tout le bot, pas par appel
+_semaphore = asyncio.Semaphore(config.DM_CONCURRENCY)
+
+
+async def send_many(messages):
+    """
+    Envoie des DM en parallèle, au plus DM_CONCURRENCY à la fois. Les buckets par route
+    et les 429 sont gérés par le client HTTP de discord.py : on borne seulement le nombre
+    de requêtes en vol. `messages` : (member, content, view ou None).
+    Retourne {user_id: exception} pour les envois en échec.
+    """
+    async def send(member, content, view):
+        async with _semaphore:
+            if view is None:
+                await member.send(content)
+            else:
+                await member.send(content, view=view)
+
+    messages = list(messages)
+    results = await asyncio.gather(
+        *(send(member, content, view) for member, content, view in messages),
+        return_exceptions=True
+    )
+
+    failed = {}
+    for (member, _, _), result in zip(messages, results):
+        if isinstance(result, Exception):
+            failed[member.id] = result
+            failures[member.id] = (int(discord.utils.utcnow().timestamp()), repr(result))
+        else:
+            failures.pop(member.id, None)
+
+    stats["sent"] += len(messages) - len(failed)
+    stats["failed"] += len(failed)
+    return failed
+
+
+def describe(error: Exception):
+    """Raison lisible d'un échec d'envoi"""
+    if isinstance(error, discord.Forbidden):
+        return "DM fermés"
+    if isinstance(error, discord.HTTPException):
+        return f"HTTP {error.status}"
+    return type(error).__name__
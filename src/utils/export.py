@@ -0,0 +1,72 @@
+# ==========================
+# LRE-BOT/src/utils/export.py
+# ==========================
+import csv
+import gzip
+import io
+import json
+import tempfile
+
+FORMATS = ("csv", "ndjson")
+
+# Marge sous la limite d'upload : le compresseur garde encore des données en tampon
+SIZE_MARGIN = 512 * 1024
+
+
+class GzipParts:
+    """
+    Écrit des lots de lignes dans des fichiers gzip temporaires (sur disque),
+    en passant à une nouvelle partie dès que la taille compressée approche `max_bytes`.
+    Chaque partie terminée est rendue par write()/close(), prête à être envoyée.
+    """
+
+    def __init__(self, name: str, columns, fmt: str, max_bytes: int):
+        self.name = name
+        self.columns = columns
+        self.fmt = fmt
+        self.max_bytes = max(max_bytes - SIZE_MARGIN, SIZE_MARGIN)
+        self.part = 0
+        self.rows = 0
+        self._raw = None
+        self._text = None
+
+    def _open(self):
+        self.part += 1
+        self.rows = 0
+        self._raw = tempfile.TemporaryFile()
+        gz = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self._text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+        if self.fmt == "csv":
+            csv.writer(self._text).writerow(self.columns)
+
+    def _finish(self):
+        """Ferme la partie en cours et retourne (nom de fichier, fichier rembobiné)"""
+        # Ferme le flux gzip sans fermer le fichier temporaire sous-jacent
+        self._text.close()
+        raw, self._raw, self._text = self._raw, None, None
+        raw.seek(0)
+        return f"{self.name}_p{self.part}.{self.fmt}.gz", raw
+
+    def write(self, rows):
+        """Ajoute un lot de lignes ; retourne la partie terminée si la limite est atteinte, sinon None"""
+        if self._text is None:
+            self._open()
+
+        if self.fmt == "csv":
+            csv.writer(self._text).writerows(rows)
+        else:
+            for row in rows:
+                self._text.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False))
+                self._text.write("\n")
+        self.rows += len(rows)
+
+        # Taille compressée déjà écrite (sans flush forcé, qui dégraderait la compression)
+        if self._raw.tell() >= self.max_bytes:
+            return self._finish()
+        return None
+
+    def close(self):
+        """Termine l'export ; retourne la dernière partie (ou None si rien n'a été écrit depuis)"""
+        if self._text is None:
+            return None
+        return self._finish()
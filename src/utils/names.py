@@ -0,0 +1,97 @@
+# ==========================
+# LRE-BOT/src/utils/names.py
+# ==========================
+import asyncio
+import time
+from collections import OrderedDict
+import discord
+from core import config, db
+import logging
+
+logger = logging.getLogger('LRE-BOT.names')
+
+# Compteurs depuis le démarrage, par source de résolution
+stats = {"member": 0, "cache": 0, "db": 0, "fetched": 0, "failed": 0}
+
+# user_id -> (expiration monotonic, nom) ; ordre = récence d'utilisation
+_cache = OrderedDict()
+_semaphore = asyncio.Semaphore(config.NAME_FETCH_CONCURRENCY)
+
+
+def _cached(user_id: int, now: float):
+    entry = _cache.get(user_id)
+    if entry is None:
+        return None
+    if entry[0] <= now:
+        del _cache[user_id]
+        return None
+    _cache.move_to_end(user_id)
+    return entry[1]
+
+
+def _remember(user_id: int, name: str, now: float):
+    _cache[user_id] = (now + config.NAME_CACHE_TTL_SECONDS, name)
+    _cache.move_to_end(user_id)
+    while len(_cache) > config.NAME_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+async def _fetch(bot, user_id: int):
+    async with _semaphore:
+        return await bot.fetch_user(user_id)
+
+
+async def resolve(bot, guild: discord.Guild, user_ids):
+    """
+    Noms affichés d'un lot d'utilisateurs : {user_id: nom}.
+    Cache des membres / utilisateurs de discord.py, puis cache LRU, puis users.username
+    (une requête), puis une seule vague de fetch_user bornée à NAME_FETCH_CONCURRENCY.
+    Les noms récupérés par l'API sont reportés dans users.username ; un échec est mis en
+    cache comme <id> pour ne pas être redemandé à chaque affichage.
+    """
+    now = time.monotonic()
+    names = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        member = guild.get_member(user_id) if guild else None
+        user = member or bot.get_user(user_id)
+        if user is not None:
+            names[user_id] = user.display_name
+            stats["member"] += 1
+            continue
+        name = _cached(user_id, now)
+        if name is not None:
+            names[user_id] = name
+            stats["cache"] += 1
+            continue
+        missing.append(user_id)
+
+    if missing:
+        stored = await db.get_usernames(missing)
+        for user_id, name in stored.items():
+            names[user_id] = name
+            _remember(user_id, name, now)
+        stats["db"] += len(stored)
+        missing = [user_id for user_id in missing if user_id not in stored]
+
+    if missing:
+        results = await asyncio.gather(*(_fetch(bot, user_id) for user_id in missing), return_exceptions=True)
+        fetched = {}
+        for user_id, result in zip(missing, results):
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ Nom introuvable pour {user_id}: {result}")
+                names[user_id] = f"<{user_id}>"
+                stats["failed"] += 1
+            else:
+                names[user_id] = result.display_name
+                fetched[user_id] = result.name
+                stats["fetched"] += 1
+            _remember(user_id, names[user_id], now)
+
+        if guild is not None:
+            try:
+                await db.set_usernames(guild.id, fetched)
+            except Exception as e:
+                logger.error(f"❌ Impossible d'enregistrer les noms récupérés: {e}")
+
+    return names
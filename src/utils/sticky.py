@@ -0,0 +1,119 @@
+# ==========================
+# LRE-BOT/src/utils/sticky.py
+# ==========================
+import asyncio
+import discord
+from core import db, settings, stickies
+import logging
+
+logger = logging.getLogger('LRE-BOT.sticky')
+
+# Un repost non groupé coûtait fetch_message + delete + send par message déclencheur
+NAIVE_CALLS_PER_TRIGGER = 3
+
+# Compteurs depuis le démarrage (affichés par *status)
+stats = {"triggers": 0, "reposts": 0, "skipped": 0, "api_calls": 0}
+
+
+def saved_calls():
+    """Appels API Discord évités par le regroupement des reposts"""
+    return stats["triggers"] * NAIVE_CALLS_PER_TRIGGER - stats["api_calls"]
+
+
+class _Burst:
+    """Rafale en attente dans un salon (horloge de la boucle asyncio)"""
+
+    __slots__ = ("first", "last", "task")
+
+    def __init__(self, now: float):
+        self.first = now
+        self.last = now
+        self.task = None
+
+
+class StickyReposter:
+    """
+    Planificateur de repost par salon : une rafale de messages donne un seul repost,
+    après STICKY_QUIET_SECONDS sans message ou au plus STICKY_MAX_DELAY_SECONDS après
+    le premier. Aucun repost si le sticky fait encore partie des derniers messages.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._bursts = {}
+        # channel_id -> messages postés après le sticky (inconnu au démarrage : repost)
+        self._since = {}
+
+    def seen(self, message: discord.Message, sticky: tuple):
+        """À appeler pour chaque message d'un salon avec sticky (bots compris)"""
+        channel_id = message.channel.id
+        if message.author == self.bot.user and message.content == sticky[1]:
+            self._since[channel_id] = 0
+        elif channel_id in self._since:
+            self._since[channel_id] += 1
+
+    def schedule(self, channel):
+        """Un message déclencheur : ouvre ou prolonge la rafale du salon"""
+        stats["triggers"] += 1
+        now = asyncio.get_running_loop().time()
+        burst = self._bursts.get(channel.id)
+        if burst is not None:
+            burst.last = now
+            return
+        burst = _Burst(now)
+        burst.task = asyncio.create_task(self._run(channel, burst))
+        self._bursts[channel.id] = burst
+
+    def cancel_all(self):
+        """Annule les reposts en attente (déchargement du cog)"""
+        for burst in self._bursts.values():
+            burst.task.cancel()
+        self._bursts.clear()
+
+    async def _run(self, channel, burst: _Burst):
+        guild_id = channel.guild.id
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                deadline = min(
+                    burst.last + settings.get(guild_id, "sticky_quiet_seconds"),
+                    burst.first + settings.get(guild_id, "sticky_max_delay_seconds")
+                )
+                delay = deadline - loop.time()
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            # Les messages reçus pendant le repost ouvrent une nouvelle rafale
+            self._bursts.pop(channel.id, None)
+
+        try:
+            await self._repost(channel, guild_id)
+        except Exception as e:
+            logger.error(f"❌ Erreur lors du repost du sticky dans {channel}: {e}")
+
+    async def _repost(self, channel, guild_id: int):
+        sticky = stickies.get(channel.id)
+        if sticky is None:
+            return
+
+        visible_within = settings.get(guild_id, "sticky_visible_within")
+        if self._since.get(channel.id, visible_within) < visible_within:
+            stats["skipped"] += 1
+            return
+
+        message_id, content, author_id = sticky
+        # Suppression sans fetch préalable : un message partiel suffit
+        try:
+            stats["api_calls"] += 1
+            await channel.get_partial_message(message_id).delete()
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            logger.warning(f"⚠️ Impossible de supprimer l'ancien sticky dans {channel}: {e}")
+
+        stats["api_calls"] += 1
+        new_sticky = await channel.send(content)
+        self._since[channel.id] = 0
+        stats["reposts"] += 1
+        await db.set_sticky(guild_id, channel.id, new_sticky.id, content, author_id)
@@ -25,3 +25,11 @@ def format_seconds(seconds: int) -> str:
         parts.append(f"{seconds}s")
 
     return " ".join(parts)
+
+
+def format_mode(schedule) -> str:
+    """Résumé d'un mode Pomodoro compilé : 50/10, pause longue éventuelle, délai de grâce"""
+    label = f"{schedule.work // 60}/{schedule.pause // 60}"
+    if schedule.long_every:
+        label += f", pause longue de {schedule.long_pause // 60} min tous les {schedule.long_every} cycles"
+    return f"{label}, grâce {schedule.grace // 60} min"
@@ -0,0 +1,10 @@
+# ==========================
+# LRE-BOT/tests/conftest.py
+# ==========================
+import os
+import sys
+import tempfile
+
+# Base temporaire avant le premier import de core.config (chemins lus à l'import)
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(prefix="lre-tests-"), "bot.db"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
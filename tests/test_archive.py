@@ -0,0 +1,60 @@
+# ==========================
+# LRE-BOT/tests/test_archive.py
+# ==========================
+import asyncio
+import time
+from core import db
+
+GUILD = 7001
+OLD = int(time.time()) - 800 * 86400
+
+
+async def _insert_old_sessions(conn):
+    for user_id in (1, 2):
+        await db._insert_session(conn, user_id, GUILD, "A", 1500, 300, OLD, OLD + 1800)
+
+
+async def _scalar(sql, *params):
+    async with db.pool.reader() as conn:
+        async with conn.execute(sql, params) as cursor:
+            return (await cursor.fetchone())[0]
+
+
+async def _archived_work():
+    return await _scalar("SELECT COALESCE(SUM(work), 0) FROM archive.monthly_rollup WHERE guild_id = ?", GUILD)
+
+
+async def _hot_work():
+    return await _scalar("SELECT COALESCE(SUM(work), 0) FROM daily_rollup WHERE guild_id = ?", GUILD)
+
+
+def test_archive_moves_day_once_even_after_partial_crash():
+    async def scenario():
+        await db.open_db()
+        try:
+            await db.init_db()
+            await db.pool.write(_insert_old_sessions)
+
+            report = await db.archive_cold_data()
+            assert report["days"] == 1 and report["sessions"] == 2
+            # auto_vacuum désactivé : les pages libérées restent dans le fichier
+            assert report["returned"] == 0 and report["freed"] >= 0
+            assert await _archived_work() == 3000
+            assert await _hot_work() == 0
+
+            # Crash simulé : le report dans l'archive est commité, la suppression en base chaude perdue
+            await db.pool.write(_insert_old_sessions)
+            assert await _hot_work() == 3000
+
+            report = await db.archive_cold_data()
+            assert report["rows"] == 0 and report["sessions"] == 2
+            assert await _archived_work() == 3000
+            assert await _hot_work() == 0
+
+            exported = [row async for rows in db.iter_archive(GUILD, chunk_size=1) for row in rows]
+            month = time.strftime("%Y-%m", time.localtime(OLD))
+            assert exported == [(month, 1, "A", 1500, 300, 1), (month, 2, "A", 1500, 300, 1)]
+        finally:
+            await db.close_db()
+
+    asyncio.run(scenario())
@@ -0,0 +1,207 @@
+# ==========================
+# LRE-BOT/tests/test_cycles.py
+# ==========================
+"""
+Moteur de cycles (core/cycles.py) comparé à un simulateur seconde par seconde,
+sur les modes par défaut et des modes personnalisés tirés au hasard (pauses longues comprises),
+aux instants de bascule et autour.
+"""
+import random
+import pytest
+from core import cycles
+
+JOIN = 1_700_000_000
+
+
+class Simulation:
+    """Déroule un planning seconde par seconde depuis l'arrivée, sans les précalculs du moteur"""
+
+    def __init__(self, schedule: cycles.Schedule, periods: int = 3):
+        self.schedule = schedule
+        self.phase = []         # phase de chaque seconde
+        self.cycle = []         # index du cycle de chaque seconde
+        self.starts = []        # début de chaque cycle
+        self.work_ends = []     # fin du travail de chaque cycle
+        self.worked = [0]       # travail cumulé avant la seconde t
+        self.rested = [0]       # pause cumulée avant la seconde t
+
+        index = 0
+        while len(self.phase) < periods * schedule.period + 1:
+            long_break = schedule.long_every and (index + 1) % schedule.long_every == 0
+            pause = schedule.long_pause if long_break else schedule.pause
+            self.starts.append(len(self.phase))
+            for second in range(schedule.work + pause):
+                in_work = second < schedule.work
+                self.phase.append(cycles.WORK if in_work else cycles.BREAK)
+                self.cycle.append(index)
+                self.worked.append(self.worked[-1] + in_work)
+                self.rested.append(self.rested[-1] + (not in_work))
+            self.work_ends.append(self.starts[-1] + schedule.work)
+            index += 1
+        self.starts.append(len(self.phase))
+        self.horizon = len(self.phase) - 1
+
+    def end(self, index: int):
+        return self.starts[index + 1]
+
+    def deadline(self, t: int):
+        index = self.cycle[t]
+        return self.work_ends[index] if self.phase[t] == cycles.WORK else self.end(index)
+
+    def credit(self, cycles_completed: int, t: int):
+        start = self.starts[cycles_completed]
+        if t <= start:
+            return 0, 0
+        return self.worked[t] - self.worked[start], self.rested[t] - self.rested[start]
+
+    def instants(self, rng: random.Random, count: int = 200):
+        """Bascules de phase (et ±1 s) puis instants tirés au hasard"""
+        edges = set()
+        for edge in self.starts[:-1] + self.work_ends:
+            edges.update((edge - 1, edge, edge + 1))
+        points = sorted(t for t in edges if 0 <= t <= self.horizon)
+        return points + [rng.randrange(self.horizon + 1) for _ in range(count)]
+
+
+def _random_schedule(rng: random.Random, index: int):
+    work = rng.randint(60, 900)
+    pause = rng.randint(60, 400)
+    long_every = rng.choice((0, 0, 2, 3, 4))
+    long_pause = rng.randint(pause, pause + 600) if long_every else 0
+    grace = rng.choice((None, 0, rng.randint(0, 600)))
+    bonus = tuple(sorted(rng.sample(range(60, 4000), 2)))
+    return cycles.compile_schedule(
+        f"DEEP{index}", work, pause, grace, long_pause, long_every,
+        ((bonus[0], rng.randint(60, 900)), (bonus[1], rng.randint(60, 900)))
+    )
+
+
+SCHEDULES = [cycles.MODES["A"], cycles.MODES["B"]] + [_random_schedule(random.Random(seed), seed) for seed in range(40)]
+
+
+@pytest.fixture(params=SCHEDULES, ids=lambda schedule: schedule.name)
+def simulation(request):
+    return Simulation(request.param)
+
+
+def test_cycle_offsets_and_split(simulation):
+    schedule = simulation.schedule
+    for index in range(len(simulation.starts) - 1):
+        assert schedule.cycle_offset(index) == simulation.starts[index]
+        assert cycles.cycle_bounds(JOIN, schedule, index) == (
+            JOIN + simulation.starts[index], JOIN + simulation.work_ends[index], JOIN + simulation.end(index)
+        )
+        assert schedule.totals(index) == (simulation.worked[simulation.starts[index]],
+                                          simulation.rested[simulation.starts[index]])
+    for t in simulation.instants(random.Random(schedule.name)):
+        assert schedule.split(t) == (simulation.worked[t], simulation.rested[t])
+    assert schedule.split(-5) == (0, 0)
+
+
+def test_position_and_credit(simulation):
+    schedule = simulation.schedule
+    rng = random.Random(schedule.name)
+    for t in simulation.instants(rng):
+        index = simulation.cycle[t]
+        for completed in {0, max(0, index - 1), index, index + 1}:
+            expected = simulation.credit(completed, t)
+            assert cycles.credit(JOIN, schedule, completed, JOIN + t) == expected
+            assert cycles.position(JOIN, schedule, completed, JOIN + t) == cycles.Position(
+                simulation.phase[t], index, JOIN + simulation.deadline(t), *expected
+            )
+    # Avant l'arrivée : premier cycle, rien à créditer
+    assert cycles.position(JOIN, schedule, 0, JOIN - 10) == cycles.Position(
+        cycles.WORK, 0, JOIN + schedule.work, 0, 0
+    )
+
+
+def test_positions_matches_position():
+    rng = random.Random(21)
+    for _ in range(20):
+        now = JOIN + rng.randrange(4 * 3600)
+        schedules = [rng.choice(SCHEDULES) for _ in range(300)]
+        joins = [now - rng.choice((0, 1, rng.randrange(schedule.period * 3))) for schedule in schedules]
+        completed = [
+            max(0, cycles.position(join, schedule, 0, now).cycle_index - rng.randint(0, 2))
+            for join, schedule in zip(joins, schedules)
+        ]
+        batch = cycles.positions(joins, schedules, completed, now)
+        for i, (join, schedule) in enumerate(zip(joins, schedules)):
+            assert tuple(column[i] for column in batch) == tuple(cycles.position(join, schedule, completed[i], now))
+
+
+def test_next_event(simulation):
+    schedule = simulation.schedule
+    for t in simulation.instants(random.Random(schedule.name), count=50):
+        now = JOIN + t
+        index = simulation.cycle[t]
+        work_end, end = JOIN + simulation.work_ends[index], JOIN + simulation.end(index)
+
+        if simulation.phase[t] == cycles.WORK:
+            assert cycles.next_event(JOIN, schedule, 0, index, now) == (work_end, cycles.BREAK_START)
+        else:
+            # Pause commencée : boutons tout de suite, ou fin du cycle une fois la présence confirmée
+            assert cycles.next_event(JOIN, schedule, 0, index, now) == (now, cycles.BREAK_START)
+            assert cycles.next_event(JOIN, schedule, 0, index, now, confirmed=True) == (end, cycles.CYCLE_END)
+            assert cycles.next_event(JOIN, schedule, 1, index, now) == (max(now, end - 60), cycles.REMINDER)
+        assert cycles.next_event(JOIN, schedule, 2, index, now) == (end + schedule.grace, cycles.GRACE_EXPIRED)
+        # Cycle précédent terminé sans clôture (redémarrage) : clôture immédiate
+        if index > 0:
+            previous_end = JOIN + simulation.end(index - 1)
+            assert cycles.next_event(JOIN, schedule, 0, index - 1, now) == (previous_end, cycles.CYCLE_END)
+            assert cycles.next_event(JOIN, schedule, 1, index - 1, now)[1] == cycles.GRACE_EXPIRED
+
+
+def _expected_catch_up(simulation, validated: int, completed: int, t: int):
+    """Règles du rattrapage appliquées aux bornes et aux cumuls simulés"""
+    schedule = simulation.schedule
+    closed = []
+    if validated == 0:
+        if simulation.end(completed) > t:
+            return [], False
+        start, end = simulation.starts[completed], simulation.end(completed)
+        closed.append(dict(
+            mode=schedule.name, work_time=simulation.worked[end] - simulation.worked[start],
+            pause_time=simulation.rested[end] - simulation.rested[start],
+            start_ts=JOIN + start, end_ts=JOIN + end, cycle_index=completed
+        ))
+        completed += 1
+
+    expires_at = simulation.end(completed) + schedule.grace
+    if expires_at > t:
+        return closed, False
+
+    verified = simulation.worked[simulation.starts[completed]]
+    bonus = next((extra for below, extra in schedule.bonus if verified < below), 0)
+    if bonus:
+        closed.append(dict(
+            mode=schedule.name, work_time=bonus, pause_time=0,
+            start_ts=JOIN + expires_at - bonus, end_ts=JOIN + expires_at, end_session=True
+        ))
+    return closed, True
+
+
+def test_catch_up(simulation):
+    schedule = simulation.schedule
+    rng = random.Random(schedule.name)
+    for t in simulation.instants(rng, count=100):
+        index = simulation.cycle[t]
+        for completed in {max(0, index - 2), max(0, index - 1), index}:
+            if completed + 2 >= len(simulation.starts):
+                continue
+            for validated in (0, 1, 2):
+                assert cycles.catch_up(JOIN, schedule, validated, completed, JOIN + t) == \
+                    _expected_catch_up(simulation, validated, completed, t)
+    # Expiration exacte : l'instant de l'échéance expire, la seconde d'avant non
+    expires_at = simulation.end(0) + schedule.grace
+    assert cycles.catch_up(JOIN, schedule, 1, 0, JOIN + expires_at)[1] is True
+    assert cycles.catch_up(JOIN, schedule, 1, 0, JOIN + expires_at - 1) == ([], False)
+
+
+def test_inactivity_bonus_tiers():
+    schedule = cycles.MODES["A"]
+    # Seuils sur le travail validé : 0 et 50 min < 1 h, 100 min < 2 h, 150 min au-delà
+    assert cycles.inactivity_bonus(schedule, 0) == 25 * 60
+    assert cycles.inactivity_bonus(schedule, 1) == 25 * 60
+    assert cycles.inactivity_bonus(schedule, 2) == 15 * 60
+    assert cycles.inactivity_bonus(schedule, 3) == 0
@@ -0,0 +1,100 @@
+# ==========================
+# LRE-BOT/tests/test_migrations.py
+# ==========================
+import asyncio
+from core import db, migrations
+from core.pool import ConnectionPool
+
+GUILD = 7003
+
+
+async def _rows(pool, sql, *params):
+    async with pool.reader() as conn:
+        async with conn.execute(sql, params) as cursor:
+            return await cursor.fetchall()
+
+
+def test_m008_backfills_custom_mode_pause(tmp_path, monkeypatch):
+    async def seed(conn):
+        await conn.executemany("""
+            INSERT INTO users (user_id, guild_id, total_time, total_A, pause_time_A) VALUES (?, ?, ?, ?, ?)
+        """, [(1, GUILD, 4500, 3000, 600), (2, GUILD, 1500, 0, 0)])
+        for user_id, mode, pause, start in ((1, "A", 600, 1_700_000_000), (1, "DEEP", 1200, 1_700_010_000),
+                                            (2, "DEEP", 300, 1_700_020_000)):
+            await db._insert_session(conn, user_id, GUILD, mode, 1500, pause, start, start + 1500 + pause)
+        # Mois déjà archivé : ses sessions ne sont plus en base chaude
+        await conn.execute("""
+            INSERT INTO archive.monthly_rollup (guild_id, user_id, month, mode, work, pause, sessions)
+            VALUES (?, 1, '2022-01', 'DEEP', 3000, 900, 2), (?, 1, '2022-01', 'B', 1500, 300, 1)
+        """, (GUILD, GUILD))
+
+    async def scenario():
+        pool = ConnectionPool(str(tmp_path / "bot.db"), readers=1, analytics_readers=0,
+                              archive_path=str(tmp_path / "archive.db"))
+        await pool.open()
+        try:
+            with monkeypatch.context() as patch:
+                patch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:7])
+                await pool.write(migrations.run_migrations)
+            await pool.write(migrations.init_archive)
+            await pool.write(seed)
+
+            assert await pool.write(migrations.run_migrations) == len(migrations.MIGRATIONS) - 7
+            assert await _rows(pool, """
+                SELECT user_id, pause_time_other, temps_repos, temps_total_global FROM users ORDER BY user_id
+            """) == [(1, 2100, 2700, 7200), (2, 300, 300, 1800)]
+
+            # Crédit en direct d'un mode personnalisé : même colonne
+            async def credit(conn):
+                await db._credit_user(conn, 2, GUILD, "DEEP", 1500, 300, True, 1_700_030_000)
+            await pool.write(credit)
+            assert await _rows(pool, "SELECT pause_time_other, temps_repos FROM users WHERE user_id = 2") == [(600, 600)]
+
+            indexes = {name for name, in await _rows(pool, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+            assert {"idx_users_guild_total", "idx_users_guild_rest"} <= indexes
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_m009_recomputes_inflated_streaks(tmp_path, monkeypatch):
+    day = 86400
+    noon = 1_700_000_000 - 1_700_000_000 % day + 11 * 3600
+
+    async def seed(conn):
+        # Streaks gonflés par l'ancien crédit (pause seule = jour actif)
+        await conn.executemany("""
+            INSERT INTO users (user_id, guild_id, streak_current, streak_best, last_active_date)
+            VALUES (?, ?, 4, 4, ?)
+        """, [(1, GUILD, noon + 3 * day), (2, GUILD, noon + 3 * day), (3, GUILD, noon + 3 * day)])
+        # Utilisateur 1 : travail J0, pause seule J1 et J2, travail J3
+        for start, work in ((noon, 1500), (noon + day, 0), (noon + 2 * day, 0), (noon + 3 * day, 1500)):
+            await db._insert_session(conn, 1, GUILD, "A", work, 300, start, start + 1800)
+        # Utilisateur 2 : pauses seules uniquement
+        await db._insert_session(conn, 2, GUILD, "A", 0, 300, noon, noon + 300)
+        # Utilisateur 3 : historique en partie archivé, non rejouable
+        await conn.execute("""
+            INSERT INTO archive.monthly_rollup (guild_id, user_id, month, mode, work, pause, sessions)
+            VALUES (?, 3, '2022-01', 'A', 3000, 600, 2)
+        """, (GUILD,))
+
+    async def scenario():
+        pool = ConnectionPool(str(tmp_path / "bot.db"), readers=1, analytics_readers=0,
+                              archive_path=str(tmp_path / "archive.db"))
+        await pool.open()
+        try:
+            with monkeypatch.context() as patch:
+                patch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:8])
+                await pool.write(migrations.run_migrations)
+            await pool.write(migrations.init_archive)
+            await pool.write(seed)
+
+            await pool.write(migrations.run_migrations)
+            assert await _rows(pool, """
+                SELECT user_id, streak_current, streak_best, last_active_date FROM users ORDER BY user_id
+            """) == [(1, 1, 1, noon + 3 * day + 1800), (2, 0, 0, None), (3, 4, 4, noon + 3 * day)]
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
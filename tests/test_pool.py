@@ -0,0 +1,92 @@
+# ==========================
+# LRE-BOT/tests/test_pool.py
+# ==========================
+import asyncio
+import pytest
+from core.pool import ConnectionPool, _ReaderQueue
+
+
+def _failing(conn, statements):
+    """Fait échouer une fois chaque instruction listée sur cette connexion"""
+    execute = conn.execute
+    pending = set(statements)
+
+    def patched(sql, *args, **kwargs):
+        if sql in pending:
+            pending.discard(sql)
+            raise RuntimeError(f"échec simulé: {sql}")
+        return execute(sql, *args, **kwargs)
+
+    conn.execute = patched
+
+
+async def _create(conn):
+    await conn.execute("CREATE TABLE t (v INTEGER)")
+
+
+async def _insert(conn):
+    await conn.execute("INSERT INTO t VALUES (1)")
+    return "ok"
+
+
+def test_failed_commit_fails_whole_batch(tmp_path):
+    async def scenario():
+        pool = ConnectionPool(str(tmp_path / "bot.db"), readers=1, analytics_readers=0)
+        await pool.open()
+        try:
+            await pool.write(_create)
+            _failing(pool._writer, ["COMMIT"])
+            results = await asyncio.gather(pool.write(_insert), pool.write(_insert), return_exceptions=True)
+            assert all(isinstance(r, RuntimeError) for r in results)
+            assert await pool.write(_insert) == "ok"
+            async with pool.reader() as conn:
+                async with conn.execute("SELECT COUNT(*) FROM t") as cursor:
+                    assert (await cursor.fetchone())[0] == 1
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_writer_survives_failed_rollback(tmp_path):
+    async def scenario():
+        pool = ConnectionPool(str(tmp_path / "bot.db"), readers=1, analytics_readers=0)
+        await pool.open()
+        try:
+            await pool.write(_create)
+            broken = pool._writer
+            _failing(broken, ["COMMIT", "ROLLBACK"])
+            with pytest.raises(RuntimeError):
+                await asyncio.wait_for(pool.write(_insert), 5)
+            # Writer rouvert : les écritures suivantes aboutissent au lieu d'attendre indéfiniment
+            assert pool._writer is not broken
+            assert await asyncio.wait_for(pool.write(_insert), 5) == "ok"
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_reader_queue_serves_waiters_in_order():
+    async def scenario():
+        queue = _ReaderQueue()
+        queue.put_nowait("conn")
+        stop = asyncio.Event()
+
+        async def hog():
+            # Rend puis redemande aussitôt la connexion, comme une rafale de *stats
+            while not stop.is_set():
+                conn = await queue.get()
+                await asyncio.sleep(0)
+                queue.put_nowait(conn)
+
+        hogs = [asyncio.create_task(hog()) for _ in range(2)]
+        await asyncio.sleep(0)
+        try:
+            assert await asyncio.wait_for(queue.get(), 1) == "conn"
+        finally:
+            stop.set()
+            queue.put_nowait("conn")
+            await asyncio.gather(*hogs)
+
+    asyncio.run(scenario())
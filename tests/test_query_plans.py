@@ -0,0 +1,101 @@
+# ==========================
+# LRE-BOT/tests/test_query_plans.py
+# ==========================
+"""
+Plans d'exécution (EXPLAIN QUERY PLAN) des lectures de classement, de rang et de stats
+serveur sur une base migrée : elles doivent passer par les index de la migration 3
+(ou la clé primaire de daily_rollup) et ne jamais parcourir une table entière.
+"""
+import asyncio
+import pytest
+from core import db
+
+GUILD = 1
+
+
+async def _collect():
+    """Requêtes exécutées par chaque lecture (trace SQLite des readers) -> plans"""
+    await db.open_db()
+    try:
+        await db.init_db()
+        traced = []
+        for reader in db.pool._all_readers:
+            await reader.set_trace_callback(traced.append)
+
+        calls = {
+            "leaderboards": lambda: db._leaderboards(GUILD),
+            "server_stats": lambda: db._server_stats(GUILD),
+            "rank_rows": lambda: db._load_rank_rows(GUILD),
+            "user_stats": lambda: db.get_user_stats(1, GUILD),
+            "yearly_analytics": lambda: db._yearly_analytics(GUILD, 2026),
+        }
+        plans = {}
+        for name, call in calls.items():
+            traced.clear()
+            await call()
+            queries = [sql for sql in traced if sql.lstrip().upper().startswith("SELECT")]
+            plans[name] = []
+            async with db.pool.reader() as conn:
+                for sql in queries:
+                    async with conn.execute("EXPLAIN QUERY PLAN " + sql) as cursor:
+                        steps = [row[3] for row in await cursor.fetchall()]
+                    plans[name].append((" ".join(sql.split()), steps))
+        return plans
+    finally:
+        await db.close_db()
+
+
+@pytest.fixture(scope="module")
+def plans():
+    return asyncio.run(_collect())
+
+
+def _plan_of(plans, name, fragment):
+    matches = [steps for sql, steps in plans[name] if fragment in sql]
+    assert len(matches) == 1, f"{fragment!r} introuvable dans {name}"
+    return " | ".join(matches[0])
+
+
+def test_no_full_table_scan(plans):
+    for name, queries in plans.items():
+        for sql, steps in queries:
+            for step in steps:
+                assert not step.startswith("SCAN ") or step.startswith("SCAN (subquery") or step == "SCAN CONSTANT ROW", \
+                    f"{name}: parcours complet ({step}) pour {sql}"
+
+
+@pytest.mark.parametrize("fragment, index", [
+    ("ORDER BY temps_total_global DESC", "idx_users_guild_total"),
+    ("ORDER BY total_time DESC", "idx_users_guild_work"),
+    ("ORDER BY temps_repos DESC", "idx_users_guild_rest"),
+    ("ORDER BY streak_best DESC", "idx_users_guild_streak"),
+])
+def test_user_leaderboards_use_their_index(plans, fragment, index):
+    plan = _plan_of(plans, "leaderboards", fragment)
+    assert f"INDEX {index} " in plan
+    # Les 10 premiers sont lus dans l'ordre de l'index, sans tri
+    assert "TEMP B-TREE" not in plan
+
+
+def test_week_and_month_tops_read_rollup_range(plans):
+    # Agrégat SUM par utilisateur puis tri sur la somme : les B-trees temporaires sont
+    # inévitables, mais bornés aux lignes de la période (clé primaire guild_id, day)
+    for fragment in ("SUM(work) as work_week", "SUM(work) as work_month"):
+        plan = _plan_of(plans, "leaderboards", fragment)
+        assert "daily_rollup USING PRIMARY KEY (guild_id=? AND day>?)" in plan
+        assert plan.count("TEMP B-TREE") == 2
+
+
+def test_rank_rows_and_user_stats_use_indexes(plans):
+    assert "USING INDEX idx_users_guild_" in _plan_of(plans, "rank_rows", "FROM users")
+    # Clé (user_id, guild_id) de la table users
+    assert "(user_id=? AND guild_id=?)" in _plan_of(plans, "user_stats", "FROM users")
+
+
+def test_server_stats_use_indexes(plans):
+    assert "COVERING INDEX idx_users_guild_work (guild_id=?)" in _plan_of(plans, "server_stats", "AVG(total_time)")
+    # COUNT(DISTINCT) sur la période : B-trees temporaires bornés à la plage de jours
+    assert "daily_rollup USING PRIMARY KEY (guild_id=? AND day>?)" in _plan_of(plans, "server_stats", "COUNT(DISTINCT")
+    totals = _plan_of(plans, "server_stats", "archive.monthly_rollup")
+    assert "daily_rollup USING PRIMARY KEY (guild_id=?)" in totals
+    assert "archive.monthly_rollup USING PRIMARY KEY (guild_id=?)" in totals
@@ -0,0 +1,123 @@
+# ==========================
+# LRE-BOT/tests/test_querycache.py
+# ==========================
+import asyncio
+import time
+from core import db, participants, querycache
+
+GUILD = 7004
+
+
+def test_concurrent_reads_share_one_computation():
+    querycache.invalidate()
+
+    async def scenario():
+        calls = []
+
+        async def loader(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return {"value": value}
+
+        results = await asyncio.gather(*(querycache.get(GUILD, "test", loader, 1) for _ in range(20)))
+        assert calls == [1]
+        assert all(result is results[0] for result in results)
+        assert await querycache.get(GUILD, "test", loader, 1) is results[0]
+
+        querycache.invalidate(GUILD)
+        await querycache.get(GUILD, "test", loader, 1)
+        assert calls == [1, 1]
+
+    asyncio.run(scenario())
+
+
+def test_write_during_computation_is_not_cached():
+    querycache.invalidate()
+
+    async def scenario():
+        started, release = asyncio.Event(), asyncio.Event()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            started.set()
+            await release.wait()
+            return len(calls)
+
+        first = asyncio.ensure_future(querycache.get(GUILD, "race", loader))
+        await started.wait()
+        # Écriture commitée après la lecture : le résultat en cours est périmé
+        querycache.invalidate(GUILD)
+        release.set()
+        assert await first == 1
+        assert await querycache.get(GUILD, "race", loader) == 2
+
+    asyncio.run(scenario())
+
+
+def test_live_writers_invalidate_guild_stats():
+    """Chaque écriture qui change les stats d'un serveur invalide ses lectures en cache"""
+    old = int(time.time()) - 800 * 86400
+
+    async def insert_old_session(conn):
+        await db._insert_session(conn, 9, GUILD, "A", 1500, 300, old, old + 1800)
+
+    async def scenario():
+        await db.open_db()
+        try:
+            await db.init_db()
+            now = db.now_ts()
+            writers = {
+                "upsert_user": lambda: db.upsert_user(1, "alice", now, GUILD),
+                "complete_cycle": lambda: db.complete_cycle(GUILD, 1, "A", 3000, 600, now - 3600, now),
+                "end_session": lambda: db.end_session(GUILD, 1),
+                "archive_cold_data": lambda: db.archive_cold_data(),
+                "rebuild_daily_rollup": lambda: db.rebuild_daily_rollup(GUILD),
+                "recompute_streaks": lambda: db.recompute_streaks(GUILD),
+                "clear_all_stats": lambda: db.clear_all_stats(GUILD),
+            }
+            for name, write in writers.items():
+                if name == "end_session":
+                    await db.add_participant(GUILD, 1, "A")
+                    participants.get(GUILD, 1).join_ts = now - 600
+                if name == "archive_cold_data":
+                    await db.pool.write(insert_old_session)
+                before = querycache._generations.get(GUILD, 0)
+                await write()
+                assert querycache._generations.get(GUILD, 0) > before, name
+        finally:
+            await db.close_db()
+
+    asyncio.run(scenario())
+
+
+def test_expired_and_surplus_entries_are_removed(monkeypatch):
+    querycache.invalidate()
+    clock = [1000.0]
+    monkeypatch.setattr(querycache.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(querycache.config, "READ_CACHE_TTL_SECONDS", 30)
+    monkeypatch.setattr(querycache.config, "READ_CACHE_MAX_ENTRIES", 3)
+
+    async def loader(value):
+        return value
+
+    async def scenario():
+        await querycache.get(GUILD, "old", loader, 0)
+        clock[0] += 20
+        for value in (1, 2):
+            await querycache.get(GUILD, "test", loader, value)
+        # Lecture d'une entrée expirée : retirée avant le recalcul
+        clock[0] += 15
+        assert querycache.size() == 3
+        assert await querycache.get(GUILD, "old", loader, 0) == 0
+        assert querycache.size() == 3 and (GUILD, "old", (0,)) in querycache._results
+
+        # Insertion : les entrées expirées partent, puis les plus anciennes au-delà du plafond
+        clock[0] += 20
+        evictions = querycache.stats["evictions"]
+        for value in (3, 4, 5, 6):
+            await querycache.get(GUILD, "test", loader, value)
+        assert list(querycache._results) == [(GUILD, "test", (value,)) for value in (4, 5, 6)]
+        assert querycache.stats["evictions"] - evictions == 4
+
+    asyncio.run(scenario())
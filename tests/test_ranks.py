@@ -0,0 +1,75 @@
+# ==========================
+# LRE-BOT/tests/test_ranks.py
+# ==========================
+import asyncio
+from core import ranks
+
+GUILD = 42
+
+
+def _reset():
+    for store in (ranks._indexes, ranks._loading, ranks._pending, ranks._generations):
+        store.clear()
+
+
+def test_rank_counts_strictly_greater_values():
+    index = ranks.RankIndex([(1, 50, 40, 10, 3), (2, 30, 30, 0, 5), (3, 30, 20, 10, 1)])
+    assert index.rank("total", 50) == 1
+    assert index.rank("total", 30) == 2
+    assert index.rank("rest", 10) == 1
+    assert index.rank("streak", 0) == 4
+    index.set(2, (60, 30, 0, 5))
+    assert index.rank("total", 50) == 2
+
+
+def test_update_during_load_is_replayed():
+    _reset()
+
+    async def scenario():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def loader(guild_id):
+            started.set()
+            await release.wait()
+            return [(1, 10, 10, 0, 0)]
+
+        task = asyncio.ensure_future(ranks.get_index(GUILD, loader))
+        await started.wait()
+        ranks.update(GUILD, 2, (20, 20, 0, 0))
+        release.set()
+        index = await task
+        assert index.rank("total", 10) == 2
+        assert ranks._indexes[GUILD] is index
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_during_load_drops_stale_index():
+    _reset()
+
+    async def scenario():
+        started, release = asyncio.Event(), asyncio.Event()
+        calls = []
+
+        async def loader(guild_id):
+            calls.append(guild_id)
+            if len(calls) == 1:
+                started.set()
+                await release.wait()
+                return [(1, 10, 10, 0, 0)]
+            return [(1, 10, 10, 0, 0), (2, 20, 20, 0, 0)]
+
+        stale = asyncio.ensure_future(ranks.get_index(GUILD, loader))
+        await started.wait()
+        # Écriture commitée après la lecture du loader : l'index en cours de chargement est périmé
+        ranks.invalidate(GUILD)
+        release.set()
+        await stale
+        assert GUILD not in ranks._indexes
+
+        fresh = await ranks.get_index(GUILD, loader)
+        assert len(calls) == 2
+        assert fresh.rank("total", 10) == 2
+        assert ranks._indexes[GUILD] is fresh
+
+    asyncio.run(scenario())
@@ -0,0 +1,65 @@
+# ==========================
+# LRE-BOT/tests/test_streaks.py
+# ==========================
+import asyncio
+from datetime import datetime, timedelta
+from core import config, db, streaks
+
+GUILD = 7002
+DAY = 86400
+
+
+def _noon(days_ago: int):
+    """Midi local il y a `days_ago` jours (loin de RESET_HOUR)"""
+    day = datetime.now(streaks._TZ).replace(hour=12, minute=0, second=0, microsecond=0)
+    return int((day - timedelta(days=days_ago)).timestamp())
+
+
+def test_advance_transitions():
+    assert streaks.advance(0, 0, None, 10) == (1, 1)
+    assert streaks.advance(1, 1, 10, 10) == (1, 1)
+    assert streaks.advance(1, 1, 10, 11) == (2, 2)
+    assert streaks.advance(5, 5, 10, 13) == (1, 5)
+
+
+def test_current_streak_expires_after_a_missed_day():
+    now = _noon(0)
+    assert streaks.current_streak(3, now - DAY, now) == 3
+    assert streaks.current_streak(3, now - 2 * DAY, now) == 0
+    assert streaks.current_streak(3, None, now) == 0
+
+
+def test_pause_only_day_does_not_extend_streak():
+    assert config.RESET_HOUR < 12
+
+    async def credit(user_id, work, pause, ts):
+        async def op(conn):
+            await db._credit_user(conn, user_id, GUILD, "A", work, pause, True, ts)
+        await db.pool.write(op)
+
+    async def streak_row(user_id):
+        async with db.pool.reader() as conn:
+            async with conn.execute("""
+                SELECT streak_current, streak_best, last_active_date FROM users
+                WHERE user_id = ? AND guild_id = ?
+            """, (user_id, GUILD)) as cursor:
+                return await cursor.fetchone()
+
+    async def scenario():
+        await db.open_db()
+        try:
+            await db.init_db()
+            await credit(1, 1500, 300, _noon(3))
+            await credit(1, 0, 300, _noon(2))
+            assert await streak_row(1) == (1, 1, _noon(3))
+            # Le jour de pause seule laisse un trou : le streak repart à 1
+            await credit(1, 1500, 300, _noon(1))
+            assert await streak_row(1) == (1, 1, _noon(1))
+
+            # Première activité en pause seule : aucun jour actif
+            await credit(2, 0, 300, _noon(1))
+            assert await streak_row(2) == (0, 0, None)
+        finally:
+            await db.close_db()
+
+    asyncio.run(scenario())